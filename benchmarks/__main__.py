@@ -0,0 +1,656 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2018 SerialLab Corp.  All rights reserved.
+'''
+Runs the EParseCIS benchmarks, e.g. `python -m benchmarks tag-filter`.
+The results of a run are saved with `--output results.json` and two runs
+are compared with `python -m benchmarks compare base.json results.json`.
+'''
+import argparse
+import bz2
+import gzip
+import io
+import json
+import lzma
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+from eparsecis import checkpoint, columnar, eparsecis, jsonld, parallel, \
+    scanner, sources, urn, xmlwriter
+from eparsecis.sqlite import SQLiteFlexibleNSParser, SQLiteSink
+from eparsecis.stats import ParseStats
+from benchmarks.generator import EVENT_KINDS, generate_document, \
+    generate_json_document, generate_master_data, parse_event_mix
+
+# the results reported by the benchmarks that were run
+RESULTS = []
+
+
+def reset_peak_rss():
+    '''
+    Resets the peak resident set size of the process where the platform
+    supports it (Linux), so that the next `peak_rss` is the peak of what
+    runs in between.
+    '''
+    try:
+        with open('/proc/self/clear_refs', 'w') as stream:
+            stream.write('5')
+    except OSError:
+        pass
+
+
+def peak_rss():
+    '''
+    :return: The peak resident set size of the process in bytes, or None
+    if it is not known.
+    '''
+    try:
+        with open('/proc/self/status') as stream:
+            for line in stream:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes, except on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def best_of(repeat, function, *args, **kwargs):
+    '''
+    Returns the fastest of `repeat` calls to `function` in seconds.  The
+    peak RSS is reset first, so the next `report` gives the peak of the
+    calls.
+    '''
+    best = None
+    reset_peak_rss()
+    for i in range(repeat):
+        start = time.perf_counter()
+        function(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def report(name, seconds, events, size):
+    peak = peak_rss()
+    RESULTS.append({'name': name, 'seconds': seconds,
+                    'events_per_second': events / seconds,
+                    'mb_per_second': size / seconds / 1e6,
+                    'peak_rss_mb': None if peak is None else peak / 1e6})
+    print('{0:<40} {1:8.3f}s {2:12.0f} events/s {3:8.1f} MB/s {4:>8} '
+          'MB peak RSS'.format(
+              name, seconds, events / seconds, size / seconds / 1e6,
+              '-' if peak is None else '{0:.1f}'.format(peak / 1e6)))
+
+
+def bench_tag_filter(args, path, size):
+    '''
+    Compares parsing with and without the iterparse tag filter.
+    '''
+    for parser_class in (eparsecis.EPCISParser, eparsecis.FlexibleNSParser):
+        for handle_unexpected in (True, False):
+            seconds = best_of(
+                args.repeat,
+                parser_class(path).parse,
+                handle_unexpected=handle_unexpected)
+            report('{0} handle_unexpected={1}'.format(
+                parser_class.__name__, handle_unexpected),
+                seconds, args.events, size)
+
+
+def bench_parsers(args, path, size):
+    '''
+    Compares the EPCISParser and the FlexibleNSParser on the generated
+    document (the EPCISParser can only parse it without --prefix) and on
+    the tests/data/epcis.xml fixture.
+    '''
+    fixture = os.path.join(os.path.dirname(__file__), os.pardir,
+                           'tests', 'data', 'epcis.xml')
+    fixture_size = os.path.getsize(fixture)
+    for parser_class in (eparsecis.EPCISParser, eparsecis.FlexibleNSParser):
+        if not (args.prefix and parser_class is eparsecis.EPCISParser):
+            seconds = best_of(args.repeat, parser_class(path).parse)
+            report('{0} generated'.format(parser_class.__name__),
+                   seconds, args.events, size)
+        seconds = best_of(args.repeat, parse_repeatedly, parser_class,
+                          fixture, 100)
+        report('{0} epcis.xml x100'.format(parser_class.__name__),
+               seconds, 400, fixture_size * 100)
+
+
+def bench_huge_tree(args, path, size):
+    '''
+    Compares parsing with and without lxml's huge_tree option.
+    '''
+    for parser_class in (eparsecis.EPCISParser, eparsecis.FlexibleNSParser):
+        if args.prefix and parser_class is eparsecis.EPCISParser:
+            continue
+        for huge_tree in (False, True):
+            seconds = best_of(args.repeat, parser_class(
+                path, fast_records=True).parse, huge_tree=huge_tree)
+            report('{0} huge_tree={1}'.format(
+                parser_class.__name__, huge_tree), seconds, args.events,
+                size)
+
+
+class NoOpHandlersMixin(object):
+
+    def handle_sbdh(self, header):
+        pass
+
+    def handle_object_event(self, epcis_event):
+        pass
+
+    def handle_aggregation_event(self, epcis_event):
+        pass
+
+    def handle_transaction_event(self, epcis_event):
+        pass
+
+    def handle_transformation_event(self, epcis_event):
+        pass
+
+
+def bench_handlers(args, path, size):
+    '''
+    Compares the overhead of the ways events are handed to application
+    code: the default `handle_*` methods, overridden no-op `handle_*`
+    methods and consuming `iter_events`.
+    '''
+    parser_class = eparsecis.FlexibleNSParser if args.prefix \
+        else eparsecis.EPCISParser
+    no_op_class = type('NoOp' + parser_class.__name__,
+                       (NoOpHandlersMixin, parser_class), {})
+    seconds = best_of(args.repeat,
+                      parser_class(path, fast_records=True).parse)
+    report('default handle_* methods', seconds, args.events, size)
+    seconds = best_of(args.repeat, no_op_class(path, fast_records=True).parse)
+    report('no-op handle_* methods', seconds, args.events, size)
+    seconds = best_of(args.repeat, consume_events,
+                      no_op_class(path, fast_records=True))
+    report('iter_events', seconds, args.events, size)
+
+
+def consume_events(parser):
+    for parsed in parser.iter_events():
+        pass
+
+
+def bench_stats(args, path, size):
+    '''
+    Compares parsing without and with parse stats and prints the time of
+    each phase.
+    '''
+    parser_class = eparsecis.FlexibleNSParser if args.prefix \
+        else eparsecis.EPCISParser
+    seconds = best_of(args.repeat,
+                      parser_class(path, fast_records=True).parse)
+    report('without stats', seconds, args.events, size)
+    parse_stats = ParseStats()
+    seconds = best_of(args.repeat, parser_class(
+        path, fast_records=True, stats=parse_stats).parse)
+    report('with stats', seconds, args.events, size)
+    for phase, phase_seconds in parse_stats.times.items():
+        print('  {0:<10} {1:6.1%}'.format(
+            phase, phase_seconds / parse_stats.elapsed))
+
+
+def bench_checkpoint(args, path, size):
+    '''
+    Compares parsing the document with and without saving checkpoints and
+    resuming the parse 90% of the way through the document, from the
+    scanned file and from a gzip copy whose skipped events are dropped
+    unparsed.
+    '''
+    parser_class = eparsecis.FlexibleNSParser if args.prefix \
+        else eparsecis.EPCISParser
+    seconds = best_of(args.repeat, parser_class(path).parse)
+    report('full parse', seconds, args.events, size)
+    directory = tempfile.mkdtemp()
+    try:
+        store = checkpoint.FileCheckpointStore(
+            os.path.join(directory, 'checkpoints.json'))
+        seconds = best_of(args.repeat, parser_class(
+            path, checkpoint_store=store).parse)
+        report('with checkpoints', seconds, args.events, size)
+        gzip_path = os.path.join(directory, 'events.xml.gz')
+        with open(path, 'rb') as source, \
+                gzip.open(gzip_path, 'wb', compresslevel=1) as stream:
+            shutil.copyfileobj(source, stream)
+        # the header and 90% of the events
+        ordinal = 1 + args.events * 9 // 10
+        for name, source in (('resume scanned', path),
+                             ('resume gzip', gzip_path)):
+            resume = checkpoint.Checkpoint(
+                checkpoint.get_document_id(source), ordinal, None)
+            seconds = best_of(args.repeat, parser_class(source).parse,
+                              resume=resume)
+            report(name, seconds, args.events - ordinal + 1, size)
+    finally:
+        shutil.rmtree(directory)
+
+
+def bench_records(args, path, size):
+    '''
+    Compares building EPCPyYes objects with building fast records.
+    '''
+    parser_class = eparsecis.FlexibleNSParser if args.prefix \
+        else eparsecis.EPCISParser
+    for fast_records in (False, True):
+        seconds = best_of(args.repeat,
+                          parser_class(path, fast_records=fast_records).parse)
+        report('{0} fast_records={1}'.format(
+            parser_class.__name__, fast_records), seconds, args.events, size)
+
+
+def bench_parallel(args, path, size):
+    '''
+    Compares parsing --files copies of the document one after the other
+    with parsing them in a pool of --workers processes.
+    '''
+    paths = [path] * args.files
+    parser_kwargs = {'fast_records': True}
+    seconds = best_of(args.repeat, parse_sequentially, paths, parser_kwargs)
+    report('sequential {0} files'.format(args.files), seconds,
+           args.events * args.files, size * args.files)
+    seconds = best_of(args.repeat, parse_in_parallel, paths, parser_kwargs,
+                      args.workers)
+    report('parse_files {0} files, {1} workers'.format(
+        args.files, args.workers or os.cpu_count()), seconds,
+        args.events * args.files, size * args.files)
+
+
+def bench_sharding(args, path, size):
+    '''
+    Compares parsing the document in one process with scanning it and
+    parsing its shards in a pool of --workers processes.
+    '''
+    parser_class = eparsecis.FlexibleNSParser if args.prefix \
+        else eparsecis.EPCISParser
+    parser_kwargs = {'fast_records': True}
+    seconds = best_of(args.repeat, parser_class(path, **parser_kwargs).parse)
+    report('{0} one process'.format(parser_class.__name__), seconds,
+           args.events, size)
+    seconds = best_of(args.repeat, scanner.scan_file, path,
+                      parallel.DEFAULT_SHARD_SIZE)
+    report('scan_file', seconds, args.events, size)
+    seconds = best_of(args.repeat, parse_document, path, parser_class,
+                      parser_kwargs, args.workers)
+    report('parse_document {0} workers'.format(
+        args.workers or os.cpu_count()), seconds, args.events, size)
+
+
+def parse_document(path, parser_class, parser_kwargs, workers):
+    shard_size = max(1, os.path.getsize(path) // (workers or os.cpu_count()))
+    for value in parallel.parse_document(path, parser_class, parser_kwargs,
+                                         handler=discard,
+                                         max_workers=workers,
+                                         shard_size=shard_size):
+        pass
+
+
+def bench_compression(args, path, size):
+    '''
+    Compares parsing the document with parsing it while decompressing
+    gzip, bzip2, xz and (if zstandard is installed) zstd copies of it.
+    '''
+    with open(path, 'rb') as stream:
+        data = stream.read()
+    compressors = [('plain', None), ('gzip', gzip.compress),
+                   ('bz2', bz2.compress), ('xz', lzma.compress)]
+    if sources.zstandard is not None:
+        compressors.append(
+            ('zstd', sources.zstandard.ZstdCompressor().compress))
+    parser_class = eparsecis.FlexibleNSParser if args.prefix \
+        else eparsecis.EPCISParser
+    for name, compress in compressors:
+        if compress is None:
+            compressed_path = path
+        else:
+            handle, compressed_path = tempfile.mkstemp(suffix='.' + name)
+            with os.fdopen(handle, 'wb') as stream:
+                stream.write(compress(data))
+        try:
+            seconds = best_of(args.repeat, parser_class(
+                compressed_path, fast_records=True,
+                buffer_size=args.buffer_size).parse)
+            report('{0} ({1:.1f} MB)'.format(
+                name, os.path.getsize(compressed_path) / 1e6),
+                seconds, args.events, size)
+        finally:
+            if compressed_path != path:
+                os.remove(compressed_path)
+
+
+def bench_input(args, path, size):
+    '''
+    Compares letting lxml read the file with reading it through a large
+    buffer and with memory-mapping it.
+    '''
+    parser_class = eparsecis.FlexibleNSParser if args.prefix \
+        else eparsecis.EPCISParser
+    for name, kwargs in (
+            ('lxml reads the path', {}),
+            ('buffer_size={0}'.format(args.buffer_size or 1 << 22),
+             {'buffer_size': args.buffer_size or 1 << 22}),
+            ('use_mmap', {'use_mmap': True})):
+        seconds = best_of(args.repeat, parser_class(
+            path, fast_records=True, **kwargs).parse)
+        report(name, seconds, args.events, size)
+
+
+def bench_master_data(args, path, size):
+    '''
+    Streams a master data document with --events vocabulary elements.
+    '''
+    handle, master_data_path = tempfile.mkstemp(suffix='.xml')
+    try:
+        with os.fdopen(handle, 'wb') as stream:
+            size = generate_master_data(stream, args.events)
+        seconds = best_of(args.repeat,
+                          eparsecis.MasterDataParser(master_data_path).parse)
+        report('MasterDataParser', seconds, args.events, size)
+    finally:
+        os.remove(master_data_path)
+
+
+def bench_urn(args, path, size):
+    '''
+    Compares decoding the SGTINs of the generated document one by one with
+    decoding each EPC list with `urn.decode_epcs`.  The events/s column is
+    the number of EPCs decoded per second.
+    '''
+    parser_class = eparsecis.FlexibleNSParser if args.prefix \
+        else eparsecis.EPCISParser
+    epc_lists = {}
+    for compact in (False, True):
+        epc_lists[compact] = [
+            epcis_event.epc_list for kind, epcis_event in parser_class(
+                path, fast_records=True,
+                compact_epc_lists=compact).iter_events()
+            if kind == 'ObjectEvent']
+    count = sum(len(epc_list) for epc_list in epc_lists[False])
+    seconds = best_of(args.repeat, decode_one_by_one, epc_lists[False])
+    report('one by one', seconds, count, size)
+    seconds = best_of(args.repeat, decode_lists, epc_lists[False])
+    report('decode_epcs lists', seconds, count, size)
+    seconds = best_of(args.repeat, decode_lists, epc_lists[True])
+    report('decode_epcs EPCLists', seconds, count, size)
+
+
+def decode_one_by_one(epc_lists):
+    for epc_list in epc_lists:
+        for epc in epc_list:
+            company_prefix, reference, serial = epc[17:].split('.')
+            body = reference[:1] + company_prefix + reference[1:]
+            (body + urn.check_digit(body), serial)
+
+
+def decode_lists(epc_lists):
+    for epc_list in epc_lists:
+        urn.decode_epcs(epc_list)
+
+
+def bench_sqlite(args, path, size):
+    '''
+    Writes the generated document to a SQLite database with different
+    batch sizes and synchronous pragmas.
+    '''
+    directory = tempfile.mkdtemp()
+    try:
+        for batch_size, synchronous in ((1, 'FULL'), (1, 'NORMAL'),
+                                        (1000, 'NORMAL'), (1000, 'OFF')):
+            seconds = best_of(args.repeat, write_sqlite, path,
+                              os.path.join(directory, 'events.db'),
+                              batch_size=batch_size, synchronous=synchronous)
+            report('batch_size={0} synchronous={1}'.format(
+                batch_size, synchronous), seconds, args.events, size)
+    finally:
+        shutil.rmtree(directory)
+
+
+def write_sqlite(path, database, **kwargs):
+    if os.path.exists(database):
+        os.remove(database)
+    with SQLiteSink(database, **kwargs) as sink:
+        SQLiteFlexibleNSParser(path, fast_records=True, sink=sink).parse()
+
+
+def bench_columnar(args, path, size):
+    '''
+    Compares buffering the records of the generated document with
+    collecting them into columnar batches.
+    '''
+    parser_class = eparsecis.FlexibleNSParser if args.prefix \
+        else eparsecis.EPCISParser
+    seconds = best_of(args.repeat, collect_records, parser_class, path)
+    report('list of records', seconds, args.events, size)
+    seconds = best_of(args.repeat, collect_batches, parser_class, path)
+    report('columnar batches', seconds, args.events, size)
+
+
+def collect_records(parser_class, path):
+    return list(parser_class(path, fast_records=True).iter_events())
+
+
+def collect_batches(parser_class, path):
+    return list(columnar.iter_batches(parser_class(path, fast_records=True)))
+
+
+def bench_json(args, path, size):
+    '''
+    Compares parsing the generated document with parsing its JSON-LD
+    equivalent with ijson (if it is installed) and with the event list
+    scanner.
+    '''
+    seconds = best_of(args.repeat, eparsecis.FlexibleNSParser(
+        path, fast_records=True).parse)
+    report('XML FlexibleNSParser', seconds, args.events, size)
+    handle, json_path = tempfile.mkstemp(suffix='.jsonld')
+    try:
+        with os.fdopen(handle, 'wb') as stream:
+            json_size = generate_json_document(stream, args.events,
+                                               args.epcs)
+        if jsonld.ijson is not None:
+            seconds = best_of(args.repeat, jsonld.JSONParser(
+                json_path, fast_records=True).parse)
+            report('JSONParser ijson ({0})'.format(jsonld.ijson.backend),
+                   seconds, args.events, json_size)
+        seconds = best_of(args.repeat, jsonld.JSONParser(
+            json_path, fast_records=True, use_ijson=False).parse)
+        report('JSONParser event list scanner', seconds, args.events,
+               json_size)
+    finally:
+        os.remove(json_path)
+
+
+def bench_xml_writer(args, path, size):
+    '''
+    Compares writing the parsed events with the incremental XML writer and
+    rendering them with the EPCPyYes templates.
+    '''
+    events = [(kind, record.to_epcpyyes()) for kind, record in
+              eparsecis.EPCISParser(path, fast_records=True).iter_events()]
+    stream = io.BytesIO()
+    seconds = best_of(args.repeat, write_xml, events, stream)
+    report('EPCISWriter', seconds, args.events, len(stream.getvalue()))
+    seconds = best_of(args.repeat, render_xml, events, stream)
+    report('EPCPyYes render()', seconds, args.events,
+           len(stream.getvalue()))
+
+
+def write_xml(events, stream):
+    stream.seek(0)
+    stream.truncate()
+    with xmlwriter.EPCISWriter(stream) as writer:
+        writer.write_events(events)
+
+
+def render_xml(events, stream):
+    stream.seek(0)
+    stream.truncate()
+    for kind, epcis_object in events:
+        stream.write(epcis_object.render().encode('utf-8'))
+
+
+def parse_sequentially(paths, parser_kwargs):
+    for path in paths:
+        eparsecis.EPCISParser(path, **parser_kwargs).parse()
+
+
+def parse_in_parallel(paths, parser_kwargs, workers):
+    for result in parallel.parse_files(paths, parser_kwargs=parser_kwargs,
+                                       handler=discard,
+                                       max_workers=workers):
+        pass
+
+
+def discard(kind, epcis_event):
+    return None
+
+
+def parse_repeatedly(parser_class, path, times):
+    for i in range(times):
+        parser_class(path).parse()
+
+
+BENCHMARKS = {
+    'tag-filter': bench_tag_filter,
+    'parsers': bench_parsers,
+    'huge-tree': bench_huge_tree,
+    'handlers': bench_handlers,
+    'stats': bench_stats,
+    'checkpoint': bench_checkpoint,
+    'records': bench_records,
+    'parallel': bench_parallel,
+    'sharding': bench_sharding,
+    'compression': bench_compression,
+    'input': bench_input,
+    'masterdata': bench_master_data,
+    'urn': bench_urn,
+    'sqlite': bench_sqlite,
+    'columnar': bench_columnar,
+    'json': bench_json,
+    'xml-writer': bench_xml_writer,
+}
+
+
+def compare(argv=None):
+    '''
+    Compares the events/s of two runs saved with `--output` and exits with
+    status 1 if a result got slower than the threshold.
+    '''
+    arg_parser = argparse.ArgumentParser(prog='python -m benchmarks compare')
+    arg_parser.add_argument('base', help='results of the base run')
+    arg_parser.add_argument('new', help='results of the new run')
+    arg_parser.add_argument('--threshold', type=float, default=0.05,
+                            help='slowdown reported as a regression')
+    args = arg_parser.parse_args(argv)
+    runs = []
+    for path in (args.base, args.new):
+        with open(path) as stream:
+            runs.append({(result['benchmark'], result['name']): result
+                         for result in json.load(stream)['results']})
+    base, new = runs
+    regressions = 0
+    for key, result in new.items():
+        if key not in base:
+            continue
+        ratio = result['events_per_second'] / \
+            base[key]['events_per_second'] - 1
+        regressed = ratio < -args.threshold
+        regressions += regressed
+        print('{0:<52} {1:12.0f} {2:12.0f} events/s {3:+7.1%}{4}'.format(
+            '{0}: {1}'.format(*key), base[key]['events_per_second'],
+            result['events_per_second'], ratio,
+            ' REGRESSION' if regressed else ''))
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] == 'compare':
+        sys.exit(compare(argv[1:]))
+    arg_parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        epilog='python -m benchmarks compare BASE NEW compares two runs '
+               'saved with --output.')
+    arg_parser.add_argument('benchmark', nargs='+', choices=sorted(BENCHMARKS))
+    arg_parser.add_argument('--events', type=int, default=1000)
+    arg_parser.add_argument('--epcs', type=int, default=1000,
+                            help='EPCs per event')
+    arg_parser.add_argument('--prefix', default=None,
+                            help='namespace prefix for the event elements')
+    arg_parser.add_argument('--mix', type=parse_event_mix, default=None,
+                            help='event types and weights, e.g. '
+                                 'ObjectEvent=8,AggregationEvent=2 (of {0})'
+                            .format(', '.join(EVENT_KINDS)))
+    arg_parser.add_argument('--ilmd', action='store_true',
+                            help='add ILMD to the generated events')
+    arg_parser.add_argument('--no-sbdh', dest='sbdh', action='store_false',
+                            help='leave the header out of the document')
+    arg_parser.add_argument('--compression', default=None,
+                            choices=(sources.GZIP, sources.BZIP2, sources.XZ,
+                                     sources.ZSTD),
+                            help='compress the generated document')
+    arg_parser.add_argument('--seed', type=int, default=0,
+                            help='seed the event types are drawn with')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--files', type=int, default=8,
+                            help='documents parsed by the parallel benchmark')
+    arg_parser.add_argument('--buffer-size', type=int, default=None,
+                            help='read buffer size of the parsers')
+    arg_parser.add_argument('--workers', type=int, default=None,
+                            help='worker processes (default: CPU count)')
+    arg_parser.add_argument('--output', default=None,
+                            help='save the results to this JSON file')
+    args = arg_parser.parse_args(argv)
+    handle, path = tempfile.mkstemp(suffix='.xml')
+    results = []
+    try:
+        with os.fdopen(handle, 'wb') as stream:
+            size = generate_document(
+                stream, args.events, args.epcs, prefix=args.prefix,
+                event_mix=args.mix, ilmd=args.ilmd, sbdh=args.sbdh,
+                compression=args.compression, seed=args.seed)
+        for benchmark in args.benchmark:
+            print(benchmark)
+            del RESULTS[:]
+            BENCHMARKS[benchmark](args, path, size)
+            results.extend(dict(result, benchmark=benchmark)
+                           for result in RESULTS)
+    finally:
+        os.remove(path)
+    if args.output:
+        options = {key: value for key, value in vars(args).items()
+                   if key != 'output'}
+        with open(args.output, 'w') as stream:
+            json.dump({'options': options, 'document_size': size,
+                       'results': results}, stream, indent=2)
+
+
+if __name__ == '__main__':
+    main()
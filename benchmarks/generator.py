@@ -0,0 +1,308 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2018 SerialLab Corp.  All rights reserved.
+'''
+Generates synthetic EPCIS documents for benchmarking.  The documents are
+reproducible: the types of the events are drawn from a random generator
+seeded with `seed`.
+'''
+import bisect
+import bz2
+import gzip
+import itertools
+import lzma
+import random
+
+from eparsecis import sources
+
+EPCIS_NAMESPACE = 'urn:epcglobal:epcis:xsd:1'
+SBDH_NAMESPACE = \
+    'http://www.unece.org/cefact/namespaces/StandardBusinessDocumentHeader'
+CBV_MDA_NAMESPACE = 'urn:epcglobal:cbv:mda'
+
+EVENT_KINDS = ('ObjectEvent', 'AggregationEvent', 'TransactionEvent',
+               'TransformationEvent')
+
+_SBDH = '''  <EPCISHeader>
+    <sbdh:StandardBusinessDocumentHeader>
+      <sbdh:HeaderVersion>1.0</sbdh:HeaderVersion>
+      <sbdh:Sender>
+        <sbdh:Identifier Authority="SGLN">urn:epc:id:sgln:039999.999999.0\
+</sbdh:Identifier>
+      </sbdh:Sender>
+      <sbdh:Receiver>
+        <sbdh:Identifier Authority="SGLN">urn:epc:id:sgln:039999.111111.0\
+</sbdh:Identifier>
+      </sbdh:Receiver>
+      <sbdh:DocumentIdentification>
+        <sbdh:Standard>EPCglobal</sbdh:Standard>
+        <sbdh:TypeVersion>1.0</sbdh:TypeVersion>
+        <sbdh:InstanceIdentifier>55abd29c-010e-489e-af31-8f095b48dff9</sbdh:InstanceIdentifier>
+        <sbdh:Type>Events</sbdh:Type>
+        <sbdh:CreationDateAndTime>2018-02-27T18:22:09.549608</sbdh:CreationDateAndTime>
+      </sbdh:DocumentIdentification>
+    </sbdh:StandardBusinessDocumentHeader>
+  </EPCISHeader>
+'''
+
+_TIMES = (
+    '        <{0}eventTime>2018-01-22T22:51:49.294565+00:00'
+    '</{0}eventTime>\n'
+    '        <{0}recordTime>2018-01-22T22:51:49.294565+00:00'
+    '</{0}recordTime>\n'
+    '        <{0}eventTimeZoneOffset>+00:00</{0}eventTimeZoneOffset>\n')
+
+_WHERE = (
+    '        <{0}readPoint><{0}id>urn:epc:id:sgln:0614141.00777.0'
+    '</{0}id></{0}readPoint>\n'
+    '        <{0}bizLocation><{0}id>urn:epc:id:sgln:0614141.00888.0'
+    '</{0}id></{0}bizLocation>\n')
+
+_ILMD = (
+    '        <{0}ilmd>\n'
+    '          <cbvmd:lotNumber>LOT{1}</cbvmd:lotNumber>\n'
+    '          <cbvmd:itemExpirationDate>2020-12-31'
+    '</cbvmd:itemExpirationDate>\n'
+    '        </{0}ilmd>\n')
+
+_EVENTS = {
+    'ObjectEvent': (
+        '      <{0}ObjectEvent>\n' + _TIMES +
+        '        <{0}epcList>\n{1}        </{0}epcList>\n'
+        '        <{0}action>ADD</{0}action>\n'
+        '        <{0}bizStep>urn:epcglobal:cbv:bizstep:commissioning'
+        '</{0}bizStep>\n'
+        '        <{0}disposition>urn:epcglobal:cbv:disp:encoded'
+        '</{0}disposition>\n' + _WHERE +
+        '{2}      </{0}ObjectEvent>\n'),
+    'AggregationEvent': (
+        '      <{0}AggregationEvent>\n' + _TIMES +
+        '        <{0}parentID>urn:epc:id:sscc:0614141.1{3:09d}</{0}parentID>\n'
+        '        <{0}childEPCs>\n{1}        </{0}childEPCs>\n'
+        '        <{0}action>ADD</{0}action>\n'
+        '        <{0}bizStep>urn:epcglobal:cbv:bizstep:packing</{0}bizStep>\n'
+        '        <{0}disposition>urn:epcglobal:cbv:disp:in_progress'
+        '</{0}disposition>\n' + _WHERE +
+        '      </{0}AggregationEvent>\n'),
+    'TransactionEvent': (
+        '      <{0}TransactionEvent>\n' + _TIMES +
+        '        <{0}bizTransactionList>\n'
+        '          <{0}bizTransaction type="urn:epcglobal:cbv:btt:po">'
+        'urn:epcglobal:cbv:bt:0614141000005:PO{3}</{0}bizTransaction>\n'
+        '        </{0}bizTransactionList>\n'
+        '        <{0}epcList>\n{1}        </{0}epcList>\n'
+        '        <{0}action>ADD</{0}action>\n'
+        '        <{0}bizStep>urn:epcglobal:cbv:bizstep:shipping</{0}bizStep>\n'
+        '        <{0}disposition>urn:epcglobal:cbv:disp:in_transit'
+        '</{0}disposition>\n' + _WHERE +
+        '      </{0}TransactionEvent>\n'),
+    # the EPCIS 1.2 schema only allows TransformationEvents in an extension
+    'TransformationEvent': (
+        '      <{0}extension><{0}TransformationEvent>\n' + _TIMES +
+        '        <{0}inputEPCList>\n{1}        </{0}inputEPCList>\n'
+        '        <{0}outputEPCList>\n{1}        </{0}outputEPCList>\n'
+        '        <{0}transformationID>urn:epc:id:gdti:0614141.12345.{3}'
+        '</{0}transformationID>\n'
+        '        <{0}bizStep>urn:epcglobal:cbv:bizstep:repackaging'
+        '</{0}bizStep>\n' + _WHERE +
+        '{4}      </{0}TransformationEvent></{0}extension>\n'),
+}
+
+
+def open_compressed(stream, compression):
+    '''
+    Wraps a binary stream in a file object that compresses what is written
+    to it.
+    :param stream: The binary file-like object to write to.
+    :param compression: `sources.GZIP`, `BZIP2`, `XZ` or `ZSTD`.
+    :return: A file object, close it to finish the compressed data.
+    '''
+    if compression == sources.GZIP:
+        return gzip.GzipFile(fileobj=stream, mode='wb')
+    elif compression == sources.BZIP2:
+        return bz2.BZ2File(stream, mode='wb')
+    elif compression == sources.XZ:
+        return lzma.LZMAFile(stream, mode='wb')
+    elif compression == sources.ZSTD:
+        if sources.zstandard is None:
+            raise ImportError('The zstandard package is required to write '
+                              'zstd compressed documents.')
+        return sources.zstandard.ZstdCompressor().stream_writer(
+            stream, closefd=False)
+    raise ValueError('Unknown compression {0}.'.format(compression))
+
+
+def parse_event_mix(value):
+    '''
+    Parses an event mix given on the command line.
+    :param value: Comma separated kinds with optional weights, e.g.
+    `ObjectEvent=8,AggregationEvent=2`.
+    :return: A dictionary of event kind to weight.
+    '''
+    event_mix = {}
+    for item in value.split(','):
+        kind, __, weight = item.strip().partition('=')
+        if kind not in EVENT_KINDS:
+            raise ValueError('Unknown event type {0}.'.format(kind))
+        event_mix[kind] = float(weight or 1)
+    return event_mix
+
+
+def generate_document(stream, events=1000, epcs_per_event=100, prefix=None,
+                      event_mix=None, ilmd=False, sbdh=True,
+                      compression=None, seed=0):
+    '''
+    Writes an EPCIS document to a binary stream.
+    :param stream: The binary file-like object to write to.
+    :param events: The number of events in the document.
+    :param epcs_per_event: The number of EPCs in each event's EPC lists.
+    :param prefix: When set, the event elements are qualified with this
+    namespace prefix bound to the EPCIS namespace, e.g. `<epcis:action>`.
+    :param event_mix: A dictionary of event kind (see `EVENT_KINDS`) to
+    the weight it is drawn with, only ObjectEvents by default.
+    :param ilmd: Add ILMD to the ObjectEvents and TransformationEvents.
+    :param sbdh: Add a standard business document header.
+    :param compression: Compress the document (see `open_compressed`).
+    :param seed: The seed the types of the events are drawn with.
+    :return: The number of (uncompressed) bytes written.
+    '''
+    if compression:
+        with open_compressed(stream, compression) as compressed:
+            return generate_document(
+                compressed, events, epcs_per_event, prefix, event_mix,
+                ilmd, sbdh, None, seed)
+    p = prefix + ':' if prefix else ''
+    header = '<?xml version="1.0" encoding="UTF-8"?>\n' \
+             '<epcis:EPCISDocument xmlns:epcis="{0}" xmlns:sbdh="{1}" ' \
+             'xmlns:cbvmd="{2}" ' \
+             'schemaVersion="1.2" creationDate="2018-02-27T21:52:16">\n' \
+        .format(EPCIS_NAMESPACE, SBDH_NAMESPACE, CBV_MDA_NAMESPACE)
+    if prefix and prefix != 'epcis':
+        header = header.replace(
+            'xmlns:epcis=', 'xmlns:{0}="{1}" xmlns:epcis='.format(
+                prefix, EPCIS_NAMESPACE))
+    written = stream.write(header.encode('utf-8'))
+    if sbdh:
+        written += stream.write(_SBDH.encode('utf-8'))
+    written += stream.write(
+        '  <{0}EPCISBody>\n    <{0}EventList>\n'.format(p).encode('utf-8'))
+    kinds = _draw_kinds(events, event_mix, seed)
+    serial = 1
+    for i, kind in enumerate(kinds):
+        epcs = ''.join(
+            '          <{0}epc>urn:epc:id:sgtin:0614141.107346.{1}</{0}epc>\n'
+            .format(p, serial + j) for j in range(epcs_per_event))
+        serial += epcs_per_event
+        event_ilmd = extension = ''
+        if ilmd:
+            event_ilmd = _ILMD.format(p, i)
+            extension = (
+                '        <{0}extension>\n{1}        </{0}extension>\n'
+                .format(p, event_ilmd))
+        event = _EVENTS[kind].format(p, epcs, extension, i, event_ilmd)
+        written += stream.write(event.encode('utf-8'))
+    written += stream.write(
+        '    </{0}EventList>\n  </{0}EPCISBody>\n</epcis:EPCISDocument>\n'
+        .format(p).encode('utf-8'))
+    return written
+
+
+def _draw_kinds(events, event_mix, seed):
+    if not event_mix:
+        return ['ObjectEvent'] * events
+    # Random.choices was added in python 3.6, so the kinds are drawn by
+    # bisecting the cumulative weights (sorted, since dictionaries are not
+    # ordered in python 3.5)
+    kinds = sorted(event_mix)
+    cumulative_weights = list(itertools.accumulate(
+        event_mix[kind] for kind in kinds))
+    total = cumulative_weights[-1]
+    rng = random.Random(seed)
+    return [kinds[bisect.bisect(cumulative_weights, rng.random() * total)]
+            for _ in range(events)]
+
+
+def generate_master_data(stream, elements=100000, attributes=5):
+    '''
+    Writes an EPCISMasterDataDocument with a location vocabulary to a
+    binary stream.
+    :param stream: The binary file-like object to write to.
+    :param elements: The number of VocabularyElements in the document.
+    :param attributes: The number of attributes of each element.
+    :return: The number of bytes written.
+    '''
+    written = stream.write(
+        b'<?xml version="1.0" encoding="UTF-8"?>\n'
+        b'<epcismd:EPCISMasterDataDocument '
+        b'xmlns:epcismd="urn:epcglobal:epcis-masterdata:xsd:1" '
+        b'schemaVersion="1.2" creationDate="2018-02-27T21:52:16">\n'
+        b'  <EPCISBody>\n    <VocabularyList>\n'
+        b'      <Vocabulary type="urn:epcglobal:epcis:vtype:BusinessLocation">'
+        b'\n        <VocabularyElementList>\n')
+    for i in range(elements):
+        element = ''.join(
+            '            <attribute id="urn:epcglobal:cbv:mda#attribute{0}">'
+            'value {0} of location {1}</attribute>\n'.format(j, i)
+            for j in range(attributes))
+        written += stream.write((
+            '          <VocabularyElement id="urn:epc:id:sgln:0614141.{0}.0">'
+            '\n{1}          </VocabularyElement>\n'
+        ).format(i, element).encode('utf-8'))
+    written += stream.write(
+        b'        </VocabularyElementList>\n      </Vocabulary>\n'
+        b'    </VocabularyList>\n  </EPCISBody>\n'
+        b'</epcismd:EPCISMasterDataDocument>\n')
+    return written
+
+
+def generate_json_document(stream, events=1000, epcs_per_event=100):
+    '''
+    Writes the EPCIS 2.0 JSON-LD equivalent of `generate_document` to a
+    binary stream.
+    :param stream: The binary file-like object to write to.
+    :param events: The number of ObjectEvents in the document.
+    :param epcs_per_event: The number of EPCs in each event's epcList.
+    :return: The number of bytes written.
+    '''
+    written = stream.write(
+        b'{\n  "@context": ["https://ref.gs1.org/standards/epcis/2.0.0/'
+        b'epcis-context.jsonld"],\n  "type": "EPCISDocument",\n'
+        b'  "schemaVersion": "2.0",\n'
+        b'  "creationDate": "2018-02-27T21:52:16Z",\n'
+        b'  "epcisBody": {\n    "eventList": [\n')
+    serial = 1
+    for i in range(events):
+        epcs = ',\n'.join(
+            '          "urn:epc:id:sgtin:0614141.107346.{0}"'.format(
+                serial + j) for j in range(epcs_per_event))
+        serial += epcs_per_event
+        event = (
+            '      {{\n'
+            '        "type": "ObjectEvent",\n'
+            '        "eventTime": "2018-01-22T22:51:49.294565+00:00",\n'
+            '        "recordTime": "2018-01-22T22:51:49.294565+00:00",\n'
+            '        "eventTimeZoneOffset": "+00:00",\n'
+            '        "epcList": [\n{0}\n        ],\n'
+            '        "action": "ADD",\n'
+            '        "bizStep": "commissioning",\n'
+            '        "disposition": "encoded",\n'
+            '        "readPoint": {{"id": "urn:epc:id:sgln:0614141.00777.0"'
+            '}},\n'
+            '        "bizLocation": {{"id": "urn:epc:id:sgln:0614141.00888.0"'
+            '}}\n'
+            '      }}{1}\n'
+        ).format(epcs, ',' if i < events - 1 else '')
+        written += stream.write(event.encode('utf-8'))
+    written += stream.write(b'    ]\n  }\n}\n')
+    return written
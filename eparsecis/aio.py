@@ -0,0 +1,134 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2018 SerialLab Corp.  All rights reserved.
+'''
+Parsers for streams that are read asynchronously with asyncio.  The
+asynchronous iterators are classes rather than asynchronous generators,
+which require python 3.6, so the module can be used with python 3.5.
+'''
+from eparsecis.eparsecis import EPCISParser, FlexibleNSParser
+
+
+class _AsyncChunks(object):
+    '''
+    Iterates the chunks of an asynchronous stream: an object with a
+    `read(size)` coroutine method or an asynchronous iterable of bytes.
+    '''
+
+    def __init__(self, stream, chunk_size):
+        self._read = getattr(stream, 'read', None)
+        self._chunk_size = chunk_size
+        self._chunks = None if self._read else stream.__aiter__()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            if self._read is None:
+                chunk = await self._chunks.__anext__()
+            else:
+                chunk = await self._read(self._chunk_size)
+                if not chunk:
+                    raise StopAsyncIteration
+            # the lxml parsers do not accept memoryviews
+            if isinstance(chunk, memoryview):
+                chunk = chunk.tobytes()
+            if chunk:
+                return chunk
+
+
+class _AsyncEvents(object):
+    '''
+    Feeds the chunks of an asynchronous stream to a pull parser and
+    iterates the `(kind, event)` tuples parsed from them.
+    '''
+
+    def __init__(self, parser, chunks, pull_parser):
+        self._parser = parser
+        self._chunks = chunks
+        self._pull_parser = pull_parser
+        self._parsed = iter(())
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            try:
+                return next(self._parsed)
+            except StopIteration:
+                pass
+            if self._chunks is None:
+                raise StopAsyncIteration
+            try:
+                chunk = await self._chunks.__anext__()
+            except StopAsyncIteration:
+                self._chunks = None
+                self._pull_parser.close()
+            else:
+                self._pull_parser.feed(chunk)
+            self._parsed = self._parser.read_pull_events(self._pull_parser)
+
+
+class AsyncParserMixin(object):
+    '''
+    Adds `iter_events_async` and `parse_async` to an `EPCISParser` (sub)
+    class.  The stream the parser is created with is either an object with
+    a `read(size)` coroutine method (an `asyncio.StreamReader`, for
+    example) or an asynchronous iterable of bytes.
+    '''
+
+    def iter_events_async(self, chunk_size=65536, huge_tree=False,
+                          handle_unexpected=None):
+        '''
+        Like `iter_events` for a stream that is read asynchronously, e.g.
+        `async for kind, event in parser.iter_events_async()`.  The stream
+        is read in chunks and fed to an incremental lxml parser, so the
+        event loop is only blocked while a chunk is parsed.
+        :param chunk_size: The number of bytes read from the stream at a
+        time.
+        :param huge_tree: See `iter_events`.
+        :param handle_unexpected: See `iter_events`.
+        :return: An asynchronous iterator of `(kind, event)` tuples.
+        '''
+        return _AsyncEvents(
+            self, _AsyncChunks(self.stream, chunk_size),
+            self.get_pull_parser(huge_tree, handle_unexpected))
+
+    async def parse_async(self, chunk_size=65536, huge_tree=False,
+                          handle_unexpected=None):
+        '''
+        Like `parse` for a stream that is read asynchronously.  See
+        `iter_events_async`.
+        :return: None
+        '''
+        async for kind, epcis_event in self.iter_events_async(
+                chunk_size=chunk_size, huge_tree=huge_tree,
+                handle_unexpected=handle_unexpected):
+            pass
+
+
+class AsyncEPCISParser(AsyncParserMixin, EPCISParser):
+    '''
+    An `EPCISParser` for streams that are read asynchronously.
+    '''
+    pass
+
+
+class AsyncFlexibleNSParser(AsyncParserMixin, FlexibleNSParser):
+    '''
+    A `FlexibleNSParser` for streams that are read asynchronously.
+    '''
+    pass
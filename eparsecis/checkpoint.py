@@ -0,0 +1,253 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2018 SerialLab Corp.  All rights reserved.
+'''
+Checkpoints long running parses so that a parse that was interrupted
+resumes after the last event it handled instead of from the start of the
+document.  A parser created with a `checkpoint_store` saves a
+`Checkpoint` every `checkpoint_interval` events (and when it stops) and
+`parse(resume=True)` skips the events of the last checkpoint of the
+document without creating objects for them.
+
+    store = FileCheckpointStore('/var/lib/epcis/checkpoints.json')
+    parser = MyParser('events.xml', checkpoint_store=store)
+    parser.parse(resume=True)
+
+Events are handled at least once: after a crash the events handled
+since the last saved checkpoint are handled again, so a smaller
+interval means fewer duplicates and more writes.
+'''
+import hashlib
+import json
+import os
+from collections import namedtuple
+from contextlib import contextmanager
+from io import BytesIO
+
+from eparsecis import scanner
+from eparsecis.sources import _PATH_TYPES, BufferStream, ChainedStream, \
+    get_compression, map_file
+
+# the bytes at each end of a document that identify it
+_HASHED_SIZE = 1 << 20
+
+
+class Checkpoint(namedtuple('Checkpoint', ['document', 'ordinal',
+                                           'position'])):
+    '''
+    The progress of a parse.
+    :param document: The id of the document (see `get_document_id`).
+    :param ordinal: The number of header and event elements of the
+    document that were handled.
+    :param position: The position in the input when the checkpoint was
+    saved or None if it is not known.  The parsers read ahead, so this is
+    an upper bound of the bytes of the handled events.
+    '''
+    __slots__ = ()
+
+
+def get_document_id(stream):
+    '''
+    Identifies a document by a SHA-256 hash of its size and of the first
+    and last megabyte of it, which is cheap even for huge files.
+    :param stream: A path or a seekable binary file object (its position
+    is restored).
+    :return: The hex digest or None if the stream is not seekable.
+    '''
+    if isinstance(stream, _PATH_TYPES):
+        if not os.path.isfile(stream):
+            return None
+        with open(stream, 'rb') as opened:
+            return get_document_id(opened)
+    try:
+        if not stream.seekable():
+            return None
+        position = stream.tell()
+    except (AttributeError, OSError):
+        return None
+    try:
+        size = stream.seek(0, os.SEEK_END)
+        digest = hashlib.sha256(str(size).encode('ascii'))
+        stream.seek(0)
+        digest.update(stream.read(_HASHED_SIZE))
+        if size > _HASHED_SIZE:
+            stream.seek(max(_HASHED_SIZE, size - _HASHED_SIZE))
+            digest.update(stream.read(_HASHED_SIZE))
+    finally:
+        stream.seek(position)
+    return digest.hexdigest()
+
+
+class FileCheckpointStore(object):
+    '''
+    Keeps the last checkpoint of each document in a JSON file.  Each save
+    replaces the file atomically after syncing it to the disk, so the
+    file holds either the old or the new checkpoints after a crash.
+    :param path: The path of the file.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+
+    def _read(self):
+        try:
+            with open(self.path) as stream:
+                return json.load(stream)
+        except FileNotFoundError:
+            return {}
+
+    def _write(self, checkpoints):
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w') as stream:
+            json.dump(checkpoints, stream)
+            stream.flush()
+            os.fsync(stream.fileno())
+        os.replace(temporary, self.path)
+        try:
+            directory = os.open(os.path.dirname(os.path.abspath(self.path)),
+                                os.O_RDONLY)
+        except OSError:  # pragma: no cover
+            # directories can not be opened on Windows
+            return
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+    def load(self, document):
+        '''
+        :param document: The id of the document.
+        :return: The last `Checkpoint` of the document or None.
+        '''
+        saved = self._read().get(document)
+        if saved is None:
+            return None
+        return Checkpoint(document, saved['ordinal'], saved['position'])
+
+    def save(self, checkpoint):
+        '''
+        Replaces the checkpoint of a document.
+        :param checkpoint: The `Checkpoint`.
+        :return: None
+        '''
+        checkpoints = self._read()
+        checkpoints[checkpoint.document] = {
+            'ordinal': checkpoint.ordinal, 'position': checkpoint.position}
+        self._write(checkpoints)
+
+    def clear(self, document):
+        '''
+        Removes the checkpoint of a document.
+        :param document: The id of the document.
+        :return: None
+        '''
+        checkpoints = self._read()
+        if checkpoints.pop(document, None) is not None:
+            self._write(checkpoints)
+
+
+class Checkpointer(object):
+    '''
+    Counts the elements of a parse and saves its checkpoints.  Created by
+    the parsers for each parse.
+    :param store: The checkpoint store: an object with `load(document)`
+    and `save(checkpoint)` methods, e.g. a `FileCheckpointStore`, or None
+    to only count the elements.
+    :param document: The id of the document.
+    :param interval: The number of events between saved checkpoints.
+    :param ordinal: The ordinal the parse starts at.
+    '''
+
+    def __init__(self, store, document, interval=1000, ordinal=0):
+        self.store = store
+        self.document = document
+        self.interval = interval
+        # the elements parsed and the elements handled
+        self.ordinal = ordinal
+        self.committed = ordinal
+        self._saved = ordinal
+        self.stream = None
+
+    def commit(self):
+        '''
+        Marks the elements parsed so far as handled and saves a checkpoint
+        every `interval` elements.
+        :return: None
+        '''
+        self.committed = self.ordinal
+        if self.committed - self._saved >= self.interval:
+            self.save()
+
+    def save(self):
+        '''
+        Saves the checkpoint of the handled elements if it changed.
+        :return: None
+        '''
+        if self.store is None or self.committed == self._saved:
+            return
+        self.store.save(Checkpoint(self.document, self.committed,
+                                   self.get_position()))
+        self._saved = self.committed
+
+    def get_position(self):
+        try:
+            return self.stream.tell()
+        except (AttributeError, OSError, ValueError):
+            return None
+
+
+class _ResumedStream(ChainedStream):
+    '''
+    Reads the head of a document found by `scanner.seek_event` and then
+    the document from the offset after the skipped elements.  `tell`
+    gives the position in the document.
+    '''
+
+    def __init__(self, head, buffer, offset):
+        self._rest = BufferStream(buffer, offset)
+        super().__init__(BytesIO(head), self._rest)
+
+    @property
+    def buffer(self):
+        '''
+        The buffer of the whole document.
+        '''
+        return self._rest.buffer
+
+    def tell(self):
+        return self._rest.tell()
+
+
+@contextmanager
+def open_at(path, ordinal):
+    '''
+    Opens an uncompressed document by path so that it is read from the
+    element after the first `ordinal` header and event elements (see
+    `scanner.seek_event`).  The skipped bytes are scanned instead of
+    being parsed.
+    :param path: The path of the document.
+    :param ordinal: The number of elements to skip.
+    :return: A context manager giving a `(stream, skipped)` tuple: a file
+    object and the number of elements it skips, which is 0 (and the
+    stream is None) if the document could not be scanned.
+    '''
+    with map_file(path) as mapped:
+        found = None
+        if ordinal and get_compression(bytes(mapped[:6])) is None:
+            found = scanner.seek_event(mapped, ordinal)
+        if found is None:
+            yield None, 0
+        else:
+            head, offset = found
+            yield _ResumedStream(head, mapped, offset), ordinal
@@ -0,0 +1,316 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2018 SerialLab Corp.  All rights reserved.
+'''
+Collects parsed events into fixed-size columnar batches: a numpy
+structured array with a row for each event and an exploded array with a
+row for each EPC referencing its event's row.  Batches convert to pyarrow
+RecordBatches and can be written to Parquet files when pyarrow is
+installed (`pip install eparsecis[arrow]`).
+
+    for batch in iter_batches(EPCISParser(path, fast_records=True)):
+        shipped = batch.events[batch.events['biz_step'] == SHIPPING]
+'''
+import logging
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+logger = logging.getLogger()
+
+# the string columns of the events array
+STRING_COLUMNS = ('event_type', 'action', 'biz_step', 'disposition',
+                  'read_point', 'biz_location')
+EVENT_COLUMNS = ('row', 'event_type', 'event_time', 'record_time', 'action',
+                 'biz_step', 'disposition', 'read_point', 'biz_location',
+                 'epc_count')
+EPC_COLUMNS = ('event', 'list', 'epc')
+
+# the value of the list column for each EPC list attribute
+_EPC_LISTS = (('epc_list', 'epc'), ('child_epcs', 'child'),
+              ('input_epc_list', 'input'), ('output_epc_list', 'output'))
+_EPC_LIST_NAMES = dict(_EPC_LISTS)
+
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError('numpy is required for columnar batches.')
+
+
+def _require_pyarrow():
+    if pyarrow is None:
+        raise ImportError('pyarrow is required to convert columnar batches '
+                          'to Arrow.')
+
+
+def to_datetime64(values):
+    '''
+    Converts ISO 8601 times with UTC offsets (as they appear in EPCIS
+    documents) to UTC numpy datetimes.
+    :param values: A list of strings (or None).
+    :return: A `datetime64[us]` array, NaT for None.
+    '''
+    _require_numpy()
+    local_times = []
+    offsets = []
+    for value in values:
+        offset = 0
+        if value is None:
+            value = 'NaT'
+        elif not isinstance(value, str):
+            # a datetime set on an EPCPyYes event
+            value = value.isoformat()
+        if value.endswith('Z'):
+            value = value[:-1]
+        elif len(value) > 6 and value[-6] in '+-' and value[-3] == ':':
+            offset = int(value[-5:-3]) * 60 + int(value[-2:])
+            if value[-6] == '-':
+                offset = -offset
+            value = value[:-6]
+        local_times.append(value)
+        offsets.append(offset)
+    return (numpy.array(local_times, dtype='datetime64[us]') -
+            numpy.array(offsets, dtype='timedelta64[m]'))
+
+
+def _string_dtype(values):
+    return 'U{0}'.format(max([len(value) for value in values if value] or
+                             [1]))
+
+
+class ColumnarBatch(object):
+    '''
+    A batch of events in columns.
+    :param events: A numpy structured array with the `EVENT_COLUMNS`.  The
+    `row` of an event counts the events of the `ColumnBuilder` from 0;
+    missing strings are empty.
+    :param epcs: A numpy structured array with the `EPC_COLUMNS`: the
+    `row` of the event, the EPC list (`epc`, `child`, `input` or `output`)
+    and the EPC (the last two as ASCII bytes).
+    '''
+
+    def __init__(self, events, epcs):
+        self.events = events
+        self.epcs = epcs
+
+    def to_arrow(self):
+        '''
+        :return: A `(events, epcs)` tuple of pyarrow RecordBatches.
+        '''
+        _require_pyarrow()
+        return (_to_record_batch(self.events, EVENT_COLUMNS),
+                _to_record_batch(self.epcs, EPC_COLUMNS))
+
+    def __len__(self):
+        return len(self.events)
+
+
+def _to_record_batch(array, columns):
+    arrays = []
+    for column in columns:
+        if array.dtype[column].kind == 'M':
+            arrays.append(pyarrow.array(
+                array[column], type=pyarrow.timestamp('us', tz='UTC')))
+        elif array.dtype[column].kind == 'S':
+            arrays.append(pyarrow.array(array[column]).cast(
+                pyarrow.string()))
+        else:
+            arrays.append(pyarrow.array(array[column]))
+    return pyarrow.RecordBatch.from_arrays(arrays, names=list(columns))
+
+
+class ColumnBuilder(object):
+    '''
+    Collects events into `ColumnarBatch` instances of at most `batch_size`
+    events.  The events are not retained.
+    :param batch_size: The number of events in each batch.
+    '''
+
+    def __init__(self, batch_size=65536):
+        _require_numpy()
+        self.batch_size = batch_size
+        self.rows = 0
+        self._reset()
+
+    def _reset(self):
+        self._columns = {column: [] for column in EVENT_COLUMNS}
+        self._epc_columns = {column: [] for column in EPC_COLUMNS}
+        # the EPCs added by add_epc_chunk for the next event
+        self._chunked_epcs = 0
+
+    def add_epc_chunk(self, attribute, epcs):
+        '''
+        Adds EPCs of the next event that is added, e.g. the chunks handed
+        to `handle_epc_chunk` by a parser with an `epc_chunk_size`.
+        :param attribute: The list attribute of the event the EPCs belong
+        in, e.g. 'epc_list'.
+        :param epcs: The EPCs.
+        :return: None
+        '''
+        self._add_epcs(self.rows, _EPC_LIST_NAMES[attribute], epcs)
+        self._chunked_epcs += len(epcs)
+
+    def _add_epcs(self, row, name, epcs):
+        epc_columns = self._epc_columns
+        count = len(epcs)
+        epc_columns['event'].extend([row] * count)
+        epc_columns['list'].extend([name] * count)
+        epc_columns['epc'].extend(epcs)
+
+    def add(self, kind, epcis_event):
+        '''
+        Adds an event to the batch.  Headers and other parsed elements that
+        are not events are ignored.
+        :param kind: The kind of the event, e.g. 'ObjectEvent'.
+        :param epcis_event: The event record or EPCPyYes event.
+        :return: A `ColumnarBatch` if the batch is full, otherwise None.
+        '''
+        if not kind.endswith('Event'):
+            return None
+        columns = self._columns
+        row = self.rows
+        self.rows += 1
+        columns['row'].append(row)
+        columns['event_type'].append(kind)
+        for column in EVENT_COLUMNS[2:-1]:
+            columns[column].append(getattr(epcis_event, column, None))
+        epc_count = self._chunked_epcs
+        self._chunked_epcs = 0
+        for attribute, name in _EPC_LISTS:
+            epcs = getattr(epcis_event, attribute, None)
+            if epcs:
+                epc_count += len(epcs)
+                self._add_epcs(row, name, epcs)
+        columns['epc_count'].append(epc_count)
+        if len(columns['row']) >= self.batch_size:
+            return self.flush()
+        return None
+
+    def flush(self):
+        '''
+        :return: A `ColumnarBatch` of the events that were added since the
+        last batch or None if there are none.
+        '''
+        columns = self._columns
+        if not columns['row']:
+            return None
+        events = numpy.empty(len(columns['row']), dtype=[
+            ('row', 'i8'),
+            ('event_type', _string_dtype(columns['event_type'])),
+            ('event_time', 'datetime64[us]'),
+            ('record_time', 'datetime64[us]'),
+        ] + [(column, _string_dtype(columns[column]))
+             for column in STRING_COLUMNS[1:]] + [('epc_count', 'i8')])
+        for column in ('row', 'epc_count'):
+            events[column] = columns[column]
+        for column in ('event_time', 'record_time'):
+            events[column] = to_datetime64(columns[column])
+        for column in STRING_COLUMNS:
+            events[column] = [value or '' for value in columns[column]]
+        epc_columns = self._epc_columns
+        # the lists and EPCs are ASCII, so they are stored as bytes rather
+        # than as four bytes per character
+        epcs = numpy.empty(len(epc_columns['event']), dtype=[
+            ('event', 'i8'), ('list', 'S6'),
+            ('epc', _string_dtype(epc_columns['epc']).replace('U', 'S'))])
+        for column in EPC_COLUMNS:
+            epcs[column] = epc_columns[column]
+        self._reset()
+        return ColumnarBatch(events, epcs)
+
+
+def iter_batches(parser, batch_size=65536, **kwargs):
+    '''
+    Parses a document into columnar batches.  The EPC chunks of a parser
+    with an `epc_chunk_size` are collected as they are handed to its
+    `handle_epc_chunk` method.
+    :param parser: The parser (`fast_records=True` is recommended).
+    :param batch_size: The number of events in each batch.
+    :param kwargs: Passed to the parser's `iter_events`.
+    :return: An iterator of `ColumnarBatch` instances.
+    '''
+    builder = ColumnBuilder(batch_size)
+    chunked = getattr(parser, 'epc_chunk_size', None)
+    if chunked:
+        shadowed = parser.__dict__.get('handle_epc_chunk')
+        handle_epc_chunk = parser.handle_epc_chunk
+
+        def collect_epc_chunk(epcis_event, attribute, epcs):
+            handle_epc_chunk(epcis_event, attribute, epcs)
+            builder.add_epc_chunk(attribute, epcs)
+
+        parser.handle_epc_chunk = collect_epc_chunk
+    try:
+        for kind, epcis_event in parser.iter_events(**kwargs):
+            batch = builder.add(kind, epcis_event)
+            if batch is not None:
+                yield batch
+    finally:
+        if chunked:
+            if shadowed is None:
+                del parser.handle_epc_chunk
+            else:
+                parser.handle_epc_chunk = shadowed
+    batch = builder.flush()
+    if batch is not None:
+        yield batch
+
+
+def write_parquet(parser, events_path, epcs_path, batch_size=65536,
+                  **kwargs):
+    '''
+    Parses a document into two Parquet files, one for the events and one
+    for their EPCs.
+    :param parser: The parser.
+    :param events_path: The path of the events file.
+    :param epcs_path: The path of the EPCs file.
+    :param batch_size: The number of events in each row group.
+    :param kwargs: Passed to the parser's `iter_events`.
+    :return: The number of events written.
+    '''
+    _require_pyarrow()
+    writers = [None, None]
+    rows = 0
+    try:
+        for batch in iter_batches(parser, batch_size, **kwargs):
+            for index, (path, record_batch) in enumerate(
+                    zip((events_path, epcs_path), batch.to_arrow())):
+                if writers[index] is None:
+                    writers[index] = pyarrow.parquet.ParquetWriter(
+                        path, _get_schema(record_batch.schema))
+                writers[index].write_table(pyarrow.Table.from_batches(
+                    [record_batch.cast(writers[index].schema)]))
+            rows += len(batch)
+    finally:
+        for writer in writers:
+            if writer is not None:
+                writer.close()
+    logger.debug('Wrote %s events to %s.', rows, events_path)
+    return rows
+
+
+def _get_schema(schema):
+    # the string widths of the numpy batches vary, the Arrow strings do not
+    return pyarrow.schema([
+        field.with_type(pyarrow.string())
+        if pyarrow.types.is_string(field.type) else field
+        for field in schema])
@@ -0,0 +1,147 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2018 SerialLab Corp.  All rights reserved.
+'''
+Dictionary encoding of the field values that repeat across the events of
+a document.  The action, business step, disposition, read point, business
+location, business transaction, source and destination types and ILMD
+names of a document usually come from a handful of distinct values; a
+`ValueDictionary` keeps one string for each distinct value of a field so
+that buffered events share them, and numbers the values so that events
+can be grouped by small integer codes.
+
+    dictionary = ValueDictionary(codes=True)
+    parser = EPCISParser(path, fast_records=True, value_dictionary=dictionary)
+    for kind, event in parser.iter_events():
+        groups[event.value_codes['biz_step']].append(event)
+    print(dictionary.stats())
+'''
+from collections import namedtuple
+
+# the event attributes whose values are set on `value_codes`
+CODED_ATTRIBUTES = ('action', 'biz_step', 'disposition', 'read_point',
+                    'biz_location')
+
+
+class FieldStats(namedtuple('FieldStats', ['distinct', 'occurrences'])):
+    '''
+    The cardinality of a field: the number of distinct values and the
+    number of values that were encoded.
+    '''
+    __slots__ = ()
+
+
+class ValueDictionary(object):
+    '''
+    Encodes the values of fields.  The values of each field are numbered
+    from 0 in the order they are first encoded.  A dictionary can be
+    shared by several parsers so that the codes are the same across
+    documents.
+    :param codes: If True, the parsers set a `value_codes` dictionary of
+    attribute to code on each event (see `CODED_ATTRIBUTES`).
+    '''
+
+    def __init__(self, codes=False):
+        self.codes = codes
+        self._codes = {}
+        self._values = {}
+        self._counts = {}
+        self._encoders = {}
+
+    def encoder(self, field):
+        '''
+        Returns a callable that encodes the values of a field.  Parsers
+        look the encoder of each field up once.
+        :param field: The name of the field.
+        :return: A callable taking a value and returning the dictionary's
+        string for it.
+        '''
+        encode = self._encoders.get(field)
+        if encode is not None:
+            return encode
+        codes = self._codes[field] = {}
+        values = self._values[field] = []
+        counts = self._counts[field] = []
+
+        def encode(value):
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(values)
+                values.append(value)
+                counts.append(1)
+                return value
+            counts[code] += 1
+            return values[code]
+
+        self._encoders[field] = encode
+        return encode
+
+    def encode(self, field, value):
+        '''
+        Encodes a value.
+        :param field: The name of the field.
+        :param value: The value.
+        :return: The dictionary's string for the value, which is shared by
+        every event the value was encoded for.
+        '''
+        encode = self._encoders.get(field) or self.encoder(field)
+        return encode(value)
+
+    def code(self, field, value):
+        '''
+        :param field: The name of the field.
+        :param value: The value.
+        :return: The code of the value or None if it was never encoded.
+        '''
+        return self._codes.get(field, {}).get(value)
+
+    def decode(self, field, code):
+        '''
+        :param field: The name of the field.
+        :param code: The code of a value.
+        :return: The value.
+        '''
+        return self._values[field][code]
+
+    def values(self, field):
+        '''
+        :param field: The name of the field.
+        :return: A list of the values of the field indexed by code.
+        '''
+        return list(self._values.get(field, ()))
+
+    def get_codes(self, epcis_event):
+        '''
+        :param epcis_event: An event record or EPCPyYes event.
+        :return: A dictionary of attribute to code for each of the
+        `CODED_ATTRIBUTES` the event has a value for.
+        '''
+        event_codes = {}
+        for attribute in CODED_ATTRIBUTES:
+            value = getattr(epcis_event, attribute, None)
+            if value is not None:
+                code = self.code(attribute, value)
+                if code is not None:
+                    event_codes[attribute] = code
+        return event_codes
+
+    def stats(self):
+        '''
+        :return: A dictionary of field name to `FieldStats`.
+        '''
+        return {field: FieldStats(len(self._values[field]), sum(counts))
+                for field, counts in self._counts.items()}
+
+    def __len__(self):
+        return sum(len(values) for values in self._values.values())
@@ -0,0 +1,200 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2018 SerialLab Corp.  All rights reserved.
+'''
+Enriches parsed events with master data.  The read point, business
+location and quantity EPC class ids of each event are looked up through a
+bounded LRU cache backed by a loader callable (a database query, for
+example) and the results are attached to the event as a `master_data`
+dictionary of id to master data before the `handle_*` method for the
+event is called.
+
+    cache = MasterDataCache(load_location, maxsize=50000)
+    cache.prewarm_from_file('locations.xml')
+    parser = EPCISParser(path, enricher=Enricher(cache))
+'''
+import logging
+from collections import OrderedDict, namedtuple
+
+logger = logging.getLogger()
+
+_QUANTITY_LISTS = ('quantity_list', 'child_quantity_list',
+                   'input_quantity_list', 'output_quantity_list')
+
+
+class CacheStats(namedtuple('CacheStats', ['hits', 'misses', 'evictions',
+                                           'size', 'maxsize'])):
+    '''
+    The statistics of a `MasterDataCache`.
+    '''
+    __slots__ = ()
+
+    @property
+    def hit_rate(self):
+        '''
+        :return: The fraction of lookups that were served from the cache.
+        '''
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class MasterDataCache(object):
+    '''
+    A bounded least recently used cache of master data by id.
+    :param loader: Called with an id the cache does not hold and returns
+    its master data (or None if there is none, which is cached as well).
+    :param maxsize: The number of ids the cache holds.
+    '''
+
+    def __init__(self, loader, maxsize=10000):
+        self._loader = loader
+        self._maxsize = maxsize
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        '''
+        Returns the master data of an id, loading it on a miss.
+        :param key: The id.
+        :return: The master data returned by the loader.
+        '''
+        entries = self._entries
+        try:
+            value = entries[key]
+        except KeyError:
+            self.misses += 1
+            value = self._loader(key)
+            self.put(key, value)
+            return value
+        self.hits += 1
+        entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        '''
+        Adds (or replaces) the master data of an id.
+        :param key: The id.
+        :param value: The master data.
+        :return: None
+        '''
+        entries = self._entries
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self._maxsize:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def prewarm(self, records):
+        '''
+        Adds parsed master data to the cache.
+        :param records: An iterable of `records.VocabularyElementRecord`
+        instances (or any objects with an `id`).  The records themselves
+        are cached.
+        :return: The number of records added.
+        '''
+        count = 0
+        for record in records:
+            self.put(record.id, record)
+            count += 1
+        return count
+
+    def prewarm_from_file(self, stream, parser_class=None):
+        '''
+        Parses a master data document and adds its vocabulary elements to
+        the cache.
+        :param stream: The path or file object of the document.
+        :param parser_class: The parser to use, the `MasterDataParser` by
+        default.
+        :return: The number of records added.
+        '''
+        if parser_class is None:
+            from eparsecis.eparsecis import MasterDataParser
+            parser_class = MasterDataParser
+        count = self.prewarm(
+            record for kind, record in parser_class(stream).iter_events()
+            if kind == 'VocabularyElement')
+        logger.debug('Pre-warmed the master data cache with %s elements.',
+                     count)
+        return count
+
+    def clear(self):
+        '''
+        Removes every entry from the cache.  The statistics are kept.
+        '''
+        self._entries.clear()
+
+    def stats(self):
+        '''
+        :return: The `CacheStats` of the cache.
+        '''
+        return CacheStats(self.hits, self.misses, self.evictions,
+                          len(self._entries), self._maxsize)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+
+class Enricher(object):
+    '''
+    Attaches the master data of the read point, business location and
+    quantity EPC classes of an event to it.  Pass an instance to a parser
+    as its `enricher`.
+    :param cache: The `MasterDataCache` the ids are looked up in.
+    :param read_point: Look up the read point.
+    :param biz_location: Look up the business location.
+    :param epc_class: Look up the EPC class of each quantity element.
+    '''
+
+    def __init__(self, cache, read_point=True, biz_location=True,
+                 epc_class=True):
+        self.cache = cache
+        self._attributes = tuple(
+            attribute for attribute, enabled in (
+                ('read_point', read_point), ('biz_location', biz_location))
+            if enabled)
+        self._epc_class = epc_class
+
+    def get_ids(self, epcis_event):
+        '''
+        :param epcis_event: An EPCPyYes event or event record.
+        :return: A list of the ids of the event to look up.
+        '''
+        ids = []
+        for attribute in self._attributes:
+            value = getattr(epcis_event, attribute, None)
+            if value:
+                ids.append(value)
+        if self._epc_class:
+            for attribute in _QUANTITY_LISTS:
+                for quantity_element in getattr(epcis_event, attribute,
+                                                None) or ():
+                    if quantity_element.epc_class:
+                        ids.append(quantity_element.epc_class)
+        return ids
+
+    def enrich(self, epcis_event):
+        '''
+        Looks up the ids of an event and sets its `master_data` to a
+        dictionary of id to master data.
+        :param epcis_event: An EPCPyYes event or event record.
+        :return: None
+        '''
+        get = self.cache.get
+        epcis_event.master_data = {
+            key: get(key) for key in self.get_ids(epcis_event)}
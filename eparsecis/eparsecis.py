@@ -17,41 +17,268 @@
 
 from lxml import etree
 import logging
+import os
+from contextlib import contextmanager
+from copy import deepcopy
+from sys import intern
+from time import perf_counter
 
 from EPCPyYes.core.v1_2 import template_events
-from EPCPyYes.core.v1_2.events import Action, BusinessTransaction
-from EPCPyYes.core.v1_2.events import Source, Destination, QuantityElement, \
-    ErrorDeclaration
-from EPCPyYes.core.v1_2.CBV.instance_lot_master_data import \
-    InstanceLotMasterDataAttribute
 from EPCPyYes.core.SBDH import sbdh, template_sbdh
 from eparsecis.namespace_helpers import SBDHNamespaceHelper
+from eparsecis.checkpoint import Checkpoint, Checkpointer, \
+    get_document_id, open_at
+from eparsecis.dictionary import ValueDictionary
 from eparsecis.elements import EPCPyYesElement
+from eparsecis.epclist import EPCList
+from eparsecis.fields import TextField, DictionaryField, ParserField, \
+    compile_fields
+from eparsecis.sources import _PATH_TYPES, BufferStream, map_file, \
+    open_source
+from eparsecis.stats import ParseStats
+from eparsecis.records import EPCPyYesFactory, RecordFactory, \
+    TransformationEventRecord
 
 logger = logging.getLogger()
 
 
+def _serialize(element):
+    '''
+    Serializes an element (and its tail) without the namespace
+    declarations of its ancestors that it does not use.
+    '''
+    copy = deepcopy(element)
+    etree.cleanup_namespaces(copy)
+    return etree.tostring(copy, encoding='unicode')
+
+
 class EPCISParser(object):
     '''
     Parses EPCIS XML from a stream and serializes each EPCIS Event
     in a given document into a serialized EPCPyYes event object.
     '''
 
+    _element_names = ('EPCISHeader', 'ObjectEvent', 'AggregationEvent',
+                      'TransactionEvent', 'TransformationEvent')
+    _iterparse_events = ('end',)
+
+    # the event attribute each EPC list is parsed into
+    _epc_list_attributes = {
+        'epcList': 'epc_list',
+        'childEPCs': 'child_epcs',
+        'inputEPCList': 'input_epc_list',
+        'outputEPCList': 'output_epc_list',
+    }
+
+    # The `*_fields` tables map the tag of each child element of an event
+    # to the way it is parsed.  Subclasses can extend them, for example
+    # `object_event_fields = dict(EPCISParser.object_event_fields,
+    # myField=ParserField('parse_my_field'))`.
+    object_event_fields = {
+        'eventTime': TextField('event_time'),
+        'eventTimeZoneOffset': TextField('event_timezone_offset'),
+        'recordTime': TextField('record_time'),
+        'bizTransactionList': ParserField('parse_biz_transaction_list'),
+        'epcList': ParserField('parse_epc_list'),
+        'action': DictionaryField('action'),
+        'bizStep': DictionaryField('biz_step'),
+        'disposition': DictionaryField('disposition'),
+        'readPoint': ParserField('parse_readpoint'),
+        'bizLocation': ParserField('parse_biz_location'),
+        'extension': ParserField('parse_extension'),
+        'baseExtension': ParserField('parse_base_extension'),
+    }
+    aggregation_event_fields = {
+        'eventTime': TextField('event_time'),
+        'eventTimeZoneOffset': TextField('event_timezone_offset'),
+        'recordTime': TextField('record_time'),
+        'bizTransactionList': ParserField('parse_biz_transaction_list'),
+        'parentID': TextField('parent_id'),
+        'childEPCs': ParserField('parse_epc_list'),
+        'action': DictionaryField('action'),
+        'bizStep': DictionaryField('biz_step'),
+        'disposition': DictionaryField('disposition'),
+        'readPoint': ParserField('parse_readpoint'),
+        'bizLocation': ParserField('parse_biz_location'),
+        'extension': ParserField('parse_extension'),
+        'baseExtension': ParserField('parse_base_extension'),
+    }
+    transaction_event_fields = dict(
+        object_event_fields,
+        parentID=TextField('parent_id'),
+    )
+    transformation_event_fields = {
+        'eventTime': TextField('event_time'),
+        'eventTimeZoneOffset': TextField('event_timezone_offset'),
+        'recordTime': TextField('record_time'),
+        'bizTransactionList': ParserField('parse_biz_transaction_list'),
+        'inputEPCList': ParserField('parse_input_epc_list'),
+        'outputEPCList': ParserField('parse_output_epc_list'),
+        'transformationID': TextField('transformation_id'),
+        'bizStep': DictionaryField('biz_step'),
+        'disposition': DictionaryField('disposition'),
+        'readPoint': ParserField('parse_readpoint'),
+        'bizLocation': ParserField('parse_biz_location'),
+        'inputQuantityList': ParserField('parse_input_quantity_list'),
+        'outputQuantityList': ParserField('parse_output_quantity_list'),
+        'ilmd': ParserField('parse_ilmd'),
+        'sourceList': ParserField('parse_source_list'),
+        'destinationList': ParserField('parse_destination_list'),
+        'baseExtension': ParserField('parse_base_extension'),
+    }
+    extension_fields = {
+        'sourceList': ParserField('parse_source_list'),
+        'destinationList': ParserField('parse_destination_list'),
+        'ilmd': ParserField('parse_ilmd'),
+        'quantityList': ParserField('parse_quantity_list'),
+        'childQuantityList': ParserField('parse_child_quantity_list'),
+    }
+    base_extension_fields = {
+        'eventID': TextField('event_id'),
+        'errorDeclaration': ParserField('parse_error_declaration'),
+    }
+
     def __init__(
         self,
-        stream,
-        header_namespace='http://www.unece.org/cefact/namespaces/StandardBusinessDocumentHeader'
+        stream=None,
+        header_namespace='http://www.unece.org/cefact/namespaces/StandardBusinessDocumentHeader',
+        fast_records=False,
+        compact_epc_lists=False,
+        epc_chunk_size=None,
+        buffer_size=None,
+        use_mmap=False,
+        enricher=None,
+        value_dictionary=None,
+        stats=None,
+        checkpoint_store=None,
+        checkpoint_interval=1000
     ):
         '''
         Initialize a new EPCISParser with a stream to be
         parsed.
         :param stream: The stream containing the EPCIS XML to be parsed.
+        Not needed when the data is pushed to the parser with `feed`.
         :param header_namespace: The namespace prefix for the standard
         business document header elements (if any).
+        :param fast_records: If True, the parser creates the lightweight
+        records in the `eparsecis.records` module instead of EPCPyYes
+        objects.  Call `to_epcpyyes` on a record to convert it.
+        :param compact_epc_lists: If True, the EPC lists of the events are
+        `eparsecis.epclist.EPCList` instances, which store the EPCs of very
+        large events in a fraction of the memory of a list of strings.
+        :param epc_chunk_size: If set, the EPCs of each epcList, childEPCs,
+        inputEPCList and outputEPCList are handed to `handle_epc_chunk` in
+        lists of at most this many EPCs as they are parsed instead of being
+        collected on the event.
+        :param buffer_size: The size of the buffer the stream is read
+        through.  Compressed streams (gzip, bzip2, xz and, if the zstandard
+        package is installed, zstd) are detected and decompressed whether
+        or not it is set.
+        :param use_mmap: If True, a stream given as a path is
+        memory-mapped instead of being read.  The stream can also be an
+        mmap the caller has already mapped (see
+        `eparsecis.sources.map_file`).
+        :param enricher: An `eparsecis.enrichment.Enricher` (or any object
+        with an `enrich(event)` method) that attaches master data to each
+        event before its `handle_*` method is called.
+        :param value_dictionary: An `eparsecis.dictionary.ValueDictionary`
+        the repeated values of the events (action, business step, read
+        point, etc.) are encoded with so that the events share one string
+        for each distinct value.  Pass the same dictionary to several
+        parsers to share it across documents, or True for a new one.
+        :param stats: An `eparsecis.stats.ParseStats` that counts the
+        parsed events, times the phases of parsing and reports progress,
+        or True for a new one.  Pass the same stats to several parsers to
+        add up their documents.
+        :param checkpoint_store: A `checkpoint.FileCheckpointStore` (or any
+        object with `load(document)` and `save(checkpoint)` methods) the
+        progress of each parse is saved in, so that an interrupted parse
+        can be resumed (see `iter_events`).
+        :param checkpoint_interval: The number of events handled between
+        saved checkpoints.
         '''
         self._stream = stream
         self._header_namespace = header_namespace
+        self._fast_records = fast_records
+        self._factory = RecordFactory if fast_records else EPCPyYesFactory
+        self._compact_epc_lists = compact_epc_lists
+        self._epc_chunk_size = epc_chunk_size
+        self._buffer_size = buffer_size
+        self._use_mmap = use_mmap
+        self._enricher = enricher
+        if value_dictionary is True:
+            value_dictionary = ValueDictionary()
+        self._value_dictionary = value_dictionary
+        self._reset_epc_chunk()
+        self._pull_parser = None
         self._sbdh_helper = SBDHNamespaceHelper(header_namespace)
+        self._object_event_dispatch = self.compile_fields(
+            self.object_event_fields)
+        self._aggregation_event_dispatch = self.compile_fields(
+            self.aggregation_event_fields)
+        self._transaction_event_dispatch = self.compile_fields(
+            self.transaction_event_fields)
+        self._transformation_event_dispatch = self.compile_fields(
+            self.transformation_event_fields)
+        self._extension_dispatch = self.compile_fields(self.extension_fields)
+        self._base_extension_dispatch = self.compile_fields(
+            self.base_extension_fields)
+        self._event_parsers = {
+            'ObjectEvent': (self.get_epcpyyes_object_event,
+                            self._object_event_dispatch,
+                            self.parse_unexpected_obj_element),
+            'AggregationEvent': (self.get_epcpyyes_aggregation_event,
+                                 self._aggregation_event_dispatch,
+                                 self.parse_unexpected_agg_element),
+            'TransactionEvent': (self.get_epcpyyes_transaction_event,
+                                 self._transaction_event_dispatch,
+                                 self.parse_unexpected_xact_element),
+            'TransformationEvent': (self.get_epcpyyes_transformation_event,
+                                    self._transformation_event_dispatch,
+                                    self.parse_unexpected_transform_event),
+        }
+        self._checkpoint_store = checkpoint_store
+        self._checkpoint_interval = checkpoint_interval
+        if stats is True:
+            stats = ParseStats()
+        self._stats = stats
+        if stats is not None:
+            stats.instrument(self)
+
+    @property
+    def value_dictionary(self):
+        '''
+        The `eparsecis.dictionary.ValueDictionary` of the parser or None.
+        '''
+        return self._value_dictionary
+
+    def encode_value(self, field, value):
+        '''
+        Encodes a value with the parser's value dictionary.
+        :param field: The name of the field.
+        :param value: The value.
+        :return: The dictionary's string for the value or the value itself
+        if the parser has no dictionary.
+        '''
+        if self._value_dictionary is None:
+            return value
+        return self._value_dictionary.encode(field, value)
+
+    @property
+    def stats(self):
+        '''
+        The `eparsecis.stats.ParseStats` of the parser or None.
+        '''
+        return self._stats
+
+    @property
+    def epc_chunk_size(self):
+        '''
+        The `epc_chunk_size` of the parser or None.  The EPC lists of the
+        events of a parser with a chunk size are empty, their EPCs are
+        handed to `handle_epc_chunk` instead.
+        '''
+        return self._epc_chunk_size
 
     @property
     def header_namespace(self):
@@ -69,30 +296,361 @@ class EPCISParser(object):
     def stream(self, value):
         self._stream = value
 
-    def parse(self, huge_tree=False):
-        parser_lookup = etree.ElementDefaultClassLookup(
-            element=EPCPyYesElement)
-        epcis = etree.iterparse(self.stream, events=('end',),
-                                remove_comments=True, huge_tree=huge_tree)
-        epcis.set_element_class_lookup(parser_lookup)
-        for event, element in epcis:
-            if element.tag == 'EPCISHeader':
-                self.parse_epcis_header(event, element)
-                self.clear_element(element)
-            elif element.tag == 'ObjectEvent':
-                self.parse_object_event_element(event, element)
-                self.clear_element(element)
-            elif element.tag == 'AggregationEvent':
-                self.parse_aggregation_event_element(event, element)
-                self.clear_element(element)
-            elif element.tag == 'TransactionEvent':
-                self.parse_transaction_event_element(event, element)
-                self.clear_element(element)
-            elif element.tag == 'TransformationEvent':
-                self.parse_transformation_event_element(event, element)
-                self.clear_element(element)
-            else:
-                self.handle_unexpected_element(event, element)
+    def parse(self, huge_tree=False, handle_unexpected=None, resume=False):
+        '''
+        Parses the stream and hands each EPCPyYes object to the
+        corresponding `handle_*` method as it is created.
+        :param huge_tree: Passed to lxml to disable the parser's security
+        restrictions on very deep trees and very long text content.
+        :param handle_unexpected: See `iter_events`.
+        :param resume: See `iter_events`.
+        :return: None
+        '''
+        for kind, epcis_event in self.iter_events(
+                huge_tree=huge_tree, handle_unexpected=handle_unexpected,
+                resume=resume):
+            pass
+
+    def iter_events(self, huge_tree=False, handle_unexpected=None,
+                    resume=False):
+        '''
+        Parses the stream lazily and yields a `(kind, event)` tuple for
+        each EPCPyYes object as it is created.  The `kind` is the local name
+        of the parsed element (`ObjectEvent`, `AggregationEvent`,
+        `TransactionEvent` or `TransformationEvent`) or
+        `StandardBusinessDocumentHeader` for the SBDH.  The `handle_*`
+        methods are still called for each object before it is yielded and
+        each element is cleared before it is yielded, so consumers can stop
+        early without the document being buffered.
+        :param huge_tree: Passed to lxml to disable the parser's security
+        restrictions on very deep trees and very long text content.
+        :param handle_unexpected: When False, lxml is asked to only report
+        the header and event elements (see `get_element_tags`) so that
+        the thousands of `epc`, `eventTime`, etc. elements in a document
+        never reach python.  When True, every element is reported and those
+        that are not parsed are handed to `handle_unexpected_element`.  The
+        default (None) is True only if a subclass has overridden
+        `handle_unexpected_element`.
+        :param resume: If True, the header and events handled before the
+        last checkpoint of the document in the parser's
+        `checkpoint_store` was saved are skipped without being parsed.  A
+        `checkpoint.Checkpoint` is resumed from directly.  An event counts
+        as handled once the consumer asks for the next one.
+        :return: A generator of `(kind, event)` tuples.
+        '''
+        checkpointer = self.get_checkpointer(resume)
+        skip = 0 if checkpointer is None else checkpointer.ordinal
+        with self.open_stream(skip) as (stream, skip):
+            with open_source(stream, self._buffer_size,
+                             self._use_mmap) as source:
+                epcis = etree.iterparse(
+                    source, events=self._iterparse_events,
+                    tag=self._get_tags(handle_unexpected),
+                    remove_comments=True, huge_tree=huge_tree)
+                epcis.set_element_class_lookup(
+                    self._get_element_class_lookup())
+                self._reset_epc_chunk()
+                if self._stats is None and checkpointer is None:
+                    for event, element in epcis:
+                        parsed = self.parse_element(event, element)
+                        if parsed is not None:
+                            yield parsed
+                    return
+                if checkpointer is not None:
+                    checkpointer.stream = stream
+                    epcis = self.skip_elements(epcis, checkpointer, skip)
+                if self._stats is None:
+                    parsed_events = self._parse_items(epcis)
+                else:
+                    parsed_events = self._stats.track(
+                        epcis, self._parse_item, stream)
+                if checkpointer is not None:
+                    parsed_events = self.iter_checkpointed(parsed_events,
+                                                           checkpointer)
+                # closes the checkpointer while the stream is open
+                yield from parsed_events
+
+    def get_checkpointer(self, resume=False):
+        '''
+        Creates the `checkpoint.Checkpointer` of a parse.
+        :param resume: See `iter_events`.
+        :return: The checkpointer or None if the parser has no checkpoint
+        store and is not resuming.
+        :raises ValueError: If the document can not be identified.
+        '''
+        store = self._checkpoint_store
+        if isinstance(resume, Checkpoint):
+            return Checkpointer(store, resume.document,
+                                self._checkpoint_interval, resume.ordinal)
+        if store is None:
+            if resume:
+                raise ValueError('A checkpoint store is required to resume.')
+            return None
+        document = get_document_id(self.stream)
+        if document is None:
+            raise ValueError('Only files and seekable streams can be '
+                             'checkpointed, resume from a Checkpoint to '
+                             'parse other streams.')
+        checkpoint = store.load(document) if resume else None
+        return Checkpointer(store, document, self._checkpoint_interval,
+                            checkpoint.ordinal if checkpoint else 0)
+
+    def skip_elements(self, items, checkpointer, skip=0):
+        '''
+        Counts the header and event elements reported by lxml and drops
+        the first `skip` of them (and the elements inside them) without
+        parsing them.
+        :param items: An iterator of lxml `(event, element)` tuples.
+        :param checkpointer: The `checkpoint.Checkpointer` the elements
+        are counted with.
+        :param skip: The number of elements to skip.
+        :return: A generator of the `(event, element)` tuples to parse.
+        '''
+        names = self._element_names
+        for event, element in items:
+            if event == 'start-ns':
+                yield event, element
+            elif self.get_element_name(element.tag) in names:
+                if skip:
+                    skip -= 1
+                    self.clear_element(element)
+                else:
+                    checkpointer.ordinal += 1
+                    yield event, element
+            elif not skip:
+                yield event, element
+
+    def iter_checkpointed(self, parsed_events, checkpointer):
+        '''
+        Commits each parsed event once the consumer asks for the next one
+        and saves the checkpoint of the handled events when the parse
+        ends, fails or is closed.
+        :param parsed_events: An iterator of `(kind, event)` tuples.
+        :param checkpointer: The `checkpoint.Checkpointer` of the parse.
+        :return: A generator of `(kind, event)` tuples.
+        '''
+        try:
+            for parsed in parsed_events:
+                yield parsed
+                checkpointer.commit()
+            checkpointer.commit()
+        finally:
+            checkpointer.save()
+
+    @contextmanager
+    def open_stream(self, skip=0):
+        '''
+        Opens the stream of the parser for `iter_events`.  Uncompressed
+        files given by path are read from the element after the first
+        `skip` elements (see `checkpoint.open_at`).  Files given by path
+        are opened (or mapped) here when the parser has stats or
+        checkpoints, so that the position in the file can be followed;
+        otherwise the stream is handed on as is.
+        :param skip: The number of header and event elements to skip.
+        :return: A context manager giving the stream and the number of
+        elements that are still to be skipped in it.
+        '''
+        stream = self.stream
+        if not isinstance(stream, _PATH_TYPES) or \
+                not os.path.isfile(stream):
+            yield stream, skip
+            return
+        if skip and not self._use_mmap and \
+                self._element_names == EPCISParser._element_names:
+            with open_at(stream, skip) as (opened, skipped):
+                if opened is not None:
+                    yield opened, skip - skipped
+                    return
+        if self._stats is None and self._checkpoint_store is None:
+            yield stream, skip
+            return
+        if self._use_mmap:
+            with map_file(stream) as mapped:
+                yield BufferStream(mapped), skip
+            return
+        with open(stream, 'rb') as opened:
+            yield opened, skip
+
+    def _parse_items(self, items):
+        for event, element in items:
+            parsed = self.parse_element(event, element)
+            if parsed is not None:
+                yield parsed
+
+    def _parse_item(self, item):
+        return self.parse_element(*item)
+
+    def feed(self, data, huge_tree=False, handle_unexpected=None):
+        '''
+        Pushes the next chunk of a document to the parser.  The events the
+        chunk completes are parsed (and handed to the `handle_*` methods)
+        right away.  Call `close` once the whole document has been fed.
+        :param data: The bytes (or str) of the chunk.
+        :param huge_tree: See `iter_events`.  Only used by the first call
+        for a document.
+        :param handle_unexpected: See `iter_events`.  Only used by the
+        first call for a document.
+        :return: A list of the `(kind, event)` tuples parsed from the chunk.
+        '''
+        if self._pull_parser is None:
+            self._pull_parser = self.get_pull_parser(huge_tree,
+                                                     handle_unexpected)
+        if isinstance(data, memoryview):
+            # the lxml parsers do not accept memoryviews
+            data = data.tobytes()
+        if self._stats is None:
+            self._pull_parser.feed(data)
+        else:
+            start = perf_counter()
+            self._pull_parser.feed(data)
+            self._stats.add_read_time(perf_counter() - start)
+            self._stats.add_bytes(len(data))
+        return list(self.read_pull_events(self._pull_parser))
+
+    def close(self):
+        '''
+        Ends the document pushed to the parser with `feed`.  The parser can
+        then be fed the next document.
+        :return: A list of the `(kind, event)` tuples parsed from the end
+        of the document.
+        :raises lxml.etree.XMLSyntaxError: If the document is incomplete.
+        '''
+        pull_parser = self._pull_parser
+        if pull_parser is None:
+            return []
+        self._pull_parser = None
+        pull_parser.close()
+        parsed = list(self.read_pull_events(pull_parser))
+        if self._stats is not None:
+            self._stats.report_progress()
+        return parsed
+
+    def get_pull_parser(self, huge_tree=False, handle_unexpected=None):
+        '''
+        Creates an lxml `XMLPullParser` that reports the same elements
+        `iter_events` parses.  Feed it data and hand it to
+        `read_pull_events` to parse the completed elements.
+        :param huge_tree: See `iter_events`.
+        :param handle_unexpected: See `iter_events`.
+        :return: An `etree.XMLPullParser`.
+        '''
+        pull_parser = etree.XMLPullParser(
+            events=self._iterparse_events,
+            tag=self._get_tags(handle_unexpected),
+            remove_comments=True, huge_tree=huge_tree)
+        pull_parser.set_element_class_lookup(
+            self._get_element_class_lookup())
+        self._reset_epc_chunk()
+        return pull_parser
+
+    def read_pull_events(self, pull_parser):
+        '''
+        Parses the elements an `XMLPullParser` created by `get_pull_parser`
+        has completed so far.
+        :param pull_parser: The pull parser.
+        :return: A generator of `(kind, event)` tuples.
+        '''
+        if self._stats is not None:
+            for parsed in self._stats.track(pull_parser.read_events(),
+                                            self._parse_item, final=False):
+                yield parsed
+            return
+        for event, element in pull_parser.read_events():
+            parsed = self.parse_element(event, element)
+            if parsed is not None:
+                yield parsed
+
+    def parse_element(self, event, element):
+        '''
+        Parses an element reported by lxml.
+        :param event: The lxml event.
+        :param element: The element (or the `(prefix, namespace)` tuple
+        of a `start-ns` event).
+        :return: A `(kind, event)` tuple if an EPCIS event or header was
+        parsed, otherwise None.
+        '''
+        if event == 'start-ns':
+            self.add_namespace(*element)
+            return None
+        name = self.get_element_name(element.tag)
+        if name == 'epc' and self._epc_chunk_size and \
+                self.parse_epc_element(element):
+            return None
+        elif name == 'EPCISHeader':
+            kind = 'StandardBusinessDocumentHeader'
+            epcis_event = self.parse_epcis_header(event, element)
+        elif name == 'ObjectEvent':
+            kind = name
+            epcis_event = self.parse_object_event_element(event, element)
+        elif name == 'AggregationEvent':
+            kind = name
+            epcis_event = self.parse_aggregation_event_element(
+                event, element)
+        elif name == 'TransactionEvent':
+            kind = name
+            epcis_event = self.parse_transaction_event_element(
+                event, element)
+        elif name == 'TransformationEvent':
+            kind = name
+            epcis_event = self.parse_transformation_event_element(
+                event, element)
+        else:
+            self.handle_unexpected_element(event, element)
+            return None
+        self.clear_element(element)
+        if epcis_event is not None:
+            return kind, epcis_event
+        return None
+
+    def _get_tags(self, handle_unexpected):
+        if handle_unexpected is None:
+            handle_unexpected = (
+                type(self).handle_unexpected_element is not
+                EPCISParser.handle_unexpected_element
+            )
+        return None if handle_unexpected else self.get_element_tags()
+
+    def _get_element_class_lookup(self):
+        return etree.ElementDefaultClassLookup(element=EPCPyYesElement)
+
+    def get_element_name(self, tag):
+        '''
+        Returns the name used to decide how a top-level element is parsed.
+        The `EPCISParser` only supports exact (non-namespaced) matches.
+        :param tag: The tag of the element.
+        :return: The name of the element.
+        '''
+        return tag
+
+    def local_name(self, tag):
+        '''
+        Returns the name the children of event elements are compared by.
+        The `EPCISParser` only supports exact (non-namespaced) matches.
+        :param tag: The tag of the element.
+        :return: The name of the element.
+        '''
+        return tag
+
+    def add_namespace(self, prefix, namespace):
+        '''
+        Called for each namespace declared in the document by parsers that
+        ask lxml for `start-ns` events.
+        :param prefix: The declared prefix (empty for a default namespace).
+        :param namespace: The namespace URI.
+        :return: None
+        '''
+        pass
+
+    def get_element_tags(self):
+        '''
+        Returns the tags lxml should report when `iter_events` is not
+        handling unexpected elements.  Override this along with
+        `get_element_name` to parse additional top-level elements.
+        :return: A tuple of tags in the lxml `iterparse` tag format.
+        '''
+        if self._epc_chunk_size:
+            return self._element_names + ('epc',)
+        return self._element_names
 
     def clear_element(self, element):
         '''
@@ -109,24 +667,87 @@ class EPCISParser(object):
         Parses the EPCIS header if one is found.
         :param event: The lxml/etree event.
         :param header_element: The XML etree/lxml element.
-        :return: None
+        :return: The parsed SBDH or None if the header did not contain one.
         '''
         logger.debug('handling the header')
+        header = None
         for child in header_element:
             if child.tag == self._sbdh_helper.sbdh:
-                self.parse_sbdh(child)
+                header = self.parse_sbdh(child)
+            elif self.get_element_name(child.tag) == 'extension':
+                self.parse_master_data(child)
         else:
             self.parse_header_info(event, child)
         logger.debug('Clearing out the header element.')
         header_element.clear()
+        return header
+
+    def parse_master_data(self, element):
+        '''
+        Parses the vocabulary elements of any master data in an element
+        (the extension of an EPCIS header, for example) and hands each
+        one to `handle_vocabulary_element`.
+        :param element: The element containing the master data.
+        :return: None
+        '''
+        for vocabulary_element in element.iter('{*}VocabularyElement'):
+            self.handle_vocabulary_element(self.parse_vocabulary_element(
+                vocabulary_element))
+
+    def parse_vocabulary_element(self, element):
+        '''
+        Parses a VocabularyElement.  The vocabulary type is taken from the
+        enclosing Vocabulary element.  Attribute ids and vocabulary types
+        are interned since they repeat for every element.
+        :param element: The VocabularyElement element.
+        :return: A `records.VocabularyElementRecord`.
+        '''
+        vocabulary_type = None
+        element_list = element.getparent()
+        if element_list is not None:
+            vocabulary = element_list.getparent()
+            if vocabulary is not None:
+                vocabulary_type = vocabulary.get('type')
+                if vocabulary_type is not None:
+                    vocabulary_type = intern(vocabulary_type)
+        record = self._factory.vocabulary_element(vocabulary_type,
+                                                  element.get('id'))
+        for child in element:
+            name = self.get_element_name(child.tag)
+            if name == 'attribute':
+                value = self.get_attribute_value(child)
+                attribute_id = child.get('id')
+                record.attributes.append((
+                    intern(attribute_id) if attribute_id else attribute_id,
+                    value or None))
+            elif name == 'children':
+                record.children.extend(
+                    child_id.text.strip() for child_id in child
+                    if child_id.text)
+        return record
+
+    def get_attribute_value(self, attribute):
+        '''
+        Returns the value of a master data attribute: its text or, for
+        attributes with child elements (an address, for example), the
+        XML of its content.
+        :param attribute: The attribute element.
+        :return: A string, empty if the attribute has no value.
+        '''
+        if not any(isinstance(child.tag, str) for child in attribute):
+            return attribute.text.strip() if attribute.text else ''
+        # comments are left out, the text following them is kept
+        return ((attribute.text or '') + ''.join(
+            _serialize(child) if isinstance(child.tag, str)
+            else child.tail or '' for child in attribute)).strip()
 
     def parse_sbdh(self, sbdh_element):
         '''
         Parses out the Standard Business Document Header element.
         :param sbdh_element: The element.
-        :return: None
+        :return: The EPCPyYes StandardBusinessDocumentHeader instance.
         '''
-        header = template_sbdh.StandardBusinessDocumentHeader()
+        header = self._factory.header()
         header.partners = []
         logger.debug('Found an SBDH element...parsing...')
         for child in sbdh_element:
@@ -144,6 +765,7 @@ class EPCISParser(object):
                 header.document_identification = \
                     self.parse_document_identification(child)
         self.handle_sbdh(header)
+        return header
 
     def parse_partner(self, partner_type: sbdh.PartnerType, partner_element):
         '''
@@ -151,7 +773,7 @@ class EPCISParser(object):
         :param partner_type: The type of partner (Sender or Receiver)
         :return: A sbdh.Partner class instance.
         '''
-        partner = sbdh.Partner(partner_type=partner_type)
+        partner = self._factory.partner(partner_type=partner_type)
         for child in partner_element:
             if child.tag == self._sbdh_helper.identifier:
                 partner.partner_id = self.create_partner_identification(child)
@@ -185,7 +807,7 @@ class EPCISParser(object):
 
         authority = partner_id_element.attrib.get('Authority', None)
         value = partner_id_element.text.strip()
-        return sbdh.PartnerIdentification(authority, value)
+        return self._factory.partner_identification(authority, value)
 
     def parse_document_identification(self, element):
         '''
@@ -194,7 +816,7 @@ class EPCISParser(object):
         :return: A sbdh.DocumentIdentification class instance (EPCPyYes).
         '''
         logger.debug('parsing the document identification element')
-        did = sbdh.DocumentIdentification()
+        did = self._factory.document_identification()
         for child in element:
             if child.tag == self._sbdh_helper.standard:
                 did.standard = child.text.strip()
@@ -220,39 +842,72 @@ class EPCISParser(object):
         logger.debug('parse_header_info. element: %s', header_element.tag)
         pass
 
+    def parse_fields(self, epcis_event, element, fields, unexpected=None):
+        '''
+        Parses each child of an element using a compiled field dispatch
+        table (see `compile_fields`).
+        :param epcis_event: The EPCPyYes object being populated.
+        :param element: The element whose children are parsed.
+        :param fields: A compiled dictionary of tag to callable.
+        :param unexpected: Called with the event and any child that is not
+        in the table.
+        :return: None
+        '''
+        for child in element:
+            parse_field = fields.get(child.tag)
+            if parse_field is not None:
+                parse_field(epcis_event, child)
+            elif unexpected is not None:
+                unexpected(epcis_event, child)
+
+    def compile_fields(self, fields):
+        '''
+        Compiles one of the `*_fields` tables of this class into a
+        dictionary of element tag to callable.  This is done once for each
+        table when the parser is created.
+        :param fields: A dictionary of element tag to `fields.TextField` or
+        `fields.ParserField`.
+        :return: A dictionary of element tag to callable.
+        '''
+        return compile_fields(self, fields)
+
     def parse_object_event_element(self, event, object_element):
         logger.debug('handling object event')
-        oevent = self.get_epcpyyes_object_event()
-        for child in object_element:
-            logger.debug('%s,%s', child.tag, child.text)
-            if child.tag == 'eventTime':
-                oevent.event_time = child.text.strip()
-            elif child.tag == 'bizTransactionList':
-                self.parse_biz_transaction_list(oevent, child)
-            elif child.tag == 'eventTimeZoneOffset':
-                oevent.event_timezone_offset = child.text.strip()
-            elif child.tag == 'recordTime':
-                oevent.record_time = child.text.strip()
-            elif child.tag == 'epcList':
-                self.parse_epc_list(oevent, child)
-            elif child.tag == 'action':
-                oevent.action = child.text.strip()
-            elif child.tag == 'bizStep':
-                oevent.biz_step = child.text.strip()
-            elif child.tag == 'disposition':
-                oevent.disposition = child.text.strip()
-            elif child.tag == 'readPoint':
-                self.parse_readpoint(oevent, child)
-            elif child.tag == 'bizLocation':
-                self.parse_biz_location(oevent, child)
-            elif child.tag == 'extension':
-                self.parse_extension(oevent, child)
-            elif child.tag == 'baseExtension':
-                self.parse_base_extension(oevent, child)
+        oevent = self.get_event_object(
+            object_element, self.get_epcpyyes_object_event)
+        self.parse_fields(oevent, object_element,
+                          self._object_event_dispatch,
+                          self.parse_unexpected_obj_element)
         logger.debug('clearing out the Element')
         object_element.clear()
+        self.enrich_event(oevent)
         if oevent:
             self.handle_object_event(oevent)
+        return oevent
+
+    def enrich_event(self, epcis_event):
+        '''
+        Called with each event before it is handed to its `handle_*`
+        method.  Sets the `value_codes` of the event if the parser's value
+        dictionary has codes enabled and hands the event to the parser's
+        `enricher` if it has one.
+        :param epcis_event: The parsed event.
+        :return: None
+        '''
+        dictionary = self._value_dictionary
+        if dictionary is not None and dictionary.codes:
+            epcis_event.value_codes = dictionary.get_codes(epcis_event)
+        if self._enricher is not None:
+            self._enricher.enrich(epcis_event)
+
+    def parse_unexpected_obj_element(self, oevent, child):
+        """
+        Override to handle any oddness in the XML structure.
+        :param oevent: The object event EPCPyYes object
+        :param child: The unexpected child node
+        :return: None
+        """
+        pass
 
     def get_epcpyyes_object_event(self):
         """
@@ -260,43 +915,30 @@ class EPCISParser(object):
         for example.
         :return:
         """
-        oevent = template_events.ObjectEvent(epc_list=[], quantity_list=[])
+        oevent = self._factory.object_event()
         return oevent
 
     def parse_aggregation_event_element(self, event, aggregation_element):
         logger.debug('handling aggregation event')
-        aevent = self.get_epcpyyes_aggregation_event()
-        for child in aggregation_element:
-            logger.debug('%s,%s', child.tag, child.text)
-            if child.tag == 'eventTime':
-                aevent.event_time = child.text.strip()
-            elif child.tag == 'eventTimeZoneOffset':
-                aevent.event_timezone_offset = child.text.strip()
-            elif child.tag == 'bizTransactionList':
-                self.parse_biz_transaction_list(aevent, child)
-            elif child.tag == 'recordTime':
-                aevent.record_time = child.text.strip()
-            elif child.tag == 'parentID':
-                aevent.parent_id = child.text.strip()
-            elif child.tag == 'childEPCs':
-                self.parse_epc_list(aevent, child)
-            elif child.tag == 'action':
-                aevent.action = child.text.strip()
-            elif child.tag == 'bizStep':
-                aevent.biz_step = child.text.strip()
-            elif child.tag == 'disposition':
-                aevent.disposition = child.text.strip()
-            elif child.tag == 'readPoint':
-                self.parse_readpoint(aevent, child)
-            elif child.tag == 'bizLocation':
-                self.parse_biz_location(aevent, child)
-            elif child.tag == 'extension':
-                self.parse_extension(aevent, child)
-            elif child.tag == 'baseExtension':
-                self.parse_base_extension(aevent, child)
+        aevent = self.get_event_object(
+            aggregation_element, self.get_epcpyyes_aggregation_event)
+        self.parse_fields(aevent, aggregation_element,
+                          self._aggregation_event_dispatch,
+                          self.parse_unexpected_agg_element)
         logger.debug('clearing out the Element')
         aggregation_element.clear()
+        self.enrich_event(aevent)
         self.handle_aggregation_event(aevent)
+        return aevent
+
+    def parse_unexpected_agg_element(self, aevent, child):
+        """
+        Override to handle any unexpected elements.
+        :param aevent: The aggregation epcpyyes event.
+        :param child: The child element from the XML.
+        :return: None.
+        """
+        pass
 
     def get_epcpyyes_aggregation_event(self):
         """
@@ -304,44 +946,31 @@ class EPCISParser(object):
         for example.
         :return:
         """
-        aevent = template_events.AggregationEvent()
+        aevent = self._factory.aggregation_event()
         return aevent
 
     def parse_transaction_event_element(self, event, transaction_element):
-        tevent = None
         logger.debug('handling transaction event')
-        tevent = self.get_epcpyyes_transaction_event()
-        for child in transaction_element:
-            logger.debug('%s,%s', child.tag, child.text)
-            if child.tag == 'eventTime':
-                tevent.event_time = child.text.strip()
-            elif child.tag == 'bizTransactionList':
-                self.parse_biz_transaction_list(tevent, child)
-            elif child.tag == 'eventTimeZoneOffset':
-                tevent.event_timezone_offset = child.text.strip()
-            elif child.tag == 'recordTime':
-                tevent.record_time = child.text.strip()
-            elif child.tag == 'parentID':
-                tevent.parent_id = child.text.strip()
-            elif child.tag == 'epcList':
-                self.parse_epc_list(tevent, child)
-            elif child.tag == 'action':
-                tevent.action = child.text.strip()
-            elif child.tag == 'bizStep':
-                tevent.biz_step = child.text.strip()
-            elif child.tag == 'disposition':
-                tevent.disposition = child.text.strip()
-            elif child.tag == 'readPoint':
-                self.parse_readpoint(tevent, child)
-            elif child.tag == 'bizLocation':
-                self.parse_biz_location(tevent, child)
-            elif child.tag == 'extension':
-                self.parse_extension(tevent, child)
-            elif child.tag == 'baseExtension':
-                self.parse_base_extension(tevent, child)
+        tevent = self.get_event_object(
+            transaction_element, self.get_epcpyyes_transaction_event)
+        self.parse_fields(tevent, transaction_element,
+                          self._transaction_event_dispatch,
+                          self.parse_unexpected_xact_element)
         logger.debug('clearing out the Element')
         transaction_element.clear()
+        self.enrich_event(tevent)
         self.handle_transaction_event(tevent)
+        return tevent
+
+    def parse_unexpected_xact_element(self, tevent, child):
+        """
+        Override this to handle any weirdness in an event such as
+        vendor specific namespaces, etc.
+        :param tevent: The EPCPyYes transaction event instance.
+        :param child: The element that is unexpected.
+        :return: None
+        """
+        pass
 
     def get_epcpyyes_transaction_event(self):
         """
@@ -349,7 +978,7 @@ class EPCISParser(object):
         for example.
         :return:
         """
-        return template_events.TransactionEvent()
+        return self._factory.transaction_event()
 
     def parse_transformation_event_element(
         self,
@@ -357,47 +986,26 @@ class EPCISParser(object):
         transformation_element
     ):
         logger.debug('handling transaction event')
-        tevent = self.get_epcpyyes_transformation_event()
-        for child in transformation_element:
-            if child.tag == 'eventTime':
-                tevent.event_time = child.text.strip()
-            elif child.tag == 'eventTimeZoneOffset':
-                tevent.event_timezone_offset = child.text.strip()
-            elif child.tag == 'recordTime':
-                tevent.record_time = child.text.strip()
-            elif child.tag == 'bizTransactionList':
-                self.parse_biz_transaction_list(tevent, child)
-            elif child.tag == 'eventTimeZoneOffset':
-                tevent.event_timezone_offset = child.text.strip()
-            elif child.tag == 'inputEPCList':
-                self.parse_input_epc_list(tevent, child)
-            elif child.tag == 'outputEPCList':
-                self.parse_output_epc_list(tevent, child)
-            elif child.tag == 'transformationID':
-                tevent.transformation_id = child.text.strip()
-            elif child.tag == 'bizStep':
-                tevent.biz_step = child.text.strip()
-            elif child.tag == 'disposition':
-                tevent.disposition = child.text.strip()
-            elif child.tag == 'readPoint':
-                self.parse_readpoint(tevent, child)
-            elif child.tag == 'bizLocation':
-                self.parse_biz_location(tevent, child)
-            elif child.tag == 'inputQuantityList':
-                self.parse_input_quantity_list(tevent, child)
-            elif child.tag == 'outputQuantityList':
-                self.parse_output_quantity_list(tevent, child)
-            elif child.tag == 'ilmd':
-                self.parse_ilmd(tevent, child)
-            elif child.tag == 'sourceList':
-                self.parse_source_list(tevent, child)
-            elif child.tag == 'destinationList':
-                self.parse_destination_list(tevent, child)
-            elif child.tag == 'baseExtension':
-                self.parse_base_extension(tevent, child)
+        tevent = self.get_event_object(
+            transformation_element, self.get_epcpyyes_transformation_event)
+        self.parse_fields(tevent, transformation_element,
+                          self._transformation_event_dispatch,
+                          self.parse_unexpected_transform_event)
         logger.debug('clearing out the Element')
         transformation_element.clear()
+        self.enrich_event(tevent)
         self.handle_transformation_event(tevent)
+        return tevent
+
+    def parse_unexpected_transform_event(self, tevent, child):
+        """
+        Overrride to handle any weirdness in your XML, such as vendor
+        spedific namespaces, etc.
+        :param tevent: The EPCPyYes transformation event instance.
+        :param child: The element that was found.
+        :return: None
+        """
+        pass
 
     def get_epcpyyes_transformation_event(self):
         """
@@ -405,7 +1013,7 @@ class EPCISParser(object):
         for example.
         :return:
         """
-        tevent = template_events.TransformationEvent()
+        tevent = self._factory.transformation_event()
         return tevent
 
     def parse_biz_transaction_list(self, event, list):
@@ -416,15 +1024,31 @@ class EPCISParser(object):
         :param list: The element containing the list.
         '''
         for child in list:
-            bt = BusinessTransaction(
+            bt = self._factory.business_transaction(
                 child.text.strip()
             )
             for name, value in child.attrib.items():
                 logger.debug('%s,%s', name, value)
                 if name == 'type':
-                    bt.type = value
+                    bt.type = self.encode_value('business_transaction_type',
+                                                value)
             event.business_transaction_list.append(bt)
 
+    def get_epc_list(self, event, attribute):
+        '''
+        Returns the EPC list of the event the parser appends EPCs to,
+        replacing it with an `EPCList` first if compact EPC lists were
+        requested.
+        :param event: The EPCIS event containing the list.
+        :param attribute: The name of the list attribute of the event.
+        :return: The list to append the EPCs to.
+        '''
+        target = getattr(event, attribute)
+        if self._compact_epc_lists and not isinstance(target, EPCList):
+            target = EPCList(target)
+            setattr(event, attribute, target)
+        return target
+
     def parse_epc_list(self, event, list):
         '''
         Parses the epc list clearing each epc as it finds one to conserve
@@ -434,9 +1058,9 @@ class EPCISParser(object):
         :return: None
         '''
         if hasattr(event, 'epc_list'):
-            target = event.epc_list
+            target = self.get_epc_list(event, 'epc_list')
         elif hasattr(event, 'child_epcs'):
-            target = event.child_epcs
+            target = self.get_epc_list(event, 'child_epcs')
         for epc in list:
             target.append(epc.text)
             logger.debug(epc.text)
@@ -453,8 +1077,9 @@ class EPCISParser(object):
         :param list: The list itself.
         :return: None
         '''
+        target = self.get_epc_list(event, 'input_epc_list')
         for epc in list:
-            event.input_epc_list.append(epc.text)
+            target.append(epc.text)
             logger.debug(epc.text)
             epc.clear()
 
@@ -469,21 +1094,101 @@ class EPCISParser(object):
         :param list: The list itself.
         :return: None
         '''
+        target = self.get_epc_list(event, 'output_epc_list')
         for epc in list:
-            event.output_epc_list.append(epc.text)
+            target.append(epc.text)
             logger.debug(epc.text)
             epc.clear()
 
+    def parse_epc_element(self, epc):
+        '''
+        Called for each `epc` element as it is parsed when an
+        `epc_chunk_size` was given.  The first EPC of an event creates the
+        event object and parses the elements preceding the list into it,
+        so the fields that come before the list in the document are set when
+        `handle_epc_chunk` is called.  Each parsed element (including the
+        epc) is removed from the tree to keep memory bounded.
+        :param epc: The epc element.
+        :return: False if the epc is not in an event EPC list and was left
+        alone, otherwise True.
+        '''
+        epc_list = epc.getparent()
+        if epc_list is not self._chunk_list:
+            event_element = epc_list.getparent()
+            attribute = self._epc_list_attributes.get(
+                self.get_element_name(epc_list.tag))
+            parts = None if event_element is None else \
+                self._event_parsers.get(
+                    self.get_element_name(event_element.tag))
+            if attribute is None or parts is None:
+                return False
+            self.flush_epc_chunk()
+            if event_element is not self._chunk_element:
+                self._chunk_element = event_element
+                self._chunk_event = parts[0]()
+            preceding = []
+            for child in event_element:
+                if child is epc_list:
+                    break
+                preceding.append(child)
+            self.parse_fields(self._chunk_event, preceding, parts[1],
+                              parts[2])
+            for child in preceding:
+                event_element.remove(child)
+            self._chunk_list = epc_list
+            self._chunk_attribute = attribute
+        self._chunk.append(epc.text)
+        epc_list.remove(epc)
+        if len(self._chunk) >= self._epc_chunk_size:
+            self.flush_epc_chunk()
+        return True
+
+    def flush_epc_chunk(self):
+        '''
+        Hands any EPCs collected since the last chunk to
+        `handle_epc_chunk`.
+        :return: None
+        '''
+        if self._chunk:
+            self.handle_epc_chunk(self._chunk_event, self._chunk_attribute,
+                                  self._chunk)
+            self._chunk = []
+
+    def get_event_object(self, element, create):
+        '''
+        Returns the object an event element is parsed into.  This is the
+        object that was handed to `handle_epc_chunk` with the EPCs of the
+        event (after the last chunk has been delivered) or a new one.
+        :param element: The event element.
+        :param create: Called to create a new event object.
+        :return: The event object.
+        '''
+        if element is not self._chunk_element:
+            return create()
+        self.flush_epc_chunk()
+        epcis_event = self._chunk_event
+        self._reset_epc_chunk()
+        return epcis_event
+
+    def _reset_epc_chunk(self):
+        self._chunk_element = None
+        self._chunk_event = None
+        self._chunk_list = None
+        self._chunk_attribute = None
+        self._chunk = []
+
     def parse_readpoint(self, epcis_event, read_point):
         for child in read_point:
-            if child.tag == 'id':
-                epcis_event.read_point = child.text.strip()
+            if self.local_name(child.tag) == 'id':
+                epcis_event.read_point = self.encode_value(
+                    'read_point', child.text.strip())
                 logger.debug('%s,%s', child.tag, child.text.strip())
 
     def parse_biz_location(self, epcis_event, biz_location):
         for child in biz_location:
-            if child.tag == 'id':
-                epcis_event.biz_location = child.text.strip()
+            if self.local_name(child.tag) == 'id':
+                epcis_event.biz_location = self.encode_value(
+                    'biz_location', child.text.strip())
                 logger.debug('%s,%s', child.tag, child.text.strip())
 
     def parse_extension(self, epcis_event, extension):
@@ -495,28 +1200,17 @@ class EPCISParser(object):
         :return: None
         '''
         # Transformation events don't have standardized extensions...
-        if not isinstance(epcis_event, template_events.TransformationEvent):
-            for child in extension:
-                if child.tag == 'sourceList':
-                    self.parse_source_list(epcis_event, child)
-                elif child.tag == 'destinationList':
-                    self.parse_destination_list(epcis_event, child)
-                elif child.tag == 'ilmd':
-                    self.parse_ilmd(epcis_event, child)
-                elif child.tag == 'quantityList':
-                    self.parse_quantity_list(epcis_event, child)
-                elif child.tag == 'childQuantityList':
-                    self.parse_child_quantity_list(epcis_event, child)
+        if not isinstance(epcis_event, (template_events.TransformationEvent,
+                                        TransformationEventRecord)):
+            self.parse_fields(epcis_event, extension,
+                              self._extension_dispatch)
 
     def parse_base_extension(self, epcis_event, base_extension):
         '''
         Parses the EPCIS base extension.
         '''
-        for child in base_extension:
-            if child.tag == 'eventID':
-                epcis_event.event_id = child.text.strip()
-            elif child.tag == 'errorDeclaration':
-                self.parse_error_declaration(epcis_event, child)
+        self.parse_fields(epcis_event, base_extension,
+                          self._base_extension_dispatch)
 
     def parse_error_declaration(self, epcis_event, error_declaration):
         '''
@@ -526,13 +1220,15 @@ class EPCISParser(object):
         :return: None.
         '''
         for child in error_declaration:
-            epcis_event.error_declaration = ErrorDeclaration()
-            if child.tag == 'declarationTime':
+            name = self.local_name(child.tag)
+            epcis_event.error_declaration = \
+                self._factory.error_declaration()
+            if name == 'declarationTime':
                 epcis_event.error_declaration.declaration_time = \
                     child.text.strip()
-            elif child.tag == 'reason':
+            elif name == 'reason':
                 epcis_event.error_declaration.reason = child.text.strip()
-            elif child.tag == 'correctiveEventIDs':
+            elif name == 'correctiveEventIDs':
                 self.parse_corrective_event_ids(epcis_event, child)
 
     def parse_corrective_event_ids(self, epcis_event, corrective_event_ids):
@@ -550,9 +1246,9 @@ class EPCISParser(object):
             for name, value in child.attrib.items():
                 logger.debug('%s,%s', name, value)
                 if name == 'type':
-                    urn = value
+                    urn = self.encode_value('source_type', value)
             logger.debug('%s,%s', child.tag, child.text.strip())
-            source = Source(urn, child.text.strip())
+            source = self._factory.source(urn, child.text.strip())
             epcis_event.source_list.append(source)
             logger.debug('Added %s, %s to the source_list.', urn,
                          child.text.strip())
@@ -563,9 +1259,10 @@ class EPCISParser(object):
             for name, value in child.attrib.items():
                 logger.debug('%s,%s', name, value)
                 if name == 'type':
-                    urn = value
+                    urn = self.encode_value('destination_type', value)
             logger.debug('%s,%s', child.tag, child.text.strip())
-            destination = Destination(urn, child.text.strip())
+            destination = self._factory.destination(
+                urn, child.text.strip())
             epcis_event.destination_list.append(destination)
             logger.debug('Added %s, %s to the destination_list.', urn,
                          child.text.strip())
@@ -576,8 +1273,9 @@ class EPCISParser(object):
                 logger.debug('%s,%s', child.tag, child.text.strip())
                 check_val = child.tag.split('}')
                 check_val = check_val[0] if len(check_val) == 1 else check_val[1]
-                ilmd = InstanceLotMasterDataAttribute(check_val,
-                                                      child.text.strip())
+                ilmd = self._factory.ilmd(
+                    self.encode_value('ilmd_name', check_val),
+                    child.text.strip())
                 epcis_event.ilmd.append(ilmd)
 
     def parse_quantity_list(self, epcis_event, quantity_list):
@@ -592,7 +1290,7 @@ class EPCISParser(object):
         if logger.getEffectiveLevel() == logging.DEBUG:
             logger.debug(epcis_event.render())
         for child in quantity_list:
-            if child.tag == 'quantityElement':
+            if self.local_name(child.tag) == 'quantityElement':
                 self.parse_quantity_element(epcis_event, child)
 
     def parse_child_quantity_list(self, epcis_event, quantity_list):
@@ -607,7 +1305,7 @@ class EPCISParser(object):
         if logger.getEffectiveLevel() == logging.DEBUG:
             logger.debug(epcis_event.render())
         for child in quantity_list:
-            if child.tag == 'quantityElement':
+            if self.local_name(child.tag) == 'quantityElement':
                 epcis_event.child_quantity_list.append(
                     self.get_quantity_element(child)
                 )
@@ -626,7 +1324,7 @@ class EPCISParser(object):
         if logger.getEffectiveLevel() == logging.DEBUG:
             logger.debug(epcis_event.render())
         for child in quantity_list:
-            if child.tag == 'quantityElement':
+            if self.local_name(child.tag) == 'quantityElement':
                 epcis_event.input_quantity_list.append(
                     self.get_quantity_element(child)
                 )
@@ -645,7 +1343,7 @@ class EPCISParser(object):
         if logger.getEffectiveLevel() == logging.DEBUG:
             logger.debug(epcis_event.render())
         for child in quantity_list:
-            if child.tag == 'quantityElement':
+            if self.local_name(child.tag) == 'quantityElement':
                 epcis_event.output_quantity_list.append(
                     self.get_quantity_element(child)
                 )
@@ -656,27 +1354,21 @@ class EPCISParser(object):
         :param quantity_element:
         :return: An EPCPyYes QuantityElement.
         '''
-        qe = QuantityElement('')
+        qe = self._factory.quantity_element('')
         for child in quantity_element:
-            if child.tag == 'epcClass':
+            name = self.local_name(child.tag)
+            if name == 'epcClass':
                 qe.epc_class = child.text.strip()
-            elif child.tag == 'quantity':
+            elif name == 'quantity':
                 qe.quantity = float(child.text.strip())
-            elif child.tag == 'uom':
+            elif name == 'uom':
                 qe.uom = child.text.strip()
         return qe
 
     def parse_quantity_element(self, epcis_event, quantity_element):
-        qe = QuantityElement('')
-        for child in quantity_element:
-            if child.tag == 'epcClass':
-                qe.epc_class = child.text.strip()
-            elif child.tag == 'quantity':
-                qe.quantity = float(child.text.strip())
-            elif child.tag == 'uom':
-                qe.uom = child.text.strip()
         logger.debug('Appending a quantity list element.')
-        epcis_event.quantity_list.append(qe)
+        epcis_event.quantity_list.append(
+            self.get_quantity_element(quantity_element))
 
     def handle_sbdh(self,
                     header: template_sbdh.StandardBusinessDocumentHeader):
@@ -697,11 +1389,29 @@ class EPCISParser(object):
         :return: None
         '''
         if logger.getEffectiveLevel() == logging.DEBUG:
-            # since render is being called here, avoiding sending to logger
+            # since the event is serialized here, avoiding sending to logger
             # unless debug is set
             logger.debug(epcis_event.render())
         logger.debug('handle object event called...')
 
+    def handle_epc_chunk(self, epcis_event, attribute, epcs):
+        '''
+        Implement this method to handle the EPCs of events in chunks when
+        the parser was created with an `epc_chunk_size`.  The event is the
+        same object that is later handed to the `handle_*` method for its
+        type (with empty EPC lists).  Only the fields that precede the
+        list in the document are set on it when the chunks are delivered;
+        for an ObjectEvent, for example, the action, biz step, etc. follow
+        the epcList.
+        :param epcis_event: The event the EPCs belong to.
+        :param attribute: The name of the list attribute of the event the
+        EPCs belong in (`epc_list`, `child_epcs`, `input_epc_list` or
+        `output_epc_list`).
+        :param epcs: A list of EPC URNs.
+        :return: None
+        '''
+        logger.debug('handle_epc_chunk called with %s EPCs...', len(epcs))
+
     def handle_aggregation_event(
         self,
         epcis_event: template_events.AggregationEvent
@@ -713,7 +1423,7 @@ class EPCISParser(object):
         :return: None
         '''
         if logger.getEffectiveLevel() == logging.DEBUG:
-            # since render is being called here, avoiding sending to logger
+            # since the event is serialized here, avoiding sending to logger
             # unless debug is set
             logger.debug(epcis_event.render())
         logger.debug('handle aggregation event called...')
@@ -730,7 +1440,7 @@ class EPCISParser(object):
         :return: None
         '''
         if logger.getEffectiveLevel() == logging.DEBUG:
-            # since render is being called here, avoiding sending to logger
+            # since the event is serialized here, avoiding sending to logger
             # unless debug is set
             logger.debug(epcis_event.render())
         logger.debug('handle transaction event called...')
@@ -747,11 +1457,21 @@ class EPCISParser(object):
         :return: None
         '''
         if logger.getEffectiveLevel() == logging.DEBUG:
-            # since render is being called here, avoiding sending to logger
+            # since the event is serialized here, avoiding sending to logger
             # unless debug is set
             logger.debug(epcis_event.render())
         logger.debug('handle transaction event called...')
 
+    def handle_vocabulary_element(self, record):
+        '''
+        Implement this method to handle the master data vocabulary
+        elements found in EPCIS headers and, with the `MasterDataParser`,
+        in master data documents.
+        :param record: A `records.VocabularyElementRecord`.
+        :return: None
+        '''
+        logger.debug('handle_vocabulary_element called for %s', record.id)
+
     def handle_unexpected_element(self, event, element):
         '''
         If an element is found within the EPCIS document that was unexpected
@@ -766,419 +1486,134 @@ class EPCISParser(object):
 class FlexibleNSParser(EPCISParser):
     '''
     This parser is identical in functionality to the `EPCISParser`; however,
-    when testing for element tag values this parser will look for element
-    tag values inside using an `in` clause as opposed to looking for an exact
-    match.  For example if you have an epcis document with namespace
-    declarations, then the `EPCISParser` will not find node `<ns1:ObjectEvent>`
-    since it is not an exact match.  This parser will do an "in" and look
-    for ObjectEvent in `<ns1:ObjectEvent>` and will find it.  Having said that,
-    this parser is a little slower due to the fact that it is looking in
-    string values as opposed to comparing string values.
+    it also finds elements that are namespace qualified.  For example if you
+    have an epcis document with namespace declarations, then the
+    `EPCISParser` will not find node `<ns1:ObjectEvent>` since it is not an
+    exact match.  This parser reads the namespace declarations of the
+    document as they are parsed and adds the fully qualified tags of every
+    element it understands to its lookup tables, so `<ns1:ObjectEvent>` and
+    its children are found with the same exact dictionary lookups the
+    `EPCISParser` uses.
     '''
 
-    def parse(self, huge_tree=False):
-        parser_lookup = etree.ElementDefaultClassLookup(
-            element=EPCPyYesElement)
-        epcis = etree.iterparse(self.stream, events=('end',),
-                                remove_comments=True, huge_tree=huge_tree)
-        epcis.set_element_class_lookup(parser_lookup)
-        for event, element in epcis:
-            if 'EPCISHeader' in element.tag:
-                self.parse_epcis_header(event, element)
-                self.clear_element(element)
-            elif 'ObjectEvent' in element.tag:
-                self.parse_object_event_element(event, element)
-                self.clear_element(element)
-            elif 'AggregationEvent' in element.tag:
-                self.parse_aggregation_event_element(event, element)
-                self.clear_element(element)
-            elif 'TransactionEvent' in element.tag:
-                self.parse_transaction_event_element(event, element)
-                self.clear_element(element)
-            elif 'TransformationEvent' in element.tag:
-                self.parse_transformation_event_element(event, element)
-                self.clear_element(element)
-            else:
-                self.handle_unexpected_element(event, element)
-
-    def parse_object_event_element(self, event, object_element):
-        logger.debug('handling object event')
-        oevent = self.get_epcpyyes_object_event()
-        for child in object_element:
-            try:
-                logger.debug('%s,%s', child.tag, child.text)
-                if child.tag.endswith('eventTime'):
-                    oevent.event_time = child.text.strip()
-                elif child.tag.__contains__('bizTransactionList'):
-                    self.parse_biz_transaction_list(oevent, child)
-                elif child.tag.__contains__('eventTimeZoneOffset'):
-                    oevent.event_timezone_offset = child.text.strip()
-                elif child.tag.__contains__('recordTime'):
-                    oevent.record_time = child.text.strip()
-                elif child.tag.__contains__('epcList'):
-                    self.parse_epc_list(oevent, child)
-                elif child.tag.__contains__('action'):
-                    oevent.action = child.text.strip()
-                elif child.tag.__contains__('bizStep'):
-                    oevent.biz_step = child.text.strip()
-                elif child.tag.endswith('disposition'):
-                    oevent.disposition = child.text.strip()
-                elif child.tag.__contains__('readPoint'):
-                    self.parse_readpoint(oevent, child)
-                elif child.tag.__contains__('bizLocation'):
-                    self.parse_biz_location(oevent, child)
-                elif child.tag.__contains__('extension'):
-                    self.parse_extension(oevent, child)
-                elif child.tag.__contains__('baseExtension'):
-                    self.parse_base_extension(oevent, child)
-                else:
-                    self.parse_unexpected_obj_element(oevent, child)
-            except AttributeError:
-                logger.debug('Found empty element %s', child.tag)
-        logger.debug('clearing out the Element')
-        object_element.clear()
-        if oevent:
-            self.handle_object_event(oevent)
-
-    def parse_unexpected_obj_element(self, oevent, child):
-        """
-        Override to handle any oddness in the XML structure.
-        :param oevent: The object event EPCPyYes object
-        :param child: The unexpected child node
+    _iterparse_events = ('start-ns', 'end')
+
+    # the local names compared by the sub-element parsers
+    _sub_element_names = ('id', 'declarationTime', 'reason',
+                          'correctiveEventIDs', 'quantityElement',
+                          'epcClass', 'quantity', 'uom')
+
+    def __init__(self, *args, **kwargs):
+        self._compiled_tables = []
+        self._namespaces = set()
+        self._local_names = {}
+        for name in self._element_names + self._sub_element_names:
+            self._local_names[name] = name
+        super().__init__(*args, **kwargs)
+
+    def compile_fields(self, fields):
+        '''
+        Keeps track of each compiled table so the fully qualified tags can
+        be added to it as namespaces are declared.
+        '''
+        compiled = super().compile_fields(fields)
+        self._compiled_tables.append(compiled)
+        for name in fields:
+            self._local_names[name] = name
+        for namespace in self._namespaces:
+            self._qualify_table(compiled, namespace)
+        return compiled
+
+    def add_namespace(self, prefix, namespace):
+        '''
+        Called for each namespace declared in the document.  Adds the
+        fully qualified tag of each known element in the namespace to the
+        lookup tables.
+        :param prefix: The declared prefix (empty for a default namespace).
+        :param namespace: The namespace URI.
         :return: None
-        """
-        pass
-
-    def parse_aggregation_event_element(self, event, aggregation_element):
-        logger.debug('handling aggregation event')
-        aevent = self.get_epcpyyes_aggregation_event()
-        for child in aggregation_element:
-            try:
-                logger.debug('%s,%s', child.tag, child.text)
-                if child.tag.endswith('eventTime'):
-                    aevent.event_time = child.text.strip()
-                elif child.tag.__contains__('eventTimeZoneOffset'):
-                    aevent.event_timezone_offset = child.text.strip()
-                elif child.tag.__contains__('bizTransactionList'):
-                    self.parse_biz_transaction_list(aevent, child)
-                elif child.tag.__contains__('recordTime'):
-                    aevent.record_time = child.text.strip()
-                elif child.tag.__contains__('parentID'):
-                    aevent.parent_id = child.text.strip()
-                elif child.tag.__contains__('childEPCs'):
-                    self.parse_epc_list(aevent, child)
-                elif child.tag.__contains__('action'):
-                    aevent.action = child.text.strip()
-                elif child.tag.__contains__('bizStep'):
-                    aevent.biz_step = child.text.strip()
-                elif child.tag.__contains__('disposition'):
-                    aevent.disposition = child.text.strip()
-                elif child.tag.__contains__('readPoint'):
-                    self.parse_readpoint(aevent, child)
-                elif child.tag.__contains__('bizLocation'):
-                    self.parse_biz_location(aevent, child)
-                elif child.tag.__contains__('extension'):
-                    self.parse_extension(aevent, child)
-                elif child.tag.__contains__('baseExtension'):
-                    self.parse_base_extension(aevent, child)
-                else:
-                    self.parse_unexpected_agg_element(aevent, child)
-            except AttributeError:
-                logger.debug('Empty element % detected.', child.tag)
-        logger.debug('clearing out the Element')
-        aggregation_element.clear()
-        self.handle_aggregation_event(aevent)
-
-    def parse_unexpected_agg_element(self, aevent, child):
-        """
-        Override to handle any unexpected elements.
-        :param aevent: The aggregation epcpyyes event.
-        :param child: The child element from the XML.
-        :return: None.
-        """
-        pass
-
-    def parse_transaction_event_element(self, event, transaction_element):
-        tevent = None
-        logger.debug('handling transaction event')
-        tevent = self.get_epcpyyes_transaction_event()
-        for child in transaction_element:
-            try:
-                logger.debug('%s,%s', child.tag, child.text.strip())
-                if child.tag.endswith('eventTime'):
-                    tevent.event_time = child.text.strip()
-                elif child.tag.__contains__('bizTransactionList'):
-                    self.parse_biz_transaction_list(tevent, child)
-                elif child.tag.__contains__('eventTimeZoneOffset'):
-                    tevent.event_timezone_offset = child.text.strip()
-                elif child.tag.__contains__('recordTime'):
-                    tevent.record_time = child.text.strip()
-                elif child.tag.__contains__('parentID'):
-                    tevent.parent_id = child.text.strip()
-                elif child.tag.__contains__('epcList'):
-                    self.parse_epc_list(tevent, child)
-                elif child.tag.__contains__('action'):
-                    tevent.action = child.text.strip()
-                elif child.tag.__contains__('bizStep'):
-                    tevent.biz_step = child.text.strip()
-                elif child.tag.__contains__('disposition'):
-                    tevent.disposition = child.text.strip()
-                elif child.tag.__contains__('readPoint'):
-                    self.parse_readpoint(tevent, child)
-                elif child.tag.__contains__('bizLocation'):
-                    self.parse_biz_location(tevent, child)
-                elif child.tag.__contains__('extension'):
-                    self.parse_extension(tevent, child)
-                elif child.tag.__contains__('baseExtension'):
-                    self.parse_base_extension(tevent, child)
-                else:
-                    self.parse_unexpected_xact_element(tevent, child)
-            except AttributeError:
-                logger.debug('Found empty element %s', child.tag)
-        logger.debug('clearing out the Element')
-        transaction_element.clear()
-        self.handle_transaction_event(tevent)
-
-    def parse_unexpected_xact_element(self, tevent, child):
-        """
-        Override this to handle any weirdness in an event such as
-        vendor specific namespaces, etc.
-        :param tevent: The EPCPyYes transaction event instance.
-        :param child: The element that is unexpected.
-        :return: None
-        """
-        pass
-
-    def parse_transformation_event_element(
-        self,
-        event,
-        transformation_element
-    ):
-        logger.debug('handling transaction event')
-        tevent = self.get_epcpyyes_transformation_event()
-        for child in transformation_element:
-            if child.tag.endswith('eventTime'):
-                tevent.event_time = child.text.strip()
-            elif child.tag.__contains__('eventTimeZoneOffset'):
-                tevent.event_timezone_offset = child.text.strip()
-            elif child.tag.__contains__('recordTime'):
-                tevent.record_time = child.text.strip()
-            elif child.tag.__contains__('bizTransactionList'):
-                self.parse_biz_transaction_list(tevent, child)
-            elif child.tag.__contains__('eventTimeZoneOffset'):
-                tevent.event_timezone_offset = child.text.strip()
-            elif child.tag.__contains__('inputEPCList'):
-                self.parse_input_epc_list(tevent, child)
-            elif child.tag.__contains__('outputEPCList'):
-                self.parse_output_epc_list(tevent, child)
-            elif child.tag.__contains__('transformationID'):
-                tevent.transformation_id = child.text.strip()
-            elif child.tag.__contains__('bizStep'):
-                tevent.biz_step = child.text.strip()
-            elif child.tag.__contains__('disposition'):
-                tevent.disposition = child.text.strip()
-            elif child.tag.__contains__('readPoint'):
-                self.parse_readpoint(tevent, child)
-            elif child.tag.__contains__('bizLocation'):
-                self.parse_biz_location(tevent, child)
-            elif child.tag.__contains__('inputQuantityList'):
-                self.parse_input_quantity_list(tevent, child)
-            elif child.tag.__contains__('outputQuantityList'):
-                self.parse_output_quantity_list(tevent, child)
-            elif child.tag.__contains__('ilmd'):
-                self.parse_ilmd(tevent, child)
-            elif child.tag.__contains__('sourceList'):
-                self.parse_source_list(tevent, child)
-            elif child.tag.__contains__('destinationList'):
-                self.parse_destination_list(tevent, child)
-            elif child.tag.__contains__('baseExtension'):
-                self.parse_base_extension(tevent, child)
-        logger.debug('clearing out the Element')
-        transformation_element.clear()
-        self.handle_transformation_event(tevent)
-
-    def parse_unexpected_transform_event(self, tevent, child):
-        """
-        Overrride to handle any weirdness in your XML, such as vendor
-        spedific namespaces, etc.
-        :param tevent: The EPCPyYes transformation event instance.
-        :param child: The element that was found.
-        :return: None
-        """
-        pass
-
-    def parse_biz_transaction_list(self, event, list):
-        '''
-        Parses the business transaction list if supplied in a
-        given event and adds that info to the event.
-        :param event: The EPCIS event
-        :param list: The element containing the list.
         '''
-        for child in list:
-            bt = BusinessTransaction(
-                child.text.strip()
-            )
-            for name, value in child.attrib.items():
-                logger.debug('%s,%s', name, value)
-                if name.__contains__('type'):
-                    bt.type = value
-            event.business_transaction_list.append(bt)
+        if namespace in self._namespaces:
+            return
+        logger.debug('Adding namespace %s (%s).', namespace, prefix)
+        self._namespaces.add(namespace)
+        for table in self._compiled_tables:
+            self._qualify_table(table, namespace)
+        for name in [name for name in self._local_names if '}' not in name]:
+            self._local_names['{%s}%s' % (namespace, name)] = name
 
-    def parse_readpoint(self, epcis_event, read_point):
-        for child in read_point:
-            if 'id' in child.tag:
-                epcis_event.read_point = child.text.strip()
-                logger.debug('%s,%s', child.tag, child.text.strip())
-
-    def parse_biz_location(self, epcis_event, biz_location):
-        for child in biz_location:
-            if 'id' in child.tag:
-                epcis_event.biz_location = child.text.strip()
-                logger.debug('%s,%s', child.tag, child.text.strip())
+    def _qualify_table(self, table, namespace):
+        for tag, parse_field in list(table.items()):
+            if '}' not in tag:
+                table['{%s}%s' % (namespace, tag)] = parse_field
 
-    def parse_extension(self, epcis_event, extension):
+    def local_name(self, tag):
         '''
-        Called when the extension is encountered for each event.
-        If you need to process custom extensions, override this function.
-        :param epcis_event: The inbound event
-        :param extension: The extension lxml element.
-        :return: None
+        Returns the local name of a tag.  Tags of known elements in
+        declared namespaces are found in a precomputed dictionary.
+        :param tag: The tag of the element.
+        :return: The local name of the element.
         '''
-        # Transformation events don't have standardized extensions...
-        if not isinstance(epcis_event, template_events.TransformationEvent):
-            for child in extension:
-                if child.tag.__contains__('sourceList'):
-                    self.parse_source_list(epcis_event, child)
-                elif child.tag.__contains__('destinationList'):
-                    self.parse_destination_list(epcis_event, child)
-                elif child.tag.__contains__('ilmd'):
-                    self.parse_ilmd(epcis_event, child)
-                elif child.tag.__contains__('quantityList'):
-                    self.parse_quantity_list(epcis_event, child)
-                elif child.tag.__contains__('childQuantityList'):
-                    self.parse_child_quantity_list(epcis_event, child)
+        name = self._local_names.get(tag)
+        if name is None:
+            name = tag.rpartition('}')[2]
+        return name
 
-    def parse_base_extension(self, epcis_event, base_extension):
+    def get_element_name(self, tag):
         '''
-        Parses the EPCIS base extension.
+        Returns the local name of the tag so that namespace qualified
+        top-level elements are found.
+        :param tag: The tag of the element.
+        :return: The local name of the element.
         '''
-        for child in base_extension:
-            if child.tag.__contains__('eventID'):
-                epcis_event.event_id = child.text.strip()
-            elif child.tag.__contains__('errorDeclaration'):
-                self.parse_error_declaration(epcis_event, child)
+        return self.local_name(tag)
 
-    def parse_error_declaration(self, epcis_event, error_declaration):
+    def get_element_tags(self):
         '''
-        Parses the error declaration element.
-        :param epcis_event: The epcis EPCPyYes event.
-        :param error_declaration: The error declaration element.
-        :return: None.
+        Matches the top-level elements in any (or no) namespace.
+        :return: A tuple of tags in the lxml `iterparse` tag format.
         '''
-        for child in error_declaration:
-            epcis_event.error_declaration = ErrorDeclaration()
-            if 'declarationTime' in child.tag:
-                epcis_event.error_declaration.declaration_time = \
-                    child.text.strip()
-            elif 'reason' in child.tag:
-                epcis_event.error_declaration.reason = child.text.strip()
-            elif 'correctiveEventIDs' in child.tag:
-                self.parse_corrective_event_ids(epcis_event, child)
+        return tuple('{*}' + name for name in super().get_element_tags())
 
-    def parse_quantity_list(self, epcis_event, quantity_list):
+    def parse_fields(self, epcis_event, element, fields, unexpected=None):
         '''
-        Takes a quantity list element as an input and parses it
-        into an EPCPyYes QuantityElement instance.
-        :param epcis_event: The EPCPyYes event instance that will contain
-        the parsed QuantityElement instance as an attribute.
-        :param quantity_list: The Element containing the quantity_list.
-        :return: None
+        Dispatches each child on its fully qualified tag, falling back to
+        the local name for namespaces that were not declared through the
+        parser (e.g. when an element is handed to a `parse_*` method
+        directly).  Empty elements are skipped.
         '''
-        if logger.getEffectiveLevel() == logging.DEBUG:
-            logger.debug(epcis_event.render())
-        for child in quantity_list:
-            if 'quantityElement' in child.tag:
-                self.parse_quantity_element(epcis_event, child)
-
-    def parse_child_quantity_list(self, epcis_event, quantity_list):
-        '''
-        Takes a child quantity list element as an input and parses it
-        into an EPCPyYes QuantityElement instance.
-        :param epcis_event: The EPCPyYes event instance that will contain
-        the parsed QuantityElement instance as an attribute.
-        :param quantity_list: The Element containing the quantity_list.
-        :return: None
-        '''
-        if logger.getEffectiveLevel() == logging.DEBUG:
-            logger.debug(epcis_event.render())
-        for child in quantity_list:
-            if 'quantityElement' in child.tag:
-                epcis_event.child_quantity_list.append(
-                    self.get_quantity_element(child)
-                )
-
-    def parse_input_quantity_list(self, epcis_event,
-                                  quantity_list):
-        '''
-        Takes a transformation event input quantity list
-        element as an input and parses it
-        into an EPCPyYes QuantityElement instance.
-        :param epcis_event: The EPCPyYes event instance that will contain
-        the parsed QuantityElement instance as an attribute.
-        :param quantity_list: The Element containing the quantity_list.
-        :return: None
-        '''
-        if logger.getEffectiveLevel() == logging.DEBUG:
-            logger.debug(epcis_event.render())
-        for child in quantity_list:
-            if 'quantityElement' in child.tag:
-                epcis_event.input_quantity_list.append(
-                    self.get_quantity_element(child)
-                )
-
-    def parse_output_quantity_list(self, epcis_event,
-                                   quantity_list):
-        '''
-        Takes a transformation event input quantity list
-        element as an output and parses it
-        into an EPCPyYes QuantityElement instance.
-        :param epcis_event: The EPCPyYes event instance that will contain
-        the parsed QuantityElement instance as an attribute.
-        :param quantity_list: The Element containing the quantity_list.
-        :return: None
-        '''
-        if logger.getEffectiveLevel() == logging.DEBUG:
-            logger.debug(epcis_event.render())
-        for child in quantity_list:
-            if 'quantityElement' in child.tag:
-                epcis_event.output_quantity_list.append(
-                    self.get_quantity_element(child)
-                )
+        for child in element:
+            try:
+                parse_field = fields.get(child.tag)
+                if parse_field is None:
+                    parse_field = fields.get(self.local_name(child.tag))
+                if parse_field is not None:
+                    parse_field(epcis_event, child)
+                elif unexpected is not None:
+                    unexpected(epcis_event, child)
+            except AttributeError:
+                logger.debug('Found empty element %s', child.tag)
 
-    def get_quantity_element(self, quantity_element):
-        '''
-        Parses and returns a quantity element.
-        :param quantity_element:
-        :return: An EPCPyYes QuantityElement.
-        '''
-        qe = QuantityElement('')
-        for child in quantity_element:
-            if 'epcClass' in child.tag:
-                qe.epc_class = child.text.strip()
-            elif 'quantity' in child.tag:
-                qe.quantity = float(child.text.strip())
-            elif 'uom' in child.tag:
-                qe.uom = child.text.strip()
-        return qe
 
-    def parse_quantity_element(self, epcis_event, quantity_element):
-        qe = QuantityElement('')
-        for child in quantity_element:
-            if 'epcClass' in child.tag:
-                qe.epc_class = child.text.strip()
-            elif 'quantity' in child.tag:
-                qe.quantity = float(child.text.strip())
-            elif 'uom' in child.tag:
-                qe.uom = child.text.strip()
-        logger.debug('Appending a quantity list element.')
-        epcis_event.quantity_list.append(qe)
+class MasterDataParser(FlexibleNSParser):
+    '''
+    Streams the vocabulary elements of EPCISMasterDataDocuments (and of
+    the master data in EPCIS headers) as compact
+    `records.VocabularyElementRecord` instances.  Each VocabularyElement
+    is handed to `handle_vocabulary_element`, yielded by `iter_events` as
+    a `('VocabularyElement', record)` tuple and then removed from the
+    tree, so documents with hundreds of thousands of elements are parsed
+    in constant memory.  Any EPCIS events in the document are parsed as
+    usual.
+    '''
+    _element_names = FlexibleNSParser._element_names + ('VocabularyElement',)
+
+    def parse_element(self, event, element):
+        if event == 'end' and \
+                self.get_element_name(element.tag) == 'VocabularyElement':
+            record = self.parse_vocabulary_element(element)
+            self.handle_vocabulary_element(record)
+            self.clear_element(element)
+            element.getparent().remove(element)
+            return 'VocabularyElement', record
+        return super().parse_element(event, element)
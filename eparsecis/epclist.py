@@ -0,0 +1,255 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2018 SerialLab Corp.  All rights reserved.
+'''
+A compact, list-like container for very large lists of EPC URNs.
+'''
+import re
+from itertools import islice
+
+_DECIMAL = re.compile(r'[1-9][0-9]*|0')
+_CHUNK_SIZE = 65536
+
+# Each segment of an EPCList is a plain list (so that the container pickles
+# without any help) in one of two layouts:
+#   a run of consecutive numeric serials: [prefix index, start, stop]
+#   packed serials: [prefix index, bytearray, count, last numeric serial]
+#   values that can not be packed: [None, list of values]
+# The bytearray holds each serial followed by a newline, so values that
+# contain a newline (the text of a pretty printed <epc> element, for
+# example) or that are not strings are kept as they are.
+_PREFIX = 0
+_START = 1
+_STOP = 2
+_BUFFER = 1
+_COUNT = 2
+_LAST = 3
+_VALUES = 1
+
+
+def _split_epc(epc):
+    '''
+    Splits an EPC URN into the part up to and including the last '.'
+    (the company prefix and item reference of an SGTIN, for example)
+    and the serial number.
+    '''
+    prefix, dot, serial = epc.rpartition('.')
+    return prefix + dot, serial
+
+
+def _number(serial):
+    '''
+    Returns the serial as an int if it is a decimal number that converts
+    back to the same string (i.e. without leading zeros), otherwise None.
+    '''
+    if _DECIMAL.fullmatch(serial):
+        return int(serial)
+    return None
+
+
+def _iter_packed(buffer):
+    '''
+    Yields the serials in a packed buffer without splitting all of it at
+    once.
+    '''
+    start = 0
+    end = len(buffer)
+    while start < end:
+        stop = buffer.rfind(b'\n', start, start + _CHUNK_SIZE) + 1
+        if stop <= start:
+            stop = buffer.find(b'\n', start) + 1
+        for serial in bytes(buffer[start:stop - 1]).split(b'\n'):
+            yield serial.decode('utf-8')
+        start = stop
+
+
+class EPCList(object):
+    '''
+    A sequence of EPC URNs that stores the shared URN prefix of each
+    company prefix/item reference group once and keeps the serial numbers
+    in a packed buffer.  Runs of consecutive numeric serials are stored as
+    ranges, so a commissioning event with a million sequential serials
+    takes a few hundred bytes.
+
+    Appending, iteration, `len`, membership, indexing and comparison with
+    a list work as they do for a list of strings.  Values that are not
+    strings (None for an empty <epc/>) or that contain a newline are kept
+    unpacked.  Indexing walks the
+    segments of the list, so iterate rather than index in loops.
+    '''
+    __slots__ = ('_prefixes', '_prefix_indexes', '_segments', '_length')
+
+    def __init__(self, epcs=()):
+        self._prefixes = []
+        self._prefix_indexes = {}
+        self._segments = []
+        self._length = 0
+        self.extend(epcs)
+
+    def append(self, epc):
+        '''
+        Appends an EPC URN to the end of the list.
+        :param epc: The EPC URN.
+        '''
+        segments = self._segments
+        if not isinstance(epc, str) or '\n' in epc:
+            self._length += 1
+            if segments and len(segments[-1]) == 2:
+                segments[-1][_VALUES].append(epc)
+            else:
+                segments.append([None, [epc]])
+            return
+        prefix, serial = _split_epc(epc)
+        index = self._prefix_indexes.get(prefix)
+        if index is None:
+            index = self._prefix_indexes[prefix] = len(self._prefixes)
+            self._prefixes.append(prefix)
+        number = _number(serial)
+        self._length += 1
+        if segments and segments[-1][_PREFIX] == index:
+            segment = segments[-1]
+            if len(segment) == 3:
+                if number is not None and segment[_STOP] == number:
+                    segment[_STOP] += 1
+                    return
+            else:
+                if number is not None and segment[_LAST] == number - 1:
+                    # the last packed serial starts a run with this one
+                    del segment[_BUFFER][-len(str(number - 1)) - 1:]
+                    segment[_COUNT] -= 1
+                    if segment[_COUNT] == 0:
+                        segments.pop()
+                    else:
+                        segment[_LAST] = None
+                    segments.append([index, number - 1, number + 1])
+                    return
+                segment[_BUFFER] += serial.encode('utf-8') + b'\n'
+                segment[_COUNT] += 1
+                segment[_LAST] = number
+                return
+        segments.append(
+            [index, bytearray(serial.encode('utf-8') + b'\n'), 1, number])
+
+    def extend(self, epcs):
+        '''
+        Appends each EPC URN in an iterable to the end of the list.
+        :param epcs: An iterable of EPC URNs.
+        '''
+        append = self.append
+        for epc in epcs:
+            append(epc)
+
+    def groups(self):
+        '''
+        Yields a `(prefix, serials)` tuple for each segment of the list
+        where `serials` is a `range` for runs of consecutive numeric
+        serials and an iterator of serial strings otherwise.  Values that
+        can not be packed (see `append`) are yielded whole with an empty
+        prefix.  Useful for processing a whole group of EPCs at once.
+        '''
+        for segment in self._segments:
+            if len(segment) == 2:
+                yield '', iter(segment[_VALUES])
+                continue
+            prefix = self._prefixes[segment[_PREFIX]]
+            if len(segment) == 3:
+                yield prefix, range(segment[_START], segment[_STOP])
+            else:
+                yield prefix, _iter_packed(segment[_BUFFER])
+
+    def __iter__(self):
+        for segment in self._segments:
+            if len(segment) == 2:
+                yield from segment[_VALUES]
+                continue
+            prefix = self._prefixes[segment[_PREFIX]]
+            if len(segment) == 3:
+                for serial in range(segment[_START], segment[_STOP]):
+                    yield prefix + str(serial)
+            else:
+                for serial in _iter_packed(segment[_BUFFER]):
+                    yield prefix + serial
+
+    def __len__(self):
+        return self._length
+
+    def __contains__(self, epc):
+        if not isinstance(epc, str) or '\n' in epc:
+            return any(epc in segment[_VALUES] for segment in self._segments
+                       if len(segment) == 2)
+        prefix, serial = _split_epc(epc)
+        index = self._prefix_indexes.get(prefix)
+        if index is None:
+            return False
+        number = _number(serial)
+        needle = serial.encode('utf-8') + b'\n'
+        for segment in self._segments:
+            if segment[_PREFIX] != index:
+                continue
+            if len(segment) == 3:
+                if number is not None and \
+                        segment[_START] <= number < segment[_STOP]:
+                    return True
+            else:
+                buffer = segment[_BUFFER]
+                if buffer.startswith(needle) or b'\n' + needle in buffer:
+                    return True
+        return False
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('EPCList index out of range')
+        for segment in self._segments:
+            if len(segment) == 2:
+                count = len(segment[_VALUES])
+                if index < count:
+                    return segment[_VALUES][index]
+                index -= count
+                continue
+            if len(segment) == 3:
+                count = segment[_STOP] - segment[_START]
+            else:
+                count = segment[_COUNT]
+            if index < count:
+                prefix = self._prefixes[segment[_PREFIX]]
+                if len(segment) == 3:
+                    return prefix + str(segment[_START] + index)
+                return prefix + next(
+                    islice(_iter_packed(segment[_BUFFER]), index, None))
+            index -= count
+
+    def __eq__(self, other):
+        if isinstance(other, (EPCList, list, tuple)):
+            return len(self) == len(other) and \
+                all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __repr__(self):
+        return 'EPCList({0!r})'.format(list(self))
+
+    def __getstate__(self):
+        return self._prefixes, self._segments, self._length
+
+    def __setstate__(self, state):
+        self._prefixes, self._segments, self._length = state
+        self._prefix_indexes = {
+            prefix: index for index, prefix in enumerate(self._prefixes)}
@@ -0,0 +1,88 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2018 SerialLab Corp.  All rights reserved.
+'''
+Declarative descriptions of how the child elements of an EPCIS event are
+parsed.  The parsers declare a dictionary of element tag to field for each
+event type and compile it once into a dictionary of element tag to
+callable so that each child element is dispatched with a single lookup.
+'''
+from collections import namedtuple
+
+
+class TextField(namedtuple('TextField', ['attribute'])):
+    '''
+    Sets the stripped text of the element on an attribute of the event.
+    '''
+    __slots__ = ()
+
+    def compile(self, parser):
+        '''
+        :param parser: The parser the field is compiled for.
+        :return: A callable taking the event and the element.
+        '''
+        attribute = self.attribute
+
+        def set_text(epcis_event, element):
+            setattr(epcis_event, attribute, element.text.strip())
+
+        return set_text
+
+
+class DictionaryField(namedtuple('DictionaryField', ['attribute'])):
+    '''
+    Like a `TextField` but the text is encoded with the parser's value
+    dictionary (see `eparsecis.dictionary`), if it has one.
+    '''
+    __slots__ = ()
+
+    def compile(self, parser):
+        '''
+        :param parser: The parser the field is compiled for.
+        :return: A callable taking the event and the element.
+        '''
+        if parser.value_dictionary is None:
+            return TextField(self.attribute).compile(parser)
+        attribute = self.attribute
+        encode = parser.value_dictionary.encoder(attribute)
+
+        def set_value(epcis_event, element):
+            setattr(epcis_event, attribute, encode(element.text.strip()))
+
+        return set_value
+
+
+class ParserField(namedtuple('ParserField', ['method'])):
+    '''
+    Hands the event and the element to the named method of the parser.
+    '''
+    __slots__ = ()
+
+    def compile(self, parser):
+        '''
+        :param parser: The parser the field is compiled for.
+        :return: The bound parser method.
+        '''
+        return getattr(parser, self.method)
+
+
+def compile_fields(parser, fields):
+    '''
+    Compiles a dictionary of element tag to field into a dictionary of
+    element tag to callable.
+    :param parser: The parser whose methods the fields will call.
+    :param fields: The dictionary of element tags and fields.
+    :return: A dictionary of element tag to callable.
+    '''
+    return {tag: field.compile(parser) for tag, field in fields.items()}
@@ -0,0 +1,698 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2018 SerialLab Corp.  All rights reserved.
+'''
+Parses EPCIS 2.0 JSON / JSON-LD documents.  The events of the
+`epcisBody.eventList` are read one at a time, so documents of any size
+are parsed in the memory of their largest event, and are handed to the
+same `handle_*` methods as the events of XML documents.  The `ijson`
+event based parser is used when it is installed
+(`pip install eparsecis[json]`); otherwise the event list is scanned and
+each event is decoded with the standard `json` module.
+
+    class MyParser(JSONParser):
+        def handle_object_event(self, epcis_event):
+            ...
+
+    MyParser('events.jsonld', fast_records=True).parse()
+
+Short CBV 2.0 values (`shipping`, `in_transit`, `po`, `owning_party`) are
+expanded to the URNs of CBV 1.2 so that the events are the same as those
+of the equivalent XML document.
+
+The `JSONLDWriter` writes events (from any parser) to an EPCIS 2.0 JSON-LD
+document as they arrive, so a document is converted in a single streaming
+pass:
+
+    with JSONLDWriter('events.jsonld') as writer:
+        writer.write_events(EPCISParser('events.xml').iter_events())
+'''
+import codecs
+import datetime
+import io
+import json
+import logging
+import re
+
+from eparsecis.eparsecis import EPCISParser
+from eparsecis.sources import _PATH_TYPES, open_source
+from eparsecis.xmlwriter import HEADER, _value, get_events
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover
+    ijson = None
+
+logger = logging.getLogger()
+
+EVENT_LIST_PATH = 'epcisBody.eventList.item'
+
+_EVENT_LIST = re.compile(r'"eventList"\s*:\s*\[')
+_SEPARATORS = re.compile(r'[\s,]*')
+
+_BIZ_STEP = 'urn:epcglobal:cbv:bizstep:'
+_DISPOSITION = 'urn:epcglobal:cbv:disp:'
+_BIZ_TRANSACTION_TYPE = 'urn:epcglobal:cbv:btt:'
+_SOURCE_DESTINATION_TYPE = 'urn:epcglobal:cbv:sdt:'
+
+DEFAULT_CONTEXT = [
+    'https://ref.gs1.org/standards/epcis/2.0.0/epcis-context.jsonld']
+
+
+def expand_cbv(prefix, value):
+    '''
+    Expands a short CBV 2.0 value to its URN.
+    :param prefix: The URN prefix of the vocabulary.
+    :param value: The value.
+    :return: The URN, or the value if it is None or already a URI.
+    '''
+    if value is None or ':' in value:
+        return value
+    return prefix + value
+
+
+def compact_cbv(prefix, value):
+    '''
+    Compacts a CBV URN to its short CBV 2.0 value.
+    :param prefix: The URN prefix of the vocabulary.
+    :param value: The value.
+    :return: The short value, or the value if it is not in the vocabulary.
+    '''
+    if value is not None and value.startswith(prefix):
+        return value[len(prefix):]
+    return value
+
+
+def iter_event_list(stream, chunk_size=65536):
+    '''
+    Yields the decoded items of the first `eventList` array of a JSON
+    document without decoding the rest of the document.
+    :param stream: A binary file object.
+    :param chunk_size: The number of bytes read at a time.
+    :return: An iterator of dictionaries.
+    '''
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    buffer = ''
+    while True:
+        match = _EVENT_LIST.search(buffer)
+        if match is not None:
+            break
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return
+        # keep enough of the buffer for a key split across the chunks
+        buffer = buffer[-64:] + text_decoder.decode(chunk)
+    buffer = buffer[match.end():]
+    position = 0
+    read_size = chunk_size
+    while True:
+        position = _SEPARATORS.match(buffer, position).end()
+        if position < len(buffer):
+            if buffer[position] == ']':
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except ValueError:
+                pass
+            else:
+                yield item
+                position = end
+                read_size = chunk_size
+                continue
+        # the next item is incomplete; read more, doubling the reads so
+        # that a very large item is not decoded over and over again
+        chunk = stream.read(read_size)
+        if not chunk:
+            raise ValueError('The eventList of the document is incomplete.')
+        buffer = buffer[position:] + text_decoder.decode(chunk)
+        position = 0
+        read_size = max(read_size, len(buffer))
+
+
+def _skip_json_events(items, checkpointer):
+    '''
+    Counts the decoded events of a document and drops those of the
+    checkpoint being resumed.
+    '''
+    skip = checkpointer.ordinal
+    for data in items:
+        if skip:
+            skip -= 1
+        else:
+            checkpointer.ordinal += 1
+            yield data
+
+
+def _ilmd_text(value):
+    '''
+    :param value: The value of an ILMD attribute.
+    :return: The text the XML parsers would find for the value: strings
+    are kept and other values are encoded as JSON, e.g. 'true' or
+    '{"a": 1}'.
+    '''
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value, sort_keys=True)
+
+
+class JSONParser(EPCISParser):
+    '''
+    Parses EPCIS 2.0 JSON / JSON-LD documents into the same events as the
+    `EPCISParser` (EPCPyYes objects or, with `fast_records`, records) and
+    hands them to the same `handle_*` methods.  Takes the same arguments
+    as the `EPCISParser`; `epc_chunk_size` and `header_namespace` do not
+    apply to JSON documents.  The stream can be a path or a binary file
+    object and may be compressed.
+    :param use_ijson: If False, the event list is scanned with
+    `iter_event_list` even if ijson is installed.  The scanner only reads
+    the first `eventList` of the document, wherever it is, but decodes
+    the events with the C accelerated `json` module and is usually faster.
+    '''
+
+    # the keys of each event that are set as they are
+    json_text_fields = {
+        'eventID': 'event_id',
+        'eventTime': 'event_time',
+        'eventTimeZoneOffset': 'event_timezone_offset',
+        'recordTime': 'record_time',
+        'parentID': 'parent_id',
+        'transformationID': 'transformation_id',
+    }
+    json_epc_lists = {
+        'epcList': 'epc_list',
+        'childEPCs': 'child_epcs',
+        'inputEPCList': 'input_epc_list',
+        'outputEPCList': 'output_epc_list',
+    }
+    json_quantity_lists = {
+        'quantityList': 'quantity_list',
+        'childQuantityList': 'child_quantity_list',
+        'inputQuantityList': 'input_quantity_list',
+        'outputQuantityList': 'output_quantity_list',
+    }
+
+    def __init__(self, *args, use_ijson=True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._use_ijson = use_ijson and ijson is not None
+        self._json_event_parsers = {
+            'ObjectEvent': (self.get_epcpyyes_object_event,
+                            self.handle_object_event),
+            'AggregationEvent': (self.get_epcpyyes_aggregation_event,
+                                 self.handle_aggregation_event),
+            'TransactionEvent': (self.get_epcpyyes_transaction_event,
+                                 self.handle_transaction_event),
+            'TransformationEvent': (self.get_epcpyyes_transformation_event,
+                                    self.handle_transformation_event),
+        }
+
+    def iter_events(self, huge_tree=False, handle_unexpected=None,
+                    chunk_size=65536, resume=False):
+        '''
+        Parses the stream lazily and yields a `(kind, event)` tuple for
+        each event of the event list after it was handed to its `handle_*`
+        method.  Events of other types (e.g. the AssociationEvents of EPCIS
+        2.0) are handed to `parse_unexpected_json_event`.
+        :param huge_tree: Not used for JSON documents.
+        :param handle_unexpected: Not used for JSON documents.
+        :param chunk_size: The number of bytes read at a time.
+        :param resume: See `EPCISParser.iter_events`.  The skipped events
+        of a JSON document are decoded but not parsed.
+        :return: A generator of `(kind, event)` tuples.
+        '''
+        checkpointer = self.get_checkpointer(resume)
+        with self.open_stream() as (stream, skip):
+            with open_source(stream, self._buffer_size,
+                             self._use_mmap) as source:
+                if isinstance(source, _PATH_TYPES):
+                    with open(source, 'rb') as opened:
+                        for parsed in self._iter_json_events(
+                                opened, chunk_size, opened, checkpointer):
+                            yield parsed
+                else:
+                    for parsed in self._iter_json_events(
+                            source, chunk_size, stream, checkpointer):
+                        yield parsed
+
+    def _iter_json_events(self, source, chunk_size, stream,
+                          checkpointer=None):
+        if self._use_ijson:
+            items = ijson.items(source, EVENT_LIST_PATH, use_float=True,
+                                buf_size=chunk_size)
+        else:
+            items = iter_event_list(source, chunk_size)
+        if self._stats is None and checkpointer is None:
+            for data in items:
+                parsed = self.parse_json_event(data)
+                if parsed is not None:
+                    yield parsed
+            return
+        if checkpointer is not None:
+            checkpointer.stream = stream
+            items = _skip_json_events(items, checkpointer)
+        if self._stats is None:
+            parsed_events = (
+                parsed for parsed in map(self.parse_json_event, items)
+                if parsed is not None)
+        else:
+            parsed_events = self._stats.track(items, self.parse_json_event,
+                                              stream)
+        if checkpointer is not None:
+            parsed_events = self.iter_checkpointed(parsed_events,
+                                                   checkpointer)
+        # closes the checkpointer while the stream is open
+        yield from parsed_events
+
+    def parse_json_event(self, data):
+        '''
+        Creates the event for a decoded JSON event, hands it to the
+        `handle_*` method for its type and returns it.
+        :param data: The dictionary of the event.
+        :return: A `(kind, event)` tuple or None for an event of an
+        unknown type.
+        '''
+        kind = data.get('type')
+        try:
+            create, handle = self._json_event_parsers[kind]
+        except KeyError:
+            self.parse_unexpected_json_event(kind, data)
+            return None
+        epcis_event = create()
+        for key, value in data.items():
+            self.parse_json_field(epcis_event, key, value)
+        self.enrich_event(epcis_event)
+        handle(epcis_event)
+        return kind, epcis_event
+
+    def parse_json_field(self, epcis_event, key, value):
+        '''
+        Sets a field of a JSON event on the event.
+        :param epcis_event: The event.
+        :param key: The key of the field.
+        :param value: The decoded value.
+        :return: None
+        '''
+        if value is None:
+            return
+        attribute = self.json_text_fields.get(key)
+        if attribute is not None:
+            setattr(epcis_event, attribute, value)
+            return
+        attribute = self.json_epc_lists.get(key)
+        if attribute is not None:
+            self.get_epc_list(epcis_event, attribute).extend(value)
+            return
+        attribute = self.json_quantity_lists.get(key)
+        if attribute is not None:
+            getattr(epcis_event, attribute).extend(
+                self.get_json_quantity_element(element)
+                for element in value)
+            return
+        if key == 'action':
+            epcis_event.action = self.encode_value('action', value)
+        elif key == 'bizStep':
+            epcis_event.biz_step = self.encode_value(
+                'biz_step', expand_cbv(_BIZ_STEP, value))
+        elif key == 'disposition':
+            epcis_event.disposition = self.encode_value(
+                'disposition', expand_cbv(_DISPOSITION, value))
+        elif key == 'readPoint':
+            epcis_event.read_point = self.encode_value(
+                'read_point', value.get('id'))
+        elif key == 'bizLocation':
+            epcis_event.biz_location = self.encode_value(
+                'biz_location', value.get('id'))
+        elif key == 'bizTransactionList':
+            for transaction in value:
+                business_transaction = self._factory.business_transaction(
+                    transaction.get('bizTransaction'))
+                business_transaction.type = self.encode_value(
+                    'business_transaction_type',
+                    expand_cbv(_BIZ_TRANSACTION_TYPE,
+                               transaction.get('type')))
+                epcis_event.business_transaction_list.append(
+                    business_transaction)
+        elif key == 'sourceList':
+            for source in value:
+                epcis_event.source_list.append(self._factory.source(
+                    self.encode_value('source_type', expand_cbv(
+                        _SOURCE_DESTINATION_TYPE, source.get('type'))),
+                    source.get('source')))
+        elif key == 'destinationList':
+            for destination in value:
+                epcis_event.destination_list.append(
+                    self._factory.destination(
+                        self.encode_value('destination_type', expand_cbv(
+                            _SOURCE_DESTINATION_TYPE,
+                            destination.get('type'))),
+                        destination.get('destination')))
+        elif key == 'ilmd':
+            for name, ilmd_value in value.items():
+                if name != '@context':
+                    # drop the namespace prefix as the XML parsers do
+                    epcis_event.ilmd.append(self._factory.ilmd(
+                        self.encode_value('ilmd_name',
+                                          name.rpartition(':')[2]),
+                        _ilmd_text(ilmd_value)))
+        elif key == 'errorDeclaration':
+            error_declaration = self._factory.error_declaration()
+            error_declaration.declaration_time = value.get(
+                'declarationTime')
+            error_declaration.reason = value.get('reason')
+            error_declaration.corrective_event_ids.extend(
+                value.get('correctiveEventIDs') or ())
+            epcis_event.error_declaration = error_declaration
+        elif key not in ('type', '@context'):
+            self.parse_unexpected_json_field(epcis_event, key, value)
+
+    def get_json_quantity_element(self, element):
+        '''
+        :param element: The dictionary of a quantity element.
+        :return: The quantity element of the parser's factory.
+        '''
+        quantity_element = self._factory.quantity_element(
+            element.get('epcClass'))
+        quantity = element.get('quantity')
+        if quantity is not None:
+            quantity_element.quantity = float(quantity)
+        quantity_element.uom = element.get('uom')
+        return quantity_element
+
+    def parse_unexpected_json_event(self, kind, data):
+        '''
+        Override to handle events of other types than the four EPCIS 1.2
+        event types.
+        :param kind: The type of the event.
+        :param data: The dictionary of the event.
+        :return: None
+        '''
+        logger.debug('Skipping an event of type %s.', kind)
+
+    def parse_unexpected_json_field(self, epcis_event, key, value):
+        '''
+        Override to handle extensions and other fields of events that are
+        not parsed.
+        :param epcis_event: The event.
+        :param key: The key of the field.
+        :param value: The decoded value.
+        :return: None
+        '''
+        logger.debug('Skipping the field %s.', key)
+
+
+def _time(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return value
+
+
+def event_to_json(kind, epcis_event, compact=True):
+    '''
+    Converts an event record or EPCPyYes event to the dictionary of its
+    EPCIS 2.0 JSON representation, the reverse of
+    `JSONParser.parse_json_event`.
+    :param kind: The type of the event, e.g. 'ObjectEvent'.
+    :param epcis_event: The event.
+    :param compact: If True, CBV URNs are compacted to their short CBV 2.0
+    values.
+    :return: A dictionary.
+    '''
+    cbv = compact_cbv if compact else expand_cbv
+    data = {'type': kind}
+    for key, attribute in (('eventTime', 'event_time'),
+                           ('eventTimeZoneOffset', 'event_timezone_offset'),
+                           ('recordTime', 'record_time'),
+                           ('eventID', 'event_id')):
+        value = getattr(epcis_event, attribute, None)
+        if value is not None:
+            data[key] = _time(value)
+    error_declaration = getattr(epcis_event, 'error_declaration', None)
+    if error_declaration is not None:
+        data['errorDeclaration'] = {
+            key: value for key, value in (
+                ('declarationTime', _time(
+                    error_declaration.declaration_time)),
+                ('reason', error_declaration.reason),
+                ('correctiveEventIDs',
+                 list(error_declaration.corrective_event_ids or ())))
+            if value}
+    parent_id = getattr(epcis_event, 'parent_id', None)
+    if parent_id is not None:
+        data['parentID'] = parent_id
+    for key, attribute in JSONParser.json_epc_lists.items():
+        epcs = getattr(epcis_event, attribute, None)
+        if epcs:
+            data[key] = list(epcs)
+    for key, attribute, prefix in (('action', 'action', ''),
+                                   ('bizStep', 'biz_step', _BIZ_STEP),
+                                   ('disposition', 'disposition',
+                                    _DISPOSITION)):
+        value = getattr(epcis_event, attribute, None)
+        if value is not None:
+            data[key] = cbv(prefix, value) if prefix else value
+    for key, attribute in (('readPoint', 'read_point'),
+                           ('bizLocation', 'biz_location')):
+        value = getattr(epcis_event, attribute, None)
+        if value is not None:
+            data[key] = {'id': value}
+    if epcis_event.business_transaction_list:
+        data['bizTransactionList'] = [
+            _without_none(
+                type=cbv(_BIZ_TRANSACTION_TYPE, transaction.type),
+                bizTransaction=transaction.biz_transaction)
+            for transaction in epcis_event.business_transaction_list]
+    if epcis_event.source_list:
+        data['sourceList'] = [
+            _without_none(type=cbv(_SOURCE_DESTINATION_TYPE, source.type),
+                          source=source.source)
+            for source in epcis_event.source_list]
+    if epcis_event.destination_list:
+        data['destinationList'] = [
+            _without_none(type=cbv(_SOURCE_DESTINATION_TYPE,
+                                   destination.type),
+                          destination=destination.destination)
+            for destination in epcis_event.destination_list]
+    for key, attribute in JSONParser.json_quantity_lists.items():
+        quantity_list = getattr(epcis_event, attribute, None)
+        if quantity_list:
+            data[key] = [
+                _without_none(epcClass=element.epc_class,
+                              quantity=element.quantity, uom=element.uom)
+                for element in quantity_list]
+    ilmd = getattr(epcis_event, 'ilmd', None)
+    if ilmd:
+        # the parsers drop the namespace prefix of the ILMD elements, which
+        # are usually CBV master data attributes
+        data['ilmd'] = {
+            (element.name if ':' in element.name
+             else 'cbvmda:' + element.name): element.value
+            for element in ilmd}
+    transformation_id = getattr(epcis_event, 'transformation_id', None)
+    if transformation_id is not None:
+        data['transformationID'] = transformation_id
+    return data
+
+
+def header_to_json(header):
+    '''
+    Converts a standard business document header record or EPCPyYes
+    header to a dictionary that mirrors its XML elements.  The writer puts
+    it in the `epcisHeader` of the document.
+    :param header: The header.
+    :return: A dictionary.
+    '''
+    data = _without_none(headerVersion=header.header_version)
+    for partner in header.partners or ():
+        partner_type = _value(partner.partner_type)
+        partner_data = _without_none(
+            contact=partner.contact, emailAddress=partner.email_address,
+            faxNumber=partner.fax_number,
+            telephoneNumber=partner.telephone_number,
+            contactTypeIdentifier=partner.contact_type_identifier)
+        if partner.partner_id:
+            partner_data['identifier'] = _without_none(
+                authority=partner.partner_id.authority,
+                value=partner.partner_id.value)
+        data.setdefault(partner_type[:1].lower() + partner_type[1:],
+                        []).append(partner_data)
+    identification = header.document_identification
+    if identification:
+        creation_date = identification.creation_date_and_time
+        data['documentIdentification'] = _without_none(
+            standard=identification.standard,
+            typeVersion=identification.type_version,
+            instanceIdentifier=identification.instance_identifier,
+            type=identification.document_type,
+            multipleType=identification.multiple_type,
+            creationDateAndTime=None if creation_date is None
+            else _time(creation_date))
+    return data
+
+
+def _without_none(**values):
+    return {key: value for key, value in values.items() if value is not None}
+
+
+class JSONLDWriter(object):
+    '''
+    Writes events to an EPCIS 2.0 JSON-LD document as they arrive.  Only
+    the event being written is held in memory.  Call `close` (or use the
+    writer as a context manager) to finish the document.  When the
+    context is left with an exception the document is left unfinished, so
+    that it can not be mistaken for a complete one.
+    :param stream: A path or a binary or text file object.  Paths are
+    opened (and closed) by the writer.
+    :param context: The `@context` of the document.
+    :param creation_date: The creation date of the document, now by
+    default.
+    :param header: A dictionary written as the `epcisHeader` (None for
+    no header).  A standard business document header written with
+    `write_header` is added to it.
+    :param compact: If True, CBV URNs are compacted to their short CBV 2.0
+    values.
+    :param indent: The indentation of the events (None for one event per
+    line).
+    '''
+
+    def __init__(self, stream, context=None, creation_date=None, header=None,
+                 compact=True, indent=None):
+        self._close_stream = False
+        self._detach_stream = False
+        if isinstance(stream, _PATH_TYPES):
+            self._stream = open(stream, 'w', encoding='utf-8')
+            self._close_stream = True
+        elif isinstance(stream, io.TextIOBase):
+            self._stream = stream
+        else:
+            self._stream = io.TextIOWrapper(stream, encoding='utf-8')
+            self._detach_stream = True
+        self._context = DEFAULT_CONTEXT if context is None else context
+        self._creation_date = creation_date
+        self._header = header
+        self._compact = compact
+        self._indent = indent
+        self._started = False
+        self._closed = False
+        self.events = 0
+
+    def _start(self):
+        creation_date = self._creation_date or \
+            datetime.datetime.now(datetime.timezone.utc).isoformat()
+        document = [
+            ('@context', self._context),
+            ('type', 'EPCISDocument'),
+            ('schemaVersion', '2.0'),
+            ('creationDate', _time(creation_date)),
+        ]
+        if self._header is not None:
+            document.append(('epcisHeader', self._header))
+        self._stream.write('{\n')
+        for key, value in document:
+            self._stream.write('  {0}: {1},\n'.format(
+                json.dumps(key), json.dumps(value)))
+        self._stream.write('  "epcisBody": {\n    "eventList": [')
+        self._started = True
+
+    def write_header(self, header):
+        '''
+        Adds a standard business document header to the `epcisHeader` of
+        the document (see `header_to_json`).
+        :param header: The header record or EPCPyYes header.
+        :return: None
+        :raise ValueError: If an event was already written.
+        '''
+        if self._started:
+            raise ValueError('The header must be written before the events.')
+        self._header = dict(self._header or {})
+        self._header[HEADER] = header_to_json(header)
+
+    def write(self, kind, epcis_event):
+        '''
+        Writes an event or the header.  Other parsed elements that are not
+        events are ignored.
+        :param kind: The type of the event, e.g. 'ObjectEvent' or
+        'StandardBusinessDocumentHeader'.
+        :param epcis_event: The event (or header) record or EPCPyYes
+        object.
+        :return: None
+        '''
+        if kind == HEADER:
+            self.write_header(epcis_event)
+            return
+        if not kind.endswith('Event'):
+            return
+        if not self._started:
+            self._start()
+        text = json.dumps(event_to_json(kind, epcis_event, self._compact),
+                          indent=self._indent)
+        if self._indent is not None:
+            text = text.replace('\n', '\n      ')
+        self._stream.write('{0}\n      {1}'.format(
+            ',' if self.events else '', text))
+        self.events += 1
+
+    def write_events(self, events):
+        '''
+        Writes the events (and header) of an iterator of `(kind, event)`
+        tuples, e.g. a parser's `iter_events()`, or of a parser.
+        :param events: The iterator or parser.
+        :return: The number of events written.
+        :raises ValueError: If the parser has an `epc_chunk_size`; the EPC
+        lists of its events are empty.
+        '''
+        events = get_events(events)
+        written = self.events
+        for kind, epcis_event in events:
+            self.write(kind, epcis_event)
+        return self.events - written
+
+    def close(self):
+        '''
+        Finishes the document and closes the stream if the writer opened
+        it.
+        :return: None
+        '''
+        if self._closed:
+            return
+        if not self._started:
+            self._start()
+        self._stream.write('\n    ]\n  }\n}\n')
+        self._release()
+
+    def abort(self):
+        '''
+        Stops writing without finishing the document and closes the stream
+        if the writer opened it.
+        :return: None
+        '''
+        if not self._closed:
+            self._release()
+
+    def _release(self):
+        self._stream.flush()
+        if self._close_stream:
+            self._stream.close()
+        elif self._detach_stream:
+            # leave the caller's binary stream open
+            self._stream.detach()
+        self._closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -0,0 +1,295 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2018 SerialLab Corp.  All rights reserved.
+'''
+Parses many EPCIS documents at once by spreading them across a pool of
+worker processes.
+
+The parser class, its keyword arguments and the handler are sent to the
+worker processes, so they must be picklable (module level classes and
+functions are).  The values sent back must be picklable as well.  The
+EPCPyYes template objects are not, so either create the parsers with
+`fast_records=True` or use a handler that returns something else (or
+nothing at all).
+'''
+import logging
+import os
+import traceback
+from collections import deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from io import BytesIO
+
+from eparsecis import scanner, sources
+from eparsecis.eparsecis import EPCISParser
+
+logger = logging.getLogger()
+
+DEFAULT_SHARD_SIZE = 32 * 1024 * 1024
+
+
+class ParseResult(namedtuple('ParseResult', ['path', 'events', 'error'])):
+    '''
+    The result of parsing one document.  `events` is a list of the values
+    collected from the document (see `parse_file`) and `error` is a
+    `FileParseError` if the document could not be parsed, otherwise None.
+    '''
+    __slots__ = ()
+
+
+class FileParseError(Exception):
+    '''
+    Raised (or returned in a `ParseResult`) when a document could not be
+    parsed.  The original exception may not be picklable, so its
+    formatted traceback is kept instead.
+    :param path: The document that could not be parsed.
+    :param message: The message of the original exception.
+    :param details: The formatted traceback of the original exception.
+    '''
+
+    def __init__(self, path, message, details=None):
+        super().__init__(path, message, details)
+        self.path = path
+        self.message = message
+        self.details = details
+
+    def __str__(self):
+        return '{0}: {1}'.format(self.path, self.message)
+
+
+def parse_file(path, parser_class=EPCISParser, parser_kwargs=None,
+               handler=None):
+    '''
+    Parses a single document.  This is what each worker process runs.
+    :param path: The path of the document.
+    :param parser_class: The `EPCISParser` (sub)class to parse with.
+    :param parser_kwargs: Keyword arguments for the parser.
+    :param handler: Called with the `kind` and event of each
+    `(kind, event)` tuple `iter_events` yields.  Any value it returns
+    other than None is collected.  Without a handler the `(kind, event)`
+    tuples themselves are collected.
+    :return: A `ParseResult`.
+    '''
+    return _parse(path, path, parser_class, parser_kwargs, handler)
+
+
+def parse_shard(shard, parser_class=EPCISParser, parser_kwargs=None,
+                handler=None):
+    '''
+    Parses the events of a `scanner.Shard` of a document.  This is what
+    each worker process runs for `parse_document`.
+    :param shard: The shard.
+    :return: A `ParseResult`.  See `parse_file` for the other parameters.
+    '''
+    try:
+        with sources.map_file(shard.path) as buffer:
+            return _parse(shard.path, shard.open(buffer), parser_class,
+                          parser_kwargs, handler)
+    except Exception as e:
+        return _error_result(shard.path, e)
+
+
+def _parse(path, stream, parser_class, parser_kwargs, handler):
+    try:
+        parser = parser_class(stream, **(parser_kwargs or {}))
+        events = []
+        for kind, epcis_event in parser.iter_events():
+            if handler is None:
+                events.append((kind, epcis_event))
+            else:
+                value = handler(kind, epcis_event)
+                if value is not None:
+                    events.append(value)
+        return ParseResult(path, events, None)
+    except Exception as e:
+        return _error_result(path, e)
+
+
+def _error_result(path, e):
+    logger.exception('Could not parse %s.', path)
+    return ParseResult(path, [], FileParseError(
+        path, '{0}: {1}'.format(type(e).__name__, e),
+        traceback.format_exc()))
+
+
+def parse_files(paths, parser_class=EPCISParser, parser_kwargs=None,
+                handler=None, max_workers=None, ordered=True):
+    '''
+    Parses each document in a pool of worker processes and yields a
+    `ParseResult` for each one.  A document that cannot be parsed does
+    not stop the others; its result has an `error` instead.
+    :param paths: The paths of the documents.
+    :param parser_class: The `EPCISParser` (sub)class to parse with.
+    :param parser_kwargs: Keyword arguments for the parser, e.g.
+    `{'fast_records': True}`.
+    :param handler: See `parse_file`.
+    :param max_workers: The number of worker processes.  Defaults to the
+    number of processors.
+    :param ordered: If True the results are yielded in the order of
+    `paths`, otherwise as soon as each document has been parsed.
+    :return: A generator of `ParseResult` instances.
+    '''
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for future, path in _Submitter(
+                lambda path: executor.submit(
+                    parse_file, path, parser_class, parser_kwargs, handler),
+                paths, max_workers, ordered):
+            yield _get_result(future, path)
+
+
+class _Submitter(object):
+    '''
+    Submits a call for each item, keeping at most two calls per worker
+    pending, so that the results waiting to be read stay bounded however
+    many items there are.  The first calls are submitted right away.
+    Iterating yields a `(future, item)` tuple for each item; the calls
+    that are still pending are cancelled when the iteration is closed.
+    :param submit: Called with an item and returns its future.
+    :param items: An iterable of items.
+    :param max_workers: The number of workers of the executor.
+    :param ordered: If True the futures are yielded in the order of the
+    items, otherwise as they complete.
+    '''
+
+    def __init__(self, submit, items, max_workers=None, ordered=True):
+        self._submit = submit
+        self._items = iter(items)
+        self._ordered = ordered
+        # (future, item) tuples in the order of the items
+        self._pending = deque()
+        for i in range(2 * (max_workers or os.cpu_count() or 1)):
+            if not self._submit_next():
+                break
+
+    def _submit_next(self):
+        for item in self._items:
+            self._pending.append((self._submit(item), item))
+            return True
+        return False
+
+    def __iter__(self):
+        pending = self._pending
+        try:
+            while pending:
+                if self._ordered:
+                    done = pending.popleft()
+                else:
+                    wait([future for future, item in pending],
+                         return_when=FIRST_COMPLETED)
+                    done = next(submitted for submitted in pending
+                                if submitted[0].done())
+                    pending.remove(done)
+                self._submit_next()
+                yield done
+        finally:
+            self.cancel()
+
+    def cancel(self):
+        '''
+        Cancels the calls that are still pending.
+        :return: None
+        '''
+        for future, item in self._pending:
+            future.cancel()
+
+
+def iter_events(paths, parser_class=EPCISParser, parser_kwargs=None,
+                handler=None, max_workers=None, ordered=True,
+                raise_errors=False):
+    '''
+    Like `parse_files` but yields a `(path, value)` tuple for each value
+    collected from the documents, one document after the other.
+    Documents that cannot be parsed are logged and skipped unless
+    `raise_errors` is True, in which case a `FileParseError` is raised.
+    :return: A generator of `(path, value)` tuples.
+    '''
+    for result in parse_files(paths, parser_class=parser_class,
+                              parser_kwargs=parser_kwargs, handler=handler,
+                              max_workers=max_workers, ordered=ordered):
+        if result.error is not None:
+            if raise_errors:
+                raise result.error
+            logger.error('Skipping %s: %s', result.path,
+                         result.error.message)
+            continue
+        for value in result.events:
+            yield result.path, value
+
+
+def parse_document(path, parser_class=EPCISParser, parser_kwargs=None,
+                   handler=None, max_workers=None,
+                   shard_size=DEFAULT_SHARD_SIZE):
+    '''
+    Parses a single huge document in a pool of worker processes.  The
+    document is scanned for event boundaries (see `scanner`) and split
+    into shards of about `shard_size` bytes which are parsed by the
+    workers.  The header is parsed once, in this process, and yielded
+    first; the values of the events follow in document order.  Documents
+    that can not be split are parsed in this process.
+
+    The `handle_*` methods of the parser are called in the worker that
+    parsed the event, except for `handle_sbdh`.
+    :param path: The path of the document.
+    :param shard_size: The number of bytes of events in each shard.
+    :return: A generator of the values `parse_file` would collect.  See
+    `parse_files` for the other parameters.
+    :raises FileParseError: If any part of the document can not be parsed.
+    '''
+    try:
+        scanned = scanner.scan_file(path, shard_size)
+    except OSError:
+        # parse_file reports the error
+        scanned = None
+    if scanned is None:
+        results = [parse_file(path, parser_class, parser_kwargs, handler)]
+    else:
+        header_document, shards = scanned
+        results = _parse_shards(path, header_document, shards, parser_class,
+                                parser_kwargs, handler, max_workers)
+    for result in results:
+        if result.error is not None:
+            raise result.error
+        for value in result.events:
+            yield value
+
+
+def _parse_shards(path, header_document, shards, parser_class,
+                  parser_kwargs, handler, max_workers):
+    '''
+    Yields the result of the header document and then of each shard.
+    '''
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        # the first shards are parsed while the header is
+        submitter = _Submitter(
+            lambda shard: executor.submit(
+                parse_shard, shard, parser_class, parser_kwargs, handler),
+            shards, max_workers)
+        try:
+            yield _parse(path, BytesIO(header_document), parser_class,
+                         parser_kwargs, handler)
+            for future, shard in submitter:
+                yield _get_result(future, path)
+        finally:
+            submitter.cancel()
+
+
+def _get_result(future, path):
+    '''
+    Returns the result of a future, turning errors that happened outside
+    of `parse_file` (a result that could not be pickled or a worker that
+    died, for example) into an error result.
+    '''
+    try:
+        return future.result()
+    except Exception as e:
+        return _error_result(path, e)
@@ -0,0 +1,387 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2018 SerialLab Corp.  All rights reserved.
+'''
+Lightweight `__slots__` records that hold the values of parsed EPCIS
+events.  The EPCPyYes template classes create a Jinja2 environment for
+every instance, which dominates the cost of parsing documents with many
+events.  The records have the same attribute names as their EPCPyYes
+counterparts so the parsers can populate either, and each record can be
+converted into the EPCPyYes object on demand with `to_epcpyyes`.
+
+Records only contain the values found in the document; the defaults
+EPCPyYes supplies for missing values (the record time, for example) are
+applied when a record is converted.
+'''
+from EPCPyYes.core.v1_2 import template_events
+from EPCPyYes.core.v1_2.events import BusinessTransaction, Source, \
+    Destination, QuantityElement, ErrorDeclaration
+from EPCPyYes.core.v1_2.CBV.instance_lot_master_data import \
+    InstanceLotMasterDataAttribute
+from EPCPyYes.core.SBDH import sbdh, template_sbdh
+
+
+def _convert(value):
+    '''
+    Converts a record, or a list of records, to EPCPyYes objects.
+    '''
+    if isinstance(value, ConvertibleRecord):
+        return value.to_epcpyyes()
+    elif isinstance(value, list):
+        return [_convert(item) for item in value]
+    return value
+
+
+class Record(object):
+    '''
+    Base class of the records.  Records compare equal when they are of the
+    same type and all of their slots are equal.
+    '''
+    __slots__ = ()
+
+    def _slot_names(self):
+        for cls in type(self).__mro__:
+            for name in getattr(cls, '__slots__', ()):
+                yield name
+
+    def _values(self):
+        return {name: getattr(self, name) for name in self._slot_names()}
+
+    def __eq__(self, other):
+        return type(self) is type(other) and \
+            self._values() == other._values()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return '{0}({1})'.format(
+            type(self).__name__,
+            ', '.join('{0}={1!r}'.format(name, value)
+                      for name, value in self._values().items()))
+
+    def __getstate__(self):
+        return self._values()
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+
+class ConvertibleRecord(Record):
+    '''
+    Base class of the records that have an EPCPyYes counterpart.
+    '''
+    __slots__ = ()
+
+    # the EPCPyYes class (or factory) the record converts to
+    epcpyyes_class = None
+    # slots the EPCPyYes class does not take as arguments; they are set
+    # on the converted object as attributes instead
+    _extra_slots = ()
+
+    def to_epcpyyes(self):
+        '''
+        Converts the record into its EPCPyYes counterpart.  Values that are
+        None are left out so that EPCPyYes can apply its defaults.
+        '''
+        kwargs = {name: _convert(value)
+                  for name, value in self._values().items()
+                  if value is not None and name not in self._extra_slots}
+        converted = self.epcpyyes_class(**kwargs)
+        for name in self._extra_slots:
+            value = getattr(self, name)
+            if value is not None:
+                setattr(converted, name, value)
+        return converted
+
+    def render(self):
+        '''
+        Renders the EPCPyYes counterpart of the record.
+        '''
+        return self.to_epcpyyes().render()
+
+
+class BusinessTransactionRecord(ConvertibleRecord):
+    __slots__ = ('biz_transaction', 'type')
+    epcpyyes_class = BusinessTransaction
+
+    def __init__(self, biz_transaction, type=None):
+        self.biz_transaction = biz_transaction
+        self.type = type
+
+
+class SourceRecord(ConvertibleRecord):
+    __slots__ = ('type', 'source')
+
+    def __init__(self, source_type, source):
+        self.type = source_type
+        self.source = source
+
+    def to_epcpyyes(self):
+        return Source(self.type, self.source)
+
+
+class DestinationRecord(ConvertibleRecord):
+    __slots__ = ('type', 'destination')
+
+    def __init__(self, destination_type, destination):
+        self.type = destination_type
+        self.destination = destination
+
+    def to_epcpyyes(self):
+        return Destination(self.type, self.destination)
+
+
+class QuantityElementRecord(ConvertibleRecord):
+    __slots__ = ('epc_class', 'quantity', 'uom')
+    epcpyyes_class = QuantityElement
+
+    def __init__(self, epc_class, quantity=None, uom=None):
+        self.epc_class = epc_class
+        self.quantity = quantity
+        self.uom = uom
+
+
+class ILMDRecord(ConvertibleRecord):
+    __slots__ = ('name', 'value')
+    epcpyyes_class = InstanceLotMasterDataAttribute
+
+    def __init__(self, name, value):
+        self.name = name
+        self.value = value
+
+
+class ErrorDeclarationRecord(ConvertibleRecord):
+    __slots__ = ('declaration_time', 'reason', 'corrective_event_ids')
+    epcpyyes_class = ErrorDeclaration
+
+    def __init__(self, declaration_time=None, reason=None,
+                 corrective_event_ids=None):
+        self.declaration_time = declaration_time
+        self.reason = reason
+        self.corrective_event_ids = [] if corrective_event_ids is None \
+            else corrective_event_ids
+
+
+class EventRecord(ConvertibleRecord):
+    '''
+    The values shared by all four EPCIS event types.
+    '''
+    __slots__ = ('event_time', 'event_timezone_offset', 'record_time',
+                 'event_id', 'error_declaration', 'biz_step', 'disposition',
+                 'read_point', 'biz_location', 'business_transaction_list',
+                 'source_list', 'destination_list', 'master_data',
+                 'value_codes')
+    _extra_slots = ('master_data', 'value_codes')
+
+    def __init__(self):
+        self.event_time = None
+        self.event_timezone_offset = None
+        self.record_time = None
+        self.event_id = None
+        self.error_declaration = None
+        self.biz_step = None
+        self.disposition = None
+        self.read_point = None
+        self.biz_location = None
+        self.business_transaction_list = []
+        self.source_list = []
+        self.destination_list = []
+        # set by an enrichment.Enricher
+        self.master_data = None
+        # set by a parser with a dictionary.ValueDictionary with codes
+        self.value_codes = None
+
+
+class ObjectEventRecord(EventRecord):
+    __slots__ = ('action', 'epc_list', 'quantity_list', 'ilmd')
+    epcpyyes_class = template_events.ObjectEvent
+
+    def __init__(self):
+        super().__init__()
+        self.action = None
+        self.epc_list = []
+        self.quantity_list = []
+        self.ilmd = []
+
+
+class AggregationEventRecord(EventRecord):
+    __slots__ = ('action', 'parent_id', 'child_epcs', 'child_quantity_list')
+    epcpyyes_class = template_events.AggregationEvent
+
+    def __init__(self):
+        super().__init__()
+        self.action = None
+        self.parent_id = None
+        self.child_epcs = []
+        self.child_quantity_list = []
+
+
+class TransactionEventRecord(EventRecord):
+    __slots__ = ('action', 'parent_id', 'epc_list', 'quantity_list')
+    epcpyyes_class = template_events.TransactionEvent
+
+    def __init__(self):
+        super().__init__()
+        self.action = None
+        self.parent_id = None
+        self.epc_list = []
+        self.quantity_list = []
+
+
+class TransformationEventRecord(EventRecord):
+    __slots__ = ('transformation_id', 'input_epc_list', 'input_quantity_list',
+                 'output_epc_list', 'output_quantity_list', 'ilmd')
+    epcpyyes_class = template_events.TransformationEvent
+
+    def __init__(self):
+        super().__init__()
+        self.transformation_id = None
+        self.input_epc_list = []
+        self.input_quantity_list = []
+        self.output_epc_list = []
+        self.output_quantity_list = []
+        self.ilmd = []
+
+
+class VocabularyElementRecord(Record):
+    '''
+    A master data vocabulary element.  `attributes` is a list of
+    `(attribute id, value)` tuples (an id may repeat) and `children` a
+    list of the ids of the element's children.  EPCPyYes has no master
+    data classes, so this record is created by both factories and has no
+    `to_epcpyyes`.
+    '''
+    __slots__ = ('vocabulary_type', 'id', 'attributes', 'children')
+
+    def __init__(self, vocabulary_type, id, attributes=None, children=None):
+        self.vocabulary_type = vocabulary_type
+        self.id = id
+        self.attributes = [] if attributes is None else attributes
+        self.children = [] if children is None else children
+
+    def get_attribute(self, attribute_id, default=None):
+        '''
+        :param attribute_id: The id of an attribute.
+        :param default: Returned if the element has no such attribute.
+        :return: The value of the first attribute with the id.
+        '''
+        for name, value in self.attributes:
+            if name == attribute_id:
+                return value
+        return default
+
+
+class PartnerIdentificationRecord(ConvertibleRecord):
+    __slots__ = ('authority', 'value')
+    epcpyyes_class = sbdh.PartnerIdentification
+
+    def __init__(self, authority, value):
+        self.authority = authority
+        self.value = value
+
+
+class PartnerRecord(ConvertibleRecord):
+    __slots__ = ('partner_type', 'partner_id', 'contact', 'email_address',
+                 'fax_number', 'telephone_number', 'contact_type_identifier')
+    epcpyyes_class = sbdh.Partner
+
+    def __init__(self, partner_type, partner_id=None, contact=None,
+                 email_address=None, fax_number=None, telephone_number=None,
+                 contact_type_identifier=None):
+        self.partner_type = partner_type
+        self.partner_id = partner_id
+        self.contact = contact
+        self.email_address = email_address
+        self.fax_number = fax_number
+        self.telephone_number = telephone_number
+        self.contact_type_identifier = contact_type_identifier
+
+
+class DocumentIdentificationRecord(ConvertibleRecord):
+    __slots__ = ('standard', 'type_version', 'instance_identifier',
+                 'document_type', 'multiple_type', 'creation_date_and_time')
+    epcpyyes_class = sbdh.DocumentIdentification
+
+    def __init__(self, standard=None, type_version=None,
+                 instance_identifier=None, document_type=None,
+                 multiple_type=None, creation_date_and_time=None):
+        self.standard = standard
+        self.type_version = type_version
+        self.instance_identifier = instance_identifier
+        self.document_type = document_type
+        self.multiple_type = multiple_type
+        self.creation_date_and_time = creation_date_and_time
+
+
+class StandardBusinessDocumentHeaderRecord(ConvertibleRecord):
+    __slots__ = ('header_version', 'partners', 'document_identification')
+    epcpyyes_class = template_sbdh.StandardBusinessDocumentHeader
+
+    def __init__(self, header_version=None, partners=None,
+                 document_identification=None):
+        self.header_version = header_version
+        self.partners = [] if partners is None else partners
+        self.document_identification = document_identification
+
+
+class EPCPyYesFactory(object):
+    '''
+    Creates the EPCPyYes objects the parsers populate by default.
+    '''
+
+    @staticmethod
+    def object_event():
+        return template_events.ObjectEvent(epc_list=[], quantity_list=[])
+
+    @staticmethod
+    def error_declaration():
+        # the default corrective_event_ids list is shared by every instance
+        return ErrorDeclaration(corrective_event_ids=[])
+
+    aggregation_event = template_events.AggregationEvent
+    transaction_event = template_events.TransactionEvent
+    transformation_event = template_events.TransformationEvent
+    business_transaction = BusinessTransaction
+    source = Source
+    destination = Destination
+    quantity_element = QuantityElement
+    ilmd = InstanceLotMasterDataAttribute
+    header = template_sbdh.StandardBusinessDocumentHeader
+    partner = sbdh.Partner
+    partner_identification = sbdh.PartnerIdentification
+    document_identification = sbdh.DocumentIdentification
+    vocabulary_element = VocabularyElementRecord
+
+
+class RecordFactory(object):
+    '''
+    Creates records in place of the EPCPyYes objects.
+    '''
+    object_event = ObjectEventRecord
+    aggregation_event = AggregationEventRecord
+    transaction_event = TransactionEventRecord
+    transformation_event = TransformationEventRecord
+    business_transaction = BusinessTransactionRecord
+    source = SourceRecord
+    destination = DestinationRecord
+    quantity_element = QuantityElementRecord
+    ilmd = ILMDRecord
+    error_declaration = ErrorDeclarationRecord
+    header = StandardBusinessDocumentHeaderRecord
+    partner = PartnerRecord
+    partner_identification = PartnerIdentificationRecord
+    document_identification = DocumentIdentificationRecord
+    vocabulary_element = VocabularyElementRecord
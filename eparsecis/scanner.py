@@ -0,0 +1,278 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2018 SerialLab Corp.  All rights reserved.
+'''
+Finds the byte offsets of the events in an EPCIS document without parsing
+it so that a huge document can be split into shards at event boundaries.
+
+Each shard is a well formed document of its own: the bytes of the
+original document up to the start of the EventList (without the
+EPCISHeader), the bytes of a run of events and the bytes from the end of
+the EventList to the end of the document.  All of the namespace
+declarations, the XML declaration and any DTD of the original are
+therefore in scope in every shard.
+
+The scan works on the raw bytes, so it only supports ASCII compatible
+encodings (such as UTF-8) and does not look inside comments or CDATA
+sections for event tags.
+'''
+import re
+from collections import namedtuple
+from io import BytesIO
+
+from eparsecis.sources import BufferStream, ChainedStream, map_file
+
+_TAG = re.compile(
+    rb'<(/?)((?:[A-Za-z_][\w.\-]*:)?'
+    rb'(ObjectEvent|AggregationEvent|TransactionEvent|TransformationEvent|'
+    rb'extension|EventList|EPCISHeader))(?=[\s/>])')
+
+
+class DocumentLayout(namedtuple('DocumentLayout', [
+        'header', 'event_list_start', 'event_list_stop', 'boundaries'])):
+    '''
+    The offsets found by `scan`.
+    :param header: The `(start, stop)` offsets of the EPCISHeader element
+    or None.
+    :param event_list_start: The offset just after the EventList start tag.
+    :param event_list_stop: The offset of the EventList end tag.
+    :param boundaries: The offsets the event list can be split at: the
+    start of each event (or of an extension element wrapping events, as
+    in EPCIS 1.1) directly inside the EventList.
+    '''
+    __slots__ = ()
+
+
+class Shard(namedtuple('Shard', ['path', 'start', 'stop', 'head', 'tail'])):
+    '''
+    A run of events in a document: the bytes from `start` to `stop` of the
+    file at `path` wrapped in `head` and `tail`.
+    '''
+    __slots__ = ()
+
+    def open(self, buffer):
+        '''
+        Opens the shard as a well formed document.
+        :param buffer: The bytes of the document, usually the mmap of its
+        file (see `sources.map_file`).  The events are read from it
+        without being copied first.
+        :return: A file object.
+        '''
+        return ChainedStream(BytesIO(self.head),
+                             BufferStream(buffer, self.start, self.stop),
+                             BytesIO(self.tail))
+
+
+def _tag_end(buffer, match):
+    '''
+    Returns the offset just after the `>` ending the tag that starts at
+    the match and whether the tag is an empty-element tag.
+    '''
+    end = buffer.find(b'>', match.end()) + 1
+    return end, buffer[end - 2:end - 1] == b'/'
+
+
+def _find_end_tag(buffer, qualified_name, position):
+    '''
+    Returns the offset just after the end tag of an element.
+    '''
+    end_tag = b'</' + qualified_name
+    while True:
+        start = buffer.find(end_tag, position)
+        if start == -1:
+            return len(buffer)
+        position = start + len(end_tag)
+        if buffer[position:position + 1] in (b'>', b' ', b'\t', b'\r',
+                                             b'\n'):
+            return position
+
+
+def scan(buffer):
+    '''
+    Scans the bytes of an EPCIS document for the header, event list and
+    event boundaries.
+    :param buffer: A bytes-like object (bytes or an mmap, for example).
+    :return: A `DocumentLayout` or None if no EventList with events was
+    found.
+    '''
+    header_start = header = None
+    event_list_start = event_list_stop = None
+    boundaries = []
+    wrapper_depth = 0
+    position = 0
+    while True:
+        match = _TAG.search(buffer, position)
+        if match is None:
+            break
+        position = match.end()
+        closing, name = match.group(1, 3)
+        if event_list_start is None:
+            if name == b'EPCISHeader':
+                if closing:
+                    header = (header_start, _tag_end(buffer, match)[0])
+                else:
+                    header_start = match.start()
+                    end, empty = _tag_end(buffer, match)
+                    if empty:
+                        header = (header_start, end)
+            elif name == b'EventList' and not closing:
+                end, empty = _tag_end(buffer, match)
+                if empty:
+                    return None
+                event_list_start = end
+        elif name == b'EventList':
+            if closing:
+                event_list_stop = match.start()
+                break
+        elif name == b'extension':
+            if closing:
+                wrapper_depth -= 1
+            elif not _tag_end(buffer, match)[1]:
+                if wrapper_depth == 0:
+                    boundaries.append(match.start())
+                wrapper_depth += 1
+        elif not closing:
+            if wrapper_depth == 0:
+                boundaries.append(match.start())
+            end, empty = _tag_end(buffer, match)
+            if not empty:
+                # skip the content of the event (events do not nest)
+                position = _find_end_tag(buffer, match.group(2), end)
+    if event_list_stop is None or not boundaries:
+        return None
+    return DocumentLayout(header, event_list_start, event_list_stop,
+                          boundaries)
+
+
+def seek_event(buffer, ordinal):
+    '''
+    Finds where a parse that skips the first `ordinal` header and event
+    elements of a document continues.
+    :param buffer: A bytes-like object holding the document.
+    :param ordinal: The number of elements to skip (at least one): the
+    EPCISHeader (if the document has one) and the events, in document
+    order.
+    :return: A `(head, offset)` tuple or None if the document does not
+    have that many elements.  The bytes of `head` followed by the bytes
+    of the document from `offset` are a well formed document holding the
+    rest of the events.  The head is the start of the document without
+    the header and with the start tag of the extension element wrapping
+    the next event (if any).
+    '''
+    count = 0
+    header = event_list_start = wrapper = None
+    position = 0
+    while True:
+        match = _TAG.search(buffer, position)
+        if match is None:
+            return None
+        position = match.end()
+        closing, name = match.group(1, 3)
+        if event_list_start is None:
+            if name == b'EPCISHeader':
+                end, empty = _tag_end(buffer, match)
+                if closing or empty:
+                    count += 1
+                    header = (header[0] if closing else match.start(), end)
+                else:
+                    header = (match.start(), None)
+            elif name == b'EventList' and not closing:
+                end, empty = _tag_end(buffer, match)
+                event_list_start = end
+                if empty:
+                    break
+            continue
+        if name == b'EventList':
+            if closing:
+                break
+        elif name == b'extension':
+            if closing:
+                wrapper = None
+            else:
+                end, empty = _tag_end(buffer, match)
+                if not empty:
+                    wrapper = (match.start(), end)
+        elif not closing:
+            if count == ordinal:
+                break
+            count += 1
+            end, empty = _tag_end(buffer, match)
+            if not empty:
+                position = _find_end_tag(buffer, match.group(2), end)
+    if count != ordinal:
+        return None
+    head = bytes(buffer[:event_list_start])
+    if header is not None and header[1] is not None:
+        head = head[:header[0]] + head[header[1]:]
+    if wrapper is not None:
+        head += bytes(buffer[wrapper[0]:wrapper[1]])
+    return head, match.start()
+
+
+def get_shards(path, buffer, layout, shard_size):
+    '''
+    Splits the event list of a scanned document into shards of roughly
+    `shard_size` bytes.
+    :param path: The path of the document.
+    :param buffer: The bytes of the document.
+    :param layout: The `DocumentLayout` of the document.
+    :param shard_size: The number of bytes of events in each shard (a
+    shard always contains at least one event).
+    :return: A list of `Shard` instances in document order.
+    '''
+    head = bytes(buffer[:layout.event_list_start])
+    if layout.header is not None:
+        start, stop = layout.header
+        head = head[:start] + head[stop:]
+    tail = bytes(buffer[layout.event_list_stop:])
+    shards = []
+    start = layout.boundaries[0]
+    for boundary in layout.boundaries[1:]:
+        if boundary - start >= shard_size:
+            shards.append(Shard(path, start, boundary, head, tail))
+            start = boundary
+    shards.append(Shard(path, start, layout.event_list_stop, head, tail))
+    return shards
+
+
+def get_header_document(buffer, layout):
+    '''
+    Returns the document without its events so that the header can be
+    parsed once.
+    :param buffer: The bytes of the document.
+    :param layout: The `DocumentLayout` of the document.
+    :return: The bytes of a well formed document.
+    '''
+    return b''.join((bytes(buffer[:layout.event_list_start]),
+                     bytes(buffer[layout.event_list_stop:])))
+
+
+def scan_file(path, shard_size, buffer=None):
+    '''
+    Scans a file and splits it into shards.
+    :param path: The path of the document.
+    :param shard_size: See `get_shards`.
+    :param buffer: The mmap of the file if the caller has already mapped
+    it, otherwise the file is mapped for the scan.
+    :return: A `(header document, shards)` tuple or None if the document
+    could not be split.
+    '''
+    if buffer is None:
+        with map_file(path) as buffer:
+            return scan_file(path, shard_size, buffer)
+    layout = scan(buffer)
+    if layout is None:
+        return None
+    return (get_header_document(buffer, layout),
+            get_shards(path, buffer, layout, shard_size))
@@ -0,0 +1,280 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2018 SerialLab Corp.  All rights reserved.
+'''
+Opens the streams the parsers read from.  Compressed documents are
+detected by their magic bytes and decompressed while they are parsed.
+gzip, bzip2 and xz are always supported; zstd is supported when the
+optional `zstandard` package is installed (`pip install eparsecis[zstd]`).
+'''
+import bz2
+import gzip
+import io
+import lzma
+import mmap
+import os
+from contextlib import contextmanager
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+# the types of paths (os.PathLike was added in python 3.6)
+_PATH_TYPES = (str, bytes) + ((os.PathLike,) if hasattr(os, 'PathLike')
+                              else ())
+
+# the longest magic number below
+_MAGIC_LENGTH = 6
+
+GZIP = 'gzip'
+BZIP2 = 'bz2'
+XZ = 'xz'
+ZSTD = 'zstd'
+
+_MAGIC_NUMBERS = (
+    (b'\x1f\x8b', GZIP),
+    (b'BZh', BZIP2),
+    (b'\xfd7zXZ\x00', XZ),
+    (b'\x28\xb5\x2f\xfd', ZSTD),
+)
+
+
+def get_compression(head):
+    '''
+    Returns the compression format of a document.
+    :param head: The first bytes of the document.
+    :return: `GZIP`, `BZIP2`, `XZ`, `ZSTD` or None if the document is not
+    compressed.
+    '''
+    if isinstance(head, bytes):
+        for magic, compression in _MAGIC_NUMBERS:
+            if head.startswith(magic):
+                return compression
+    return None
+
+
+def decompress(stream, compression, buffer_size=None):
+    '''
+    Wraps a binary file object in a file object that decompresses it as it
+    is read.
+    :param stream: The compressed file object.
+    :param compression: The compression format (see `get_compression`).
+    :param buffer_size: The size of the buffer the decompressed data is
+    read through.
+    :return: A file object.
+    '''
+    if compression == GZIP:
+        decompressed = gzip.GzipFile(fileobj=stream, mode='rb')
+    elif compression == BZIP2:
+        decompressed = bz2.BZ2File(stream, mode='rb')
+    elif compression == XZ:
+        decompressed = lzma.LZMAFile(stream, mode='rb')
+    elif compression == ZSTD:
+        if zstandard is None:
+            raise ImportError('The zstandard package is required to parse '
+                              'zstd compressed documents.')
+        decompressed = zstandard.ZstdDecompressor().stream_reader(
+            stream, read_size=buffer_size or io.DEFAULT_BUFFER_SIZE,
+            read_across_frames=True, closefd=False)
+    else:
+        raise ValueError('Unknown compression {0}.'.format(compression))
+    if buffer_size:
+        decompressed = io.BufferedReader(decompressed, buffer_size)
+    return decompressed
+
+
+class PrefixedStream(object):
+    '''
+    A file object that returns some bytes that were already read from a
+    stream before the rest of the stream.
+    :param prefix: The bytes that were read.
+    :param stream: The stream.
+    '''
+
+    def __init__(self, prefix, stream):
+        self._prefix = prefix
+        self._stream = stream
+
+    def read(self, size=-1):
+        prefix = self._prefix
+        if not prefix:
+            return self._stream.read(size)
+        if size is None or size < 0:
+            self._prefix = prefix[:0]
+            return prefix + self._stream.read()
+        self._prefix = prefix[size:]
+        if len(prefix) >= size:
+            return prefix[:size]
+        return prefix + self._stream.read(size - len(prefix))
+
+    def readable(self):
+        return True
+
+
+class BufferStream(object):
+    '''
+    A file object that reads a range of a bytes-like object (an mmap, for
+    example) without copying more than each read returns.  Each
+    `BufferStream` has its own position, so any number of them can read
+    the same buffer.
+    :param buffer: The buffer.
+    :param start: The offset of the first byte to read.
+    :param stop: The offset after the last byte to read (defaults to the
+    end of the buffer).
+    '''
+
+    def __init__(self, buffer, start=0, stop=None):
+        self._buffer = buffer
+        self._position = start
+        self._stop = len(buffer) if stop is None else stop
+
+    def read(self, size=-1):
+        start = self._position
+        if size is None or size < 0:
+            stop = self._stop
+        else:
+            stop = min(start + size, self._stop)
+        self._position = stop
+        chunk = self._buffer[start:stop]
+        # the lxml parsers only accept bytes
+        return chunk if isinstance(chunk, bytes) else bytes(chunk)
+
+    @property
+    def buffer(self):
+        '''
+        The buffer the stream reads.
+        '''
+        return self._buffer
+
+    def readable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+
+class ChainedStream(object):
+    '''
+    A file object that reads several file objects one after the other.
+    :param streams: The file objects.
+    '''
+
+    def __init__(self, *streams):
+        self._streams = list(streams)
+
+    def read(self, size=-1):
+        chunks = []
+        while self._streams:
+            chunk = self._streams[0].read(size)
+            if size is None or size < 0:
+                chunks.append(chunk)
+                self._streams.pop(0)
+            elif chunk:
+                chunks.append(chunk)
+                size -= len(chunk)
+                if size == 0:
+                    break
+            else:
+                self._streams.pop(0)
+        return b''.join(chunks)
+
+    def readable(self):
+        return True
+
+
+@contextmanager
+def map_file(path):
+    '''
+    Maps a file into memory read-only.  The mapping can be shared by
+    several readers (see `BufferStream`) so that a file that is scanned
+    and then parsed is only read from the disk once.
+    :param path: The path of the file.
+    :return: A context manager giving the mmap (or an empty bytes object
+    for an empty file, which can not be mapped).
+    '''
+    with open(path, 'rb') as stream:
+        if os.fstat(stream.fileno()).st_size == 0:
+            yield b''
+            return
+        mapped = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        if hasattr(mapped, 'madvise'):
+            mapped.madvise(mmap.MADV_SEQUENTIAL)
+        yield mapped
+    finally:
+        mapped.close()
+
+
+@contextmanager
+def open_source(stream, buffer_size=None, use_mmap=False):
+    '''
+    Opens the source a parser reads from.  Compressed documents are
+    decompressed as they are read.  Uncompressed files are handed to lxml
+    by path (so that lxml reads them itself) unless a buffer size is
+    given or they are memory-mapped.
+    :param stream: A path, a file object or an mmap (or other bytes-like
+    object that is not `bytes`, which is taken for a path) holding the
+    document.
+    :param buffer_size: The size of the buffer files are read through.
+    :param use_mmap: If True, files given by path are memory-mapped
+    instead of being read.
+    :return: A context manager giving the path or file object to parse.
+    '''
+    if isinstance(stream, (mmap.mmap, bytearray, memoryview)):
+        with _open_buffer(stream, buffer_size) as source:
+            yield source
+        return
+    if isinstance(stream, _PATH_TYPES):
+        if not os.path.isfile(stream):
+            # leave URLs, etc. to lxml
+            yield stream
+            return
+        if use_mmap:
+            with map_file(stream) as mapped:
+                with _open_buffer(mapped, buffer_size) as source:
+                    yield source
+            return
+        with open(stream, 'rb', buffering=buffer_size or -1) as source:
+            compression = get_compression(source.peek(_MAGIC_LENGTH))
+            if compression is not None:
+                with decompress(source, compression, buffer_size) as \
+                        decompressed:
+                    yield decompressed
+            elif buffer_size:
+                yield source
+            else:
+                source.close()
+                yield stream
+    else:
+        head = stream.read(_MAGIC_LENGTH)
+        source = PrefixedStream(head, stream)
+        compression = get_compression(head)
+        if compression is None:
+            yield source
+        else:
+            with decompress(source, compression, buffer_size) as \
+                    decompressed:
+                yield decompressed
+
+
+@contextmanager
+def _open_buffer(buffer, buffer_size):
+    source = BufferStream(buffer)
+    compression = get_compression(bytes(buffer[:_MAGIC_LENGTH]))
+    if compression is None:
+        yield source
+    else:
+        with decompress(source, compression, buffer_size) as decompressed:
+            yield decompressed
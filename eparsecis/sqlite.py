@@ -0,0 +1,314 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2018 SerialLab Corp.  All rights reserved.
+'''
+Writes parsed events into a normalized SQLite database.  The rows of the
+events are buffered and written with `executemany` in one transaction per
+`batch_size` events.
+
+    with SQLiteSink('events.db') as sink:
+        SQLiteParser('upload.xml', fast_records=True, sink=sink).parse()
+
+The `SQLiteParser` also writes the EPCs of events that are parsed with an
+`epc_chunk_size` chunk by chunk, so very large events are stored without
+their EPCs ever being held in memory at once.
+'''
+import logging
+import sqlite3
+
+from eparsecis.eparsecis import EPCISParser, FlexibleNSParser
+
+logger = logging.getLogger()
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS event (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    event_id TEXT,
+    event_time TEXT,
+    event_timezone_offset TEXT,
+    record_time TEXT,
+    action TEXT,
+    biz_step TEXT,
+    disposition TEXT,
+    read_point TEXT,
+    biz_location TEXT,
+    parent_id TEXT,
+    transformation_id TEXT
+);
+CREATE TABLE IF NOT EXISTS event_epc (
+    event INTEGER NOT NULL REFERENCES event (id)
+        DEFERRABLE INITIALLY DEFERRED,
+    list TEXT NOT NULL,
+    epc TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS business_transaction (
+    event INTEGER NOT NULL REFERENCES event (id)
+        DEFERRABLE INITIALLY DEFERRED,
+    type TEXT,
+    biz_transaction TEXT
+);
+CREATE TABLE IF NOT EXISTS quantity (
+    event INTEGER NOT NULL REFERENCES event (id)
+        DEFERRABLE INITIALLY DEFERRED,
+    list TEXT NOT NULL,
+    epc_class TEXT,
+    quantity REAL,
+    uom TEXT
+);
+CREATE TABLE IF NOT EXISTS ilmd (
+    event INTEGER NOT NULL REFERENCES event (id)
+        DEFERRABLE INITIALLY DEFERRED,
+    name TEXT,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS source_destination (
+    event INTEGER NOT NULL REFERENCES event (id)
+        DEFERRABLE INITIALLY DEFERRED,
+    list TEXT NOT NULL,
+    type TEXT,
+    value TEXT
+);
+'''
+
+# the event columns after the id and kind
+_EVENT_COLUMNS = ('event_id', 'event_time', 'event_timezone_offset',
+                  'record_time', 'action', 'biz_step', 'disposition',
+                  'read_point', 'biz_location', 'parent_id',
+                  'transformation_id')
+
+# the value of the list column for each EPC and quantity list attribute
+_EPC_LISTS = (('epc_list', 'epc'), ('child_epcs', 'child'),
+              ('input_epc_list', 'input'), ('output_epc_list', 'output'))
+_QUANTITY_LISTS = (('quantity_list', 'epc'),
+                   ('child_quantity_list', 'child'),
+                   ('input_quantity_list', 'input'),
+                   ('output_quantity_list', 'output'))
+
+_INSERTS = {
+    'event': 'INSERT INTO event VALUES ({0})'.format(
+        ', '.join('?' * (len(_EVENT_COLUMNS) + 2))),
+    'event_epc': 'INSERT INTO event_epc VALUES (?, ?, ?)',
+    'business_transaction':
+        'INSERT INTO business_transaction VALUES (?, ?, ?)',
+    'quantity': 'INSERT INTO quantity VALUES (?, ?, ?, ?, ?)',
+    'ilmd': 'INSERT INTO ilmd VALUES (?, ?, ?)',
+    'source_destination': 'INSERT INTO source_destination '
+                          'VALUES (?, ?, ?, ?)',
+}
+
+
+class SQLiteSink(object):
+    '''
+    Writes events into a SQLite database, creating the tables in `SCHEMA`
+    if they do not exist.  Each event is a row of the `event` table; its
+    EPCs, business transactions, quantities, ILMD and sources and
+    destinations are rows of the other tables referencing it.
+    :param database: The path of the database or an open
+    `sqlite3.Connection`.
+    :param batch_size: The number of events written in each transaction.
+    :param max_epcs: The number of buffered EPCs that are written even if
+    the batch is not full yet.  They are inserted in the open transaction
+    of the batch, which is still only committed once the batch is full,
+    so an event and its EPCs are always committed together.
+    :param journal_mode: The journal_mode pragma (None to leave it as it
+    is).  WAL lets other connections read while events are written.
+    :param synchronous: The synchronous pragma (None to leave it as it is).
+    NORMAL only syncs WAL databases at checkpoints.
+    '''
+
+    def __init__(self, database, batch_size=1000, max_epcs=100000,
+                 journal_mode='WAL', synchronous='NORMAL'):
+        if isinstance(database, sqlite3.Connection):
+            self.connection = database
+            self._close_connection = False
+        else:
+            self.connection = sqlite3.connect(database)
+            self._close_connection = True
+        self.batch_size = batch_size
+        self.max_epcs = max_epcs
+        if journal_mode is not None:
+            self.connection.execute(
+                'PRAGMA journal_mode = {0}'.format(journal_mode))
+        if synchronous is not None:
+            self.connection.execute(
+                'PRAGMA synchronous = {0}'.format(synchronous))
+        self.connection.executescript(SCHEMA)
+        self._rows = {table: [] for table in _INSERTS}
+        self._batch_events = 0
+        # the ids of events whose EPCs are written before the events
+        self._pending_ids = {}
+        self._next_id = self.connection.execute(
+            'SELECT COALESCE(MAX(id), 0) + 1 FROM event').fetchone()[0]
+        self.events = 0
+
+    def get_event_id(self, epcis_event):
+        '''
+        :param epcis_event: An event that is being parsed.
+        :return: The id of the row the event will be written to.
+        '''
+        key = id(epcis_event)
+        event_id = self._pending_ids.get(key)
+        if event_id is None:
+            event_id = self._pending_ids[key] = self._next_id
+            self._next_id += 1
+        return event_id
+
+    def write(self, kind, epcis_event):
+        '''
+        Buffers the rows of an event, writing the batch if it is full.
+        Headers and other parsed elements that are not events are ignored.
+        :param kind: The kind of the event, e.g. 'ObjectEvent'.
+        :param epcis_event: The event record or EPCPyYes event.
+        :return: The id of the event's row or None.
+        '''
+        if not kind.endswith('Event'):
+            return None
+        event_id = self._pending_ids.pop(id(epcis_event), None)
+        if event_id is None:
+            event_id = self._next_id
+            self._next_id += 1
+        rows = self._rows
+        rows['event'].append(
+            (event_id, kind) + tuple(getattr(epcis_event, column, None)
+                                     for column in _EVENT_COLUMNS))
+        for attribute, name in _EPC_LISTS:
+            epcs = getattr(epcis_event, attribute, None)
+            if epcs:
+                self.write_epcs(event_id, name, epcs)
+        for attribute, name in _QUANTITY_LISTS:
+            for element in getattr(epcis_event, attribute, None) or ():
+                rows['quantity'].append((event_id, name, element.epc_class,
+                                         element.quantity, element.uom))
+        rows['business_transaction'].extend(
+            (event_id, transaction.type, transaction.biz_transaction)
+            for transaction in epcis_event.business_transaction_list or ())
+        rows['ilmd'].extend(
+            (event_id, ilmd.name, ilmd.value)
+            for ilmd in getattr(epcis_event, 'ilmd', None) or ())
+        rows['source_destination'].extend(
+            (event_id, 'source', source.type, source.source)
+            for source in epcis_event.source_list or ())
+        rows['source_destination'].extend(
+            (event_id, 'destination', destination.type,
+             destination.destination)
+            for destination in epcis_event.destination_list or ())
+        self.events += 1
+        self._batch_events += 1
+        if self._batch_events >= self.batch_size:
+            self.flush()
+        return event_id
+
+    def write_epcs(self, event, name, epcs):
+        '''
+        Buffers the EPCs of an event, inserting the buffered rows (without
+        committing them) if too many EPCs are buffered.
+        :param event: The id of the event's row or the event itself (see
+        `get_event_id`).
+        :param name: The list the EPCs are in: 'epc', 'child', 'input' or
+        'output'.
+        :param epcs: The EPCs.
+        :return: None
+        '''
+        if not isinstance(event, int):
+            event = self.get_event_id(event)
+        epc_rows = self._rows['event_epc']
+        epc_rows.extend((event, name, epc) for epc in epcs)
+        if len(epc_rows) >= self.max_epcs:
+            try:
+                self._insert_rows()
+            except Exception:
+                self.connection.rollback()
+                raise
+
+    def _insert_rows(self):
+        connection = self.connection
+        if not connection.in_transaction:
+            # connections in autocommit mode would commit each insert
+            connection.execute('BEGIN')
+        for table, rows in self._rows.items():
+            if rows:
+                connection.executemany(_INSERTS[table], rows)
+                rows.clear()
+
+    def flush(self):
+        '''
+        Writes the buffered rows and commits the transaction of the batch.
+        :return: None
+        '''
+        with self.connection:
+            self._insert_rows()
+        logger.debug('Wrote a batch of %s events.', self._batch_events)
+        self._batch_events = 0
+
+    def close(self):
+        '''
+        Writes the buffered rows and closes the connection if the sink
+        opened it.
+        :return: None
+        '''
+        self.flush()
+        if self._close_connection:
+            self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class SQLiteParserMixin(object):
+    '''
+    Writes the events an `EPCISParser` (sub) class parses to a
+    `SQLiteSink`, which is passed as the `sink` keyword argument.  The EPC
+    chunks of a parser with an `epc_chunk_size` are written as they are
+    parsed.  Call the sink's `flush` or `close` when the parser is done.
+    '''
+
+    _epc_list_names = dict(_EPC_LISTS)
+
+    def __init__(self, *args, sink=None, **kwargs):
+        self.sink = sink
+        super().__init__(*args, **kwargs)
+
+    def handle_object_event(self, epcis_event):
+        self.sink.write('ObjectEvent', epcis_event)
+
+    def handle_aggregation_event(self, epcis_event):
+        self.sink.write('AggregationEvent', epcis_event)
+
+    def handle_transaction_event(self, epcis_event):
+        self.sink.write('TransactionEvent', epcis_event)
+
+    def handle_transformation_event(self, epcis_event):
+        self.sink.write('TransformationEvent', epcis_event)
+
+    def handle_epc_chunk(self, epcis_event, attribute, epcs):
+        self.sink.write_epcs(epcis_event, self._epc_list_names[attribute],
+                             epcs)
+
+
+class SQLiteParser(SQLiteParserMixin, EPCISParser):
+    '''
+    An `EPCISParser` that writes its events to a `SQLiteSink`.
+    '''
+    pass
+
+
+class SQLiteFlexibleNSParser(SQLiteParserMixin, FlexibleNSParser):
+    '''
+    A `FlexibleNSParser` that writes its events to a `SQLiteSink`.
+    '''
+    pass
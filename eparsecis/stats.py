@@ -0,0 +1,347 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2018 SerialLab Corp.  All rights reserved.
+'''
+Instruments parsing.  A `ParseStats` passed to a parser as its `stats`
+counts the parsed events and EPCs, times the phases of parsing and reports
+progress; parsers without one run their usual loop, so the instrumentation
+costs nothing unless it is asked for.
+
+    def show(stats):
+        print('{0:.0%} done, {1:.0f}s left'.format(stats.percent,
+                                                   stats.eta))
+
+    stats = ParseStats(progress=show, interval=5)
+    EPCISParser('events.xml.gz', stats=stats).parse()
+    print(stats.counts, stats.times)
+'''
+import io
+import os
+from collections import Counter
+from time import perf_counter
+
+from eparsecis.checkpoint import _ResumedStream
+from eparsecis.sources import BufferStream
+
+PHASES = ('read', 'parse', 'construct', 'enrich', 'handle')
+
+_EPC_LISTS = ('epc_list', 'child_epcs', 'input_epc_list', 'output_epc_list')
+
+
+class _TimedFactory(object):
+    '''
+    Proxies the object factory of a parser, timing each object created
+    as the 'construct' phase.
+    '''
+
+    def __init__(self, factory, stats):
+        self._factory = factory
+        self._stats = stats
+
+    def __getattr__(self, name):
+        timed = self._stats.timed('construct', getattr(self._factory, name))
+        setattr(self, name, timed)
+        return timed
+
+
+class ParseStats(object):
+    '''
+    Counters, timers and progress reporting of one or more parses.  The
+    time of each phase is accumulated in `times`:
+
+    * read: reading and tokenizing the document (lxml, ijson, etc.).
+    * parse: dispatching the parsed elements to the parser's fields.
+    * construct: creating the events and their parts (EPCPyYes objects or
+      records).
+    * enrich: `enrich_event` (the value dictionary and the enricher).
+    * handle: the `handle_*` methods.
+
+    The time the consumer of `iter_events` spends between events is not
+    counted.
+    :param progress: Called with the stats at most every `interval`
+    seconds while a document is parsed and once after it was parsed.
+    :param interval: The seconds between progress calls.
+    '''
+
+    def __init__(self, progress=None, interval=1.0):
+        self.progress = progress
+        self.interval = interval
+        # the number of events of each kind
+        self.counts = Counter()
+        self.epcs = 0
+        # the bytes of the documents read so far (None if not known)
+        self.bytes_read = None
+        self.total_bytes = None
+        self.elapsed = 0.0
+        self._times = dict.fromkeys(('read', 'element', 'construct',
+                                     'enrich', 'handle'), 0.0)
+        self._documents_read = 0
+        self._document_started = 0.0
+        self._get_position = None
+        self._last_progress = 0.0
+
+    @property
+    def events(self):
+        '''
+        :return: The number of events (and headers) parsed.
+        '''
+        return sum(self.counts.values())
+
+    @property
+    def times(self):
+        '''
+        :return: A dictionary of phase (see `PHASES`) to seconds.
+        '''
+        times = self._times
+        return {
+            'read': times['read'],
+            'parse': max(0.0, times['element'] - times['construct'] -
+                         times['enrich'] - times['handle']),
+            'construct': times['construct'],
+            'enrich': times['enrich'],
+            'handle': times['handle'],
+        }
+
+    @property
+    def events_per_second(self):
+        '''
+        :return: The events parsed per second of `elapsed`.
+        '''
+        return self.events / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def bytes_per_second(self):
+        '''
+        :return: The bytes read per second of `elapsed` or None.
+        '''
+        if not self.elapsed or self.bytes_read is None:
+            return None
+        return self.bytes_read / self.elapsed
+
+    @property
+    def percent(self):
+        '''
+        :return: The fraction of the document being parsed that was read
+        or None if the size of the input is not known.
+        '''
+        if not self.total_bytes or self.bytes_read is None:
+            return None
+        return min(1.0, (self.bytes_read - self._documents_read) /
+                   self.total_bytes)
+
+    @property
+    def eta(self):
+        '''
+        :return: The estimated seconds until the document being parsed is
+        parsed or None if the size of the input is not known.
+        '''
+        percent = self.percent
+        if not percent:
+            return None
+        return self.elapsed_document * (1 - percent) / percent
+
+    @property
+    def elapsed_document(self):
+        '''
+        :return: The seconds spent on the document being parsed.
+        '''
+        return self.elapsed - self._document_started
+
+    def timed(self, phase, function):
+        '''
+        Wraps a function so that the time spent in it is added to a phase.
+        :param phase: The phase.
+        :param function: The function.
+        :return: The wrapper.
+        '''
+        times = self._times
+
+        def timed_function(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                times[phase] += perf_counter() - start
+        return timed_function
+
+    def instrument(self, parser):
+        '''
+        Times the object construction, enrichment and `handle_*` methods of
+        a parser.  Called by the parsers created with stats.
+        :param parser: The parser.
+        :return: None
+        '''
+        parser._factory = _TimedFactory(parser._factory, self)
+        parser.enrich_event = self.timed('enrich', parser.enrich_event)
+        for name in ('handle_sbdh', 'handle_object_event',
+                     'handle_aggregation_event', 'handle_transaction_event',
+                     'handle_transformation_event',
+                     'handle_vocabulary_element'):
+            setattr(parser, name, self.timed('handle', getattr(parser, name)))
+        handle_epc_chunk = self.timed('handle', parser.handle_epc_chunk)
+
+        def count_epc_chunk(epcis_event, attribute, epcs):
+            self.epcs += len(epcs)
+            return handle_epc_chunk(epcis_event, attribute, epcs)
+        parser.handle_epc_chunk = count_epc_chunk
+
+    def add_bytes(self, size):
+        '''
+        Adds bytes that were pushed to a parser (see `EPCISParser.feed`).
+        :param size: The number of bytes.
+        :return: None
+        '''
+        self.bytes_read = (self.bytes_read or 0) + size
+
+    def add_read_time(self, seconds):
+        '''
+        Adds time spent reading outside of `track` (see
+        `EPCISParser.feed`).
+        :param seconds: The time.
+        :return: None
+        '''
+        self._times['read'] += seconds
+        self.elapsed += seconds
+
+    def track(self, items, parse, stream=None, final=True):
+        '''
+        Parses the items of an iterator, counting and timing them.
+        :param items: An iterator of the items the document is read into
+        (the lxml events, the decoded JSON events, etc.).  The time spent
+        in it is the 'read' phase.
+        :param parse: Parses an item into a `(kind, event)` tuple or None.
+        :param stream: The file object the document is read from.  Its
+        position is the number of bytes read if its size is known.
+        :param final: Call `progress` after the last item.  Parsers that
+        are fed a document track each chunk and report at the end of the
+        document instead.
+        :return: A generator of `(kind, event)` tuples.
+        '''
+        self._start_document(stream)
+        times = self._times
+        items = iter(items)
+        complete = False
+        try:
+            while True:
+                start = perf_counter()
+                try:
+                    item = next(items)
+                except StopIteration:
+                    self.elapsed += perf_counter() - start
+                    complete = True
+                    break
+                parse_start = perf_counter()
+                times['read'] += parse_start - start
+                parsed = parse(item)
+                now = perf_counter()
+                times['element'] += now - parse_start
+                self.elapsed += now - start
+                if parsed is not None:
+                    self._count(parsed)
+                    if self.progress is not None and \
+                            now - self._last_progress >= self.interval:
+                        self._last_progress = now
+                        self._update_position()
+                        self.report_progress()
+                    yield parsed
+        finally:
+            self._finish_document(final, complete)
+
+    def _count(self, parsed):
+        kind, epcis_event = parsed
+        self.counts[kind] += 1
+        for attribute in _EPC_LISTS:
+            epcs = getattr(epcis_event, attribute, None)
+            if epcs:
+                self.epcs += len(epcs)
+
+    def _start_document(self, stream):
+        if stream is None:
+            # a chunk of a document that is fed to the parser
+            self.total_bytes = None
+            return
+        self._document_started = self.elapsed
+        self._documents_read = self.bytes_read or 0
+        self._get_position = None
+        self.total_bytes = get_size(stream)
+        if self.total_bytes is not None:
+            # the readers have already read ahead (e.g. to detect the
+            # compression), so the position is taken from the start
+            self._get_position = stream.tell
+            self.bytes_read = self._documents_read
+        self._last_progress = perf_counter()
+
+    def _update_position(self, complete=False):
+        if self._get_position is not None:
+            try:
+                position = self._get_position()
+            except (OSError, ValueError):
+                # closed by the reader
+                complete = True
+            if complete:
+                # the readers may stop before trailing whitespace
+                position = self.total_bytes
+            self.bytes_read = self._documents_read + position
+
+    def _finish_document(self, final, complete):
+        self._update_position(complete)
+        self._get_position = None
+        if final:
+            self.report_progress()
+
+    def report_progress(self):
+        '''
+        Calls the `progress` callback (if any) with the stats.
+        :return: None
+        '''
+        if self.progress is not None:
+            self.progress(self)
+
+    def as_dict(self):
+        '''
+        :return: The stats as a dictionary, e.g. for logging as JSON.
+        '''
+        return {'events': self.events, 'counts': dict(self.counts),
+                'epcs': self.epcs, 'bytes_read': self.bytes_read,
+                'elapsed': self.elapsed,
+                'events_per_second': self.events_per_second,
+                'bytes_per_second': self.bytes_per_second,
+                'times': self.times}
+
+    def __repr__(self):
+        return '<ParseStats {0} events, {1} EPCs in {2:.3f}s>'.format(
+            self.events, self.epcs, self.elapsed)
+
+
+def get_size(stream):
+    '''
+    Returns the size of a stream that is read from a file or memory.
+    Decompressing streams are not sized, their position is not a position
+    in the file.
+    :param stream: The file object.
+    :return: The size in bytes or None if it is not known.
+    '''
+    if isinstance(stream, io.BytesIO):
+        with stream.getbuffer() as buffer:
+            return len(buffer)
+    if isinstance(stream, (BufferStream, _ResumedStream)):
+        # mapped files and resumed parses, whose positions are positions
+        # in the buffer
+        return len(stream.buffer)
+    if isinstance(stream, (io.BufferedReader, io.FileIO)):
+        try:
+            return os.fstat(stream.fileno()).st_size
+        except OSError:
+            return None
+    return None
@@ -0,0 +1,313 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2018 SerialLab Corp.  All rights reserved.
+'''
+Decodes EPC URNs in batches.  The EPCs of an event are decoded into
+column-oriented `DecodedEPCs` with the scheme, company prefix, reference
+(item, location, asset type, serial or individual asset reference) and
+serial of each EPC and its GS1 key (GTIN-14, SSCC-18, GLN-13, GRAI or
+GIAI) with its check digit.  Everything up to the serial of a URN is only
+decoded once (and cached across calls), so the EPCs of a large event cost
+little more than splitting off their serials.  Check digits are computed
+and validated with numpy when it is installed
+(`pip install eparsecis[numpy]`).
+
+    decoded = decode_epcs(event.epc_list)
+    for gtin, serial in zip(decoded.key, decoded.serial):
+        ...
+'''
+from functools import lru_cache
+
+from eparsecis.epclist import EPCList, _split_epc
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+SGTIN = 'sgtin'
+SSCC = 'sscc'
+SGLN = 'sgln'
+GRAI = 'grai'
+GIAI = 'giai'
+LGTIN = 'lgtin'
+
+_SCHEMES = {
+    'urn:epc:id:sgtin:': SGTIN,
+    'urn:epc:id:sscc:': SSCC,
+    'urn:epc:id:sgln:': SGLN,
+    'urn:epc:id:grai:': GRAI,
+    'urn:epc:id:giai:': GIAI,
+    'urn:epc:class:lgtin:': LGTIN,
+}
+
+# the number of digits of the company prefix and reference of each scheme
+# whose GS1 key has a check digit
+_KEY_LENGTHS = {SGTIN: 13, SSCC: 17, SGLN: 12, GRAI: 12, LGTIN: 13}
+
+# the number of check digits below which numpy is not worth its overhead
+_NUMPY_THRESHOLD = 64
+
+COLUMNS = ('scheme', 'company_prefix', 'reference', 'serial', 'key')
+
+
+def check_digit(body):
+    '''
+    Computes the GS1 (mod 10) check digit of a key.
+    :param body: The digits of the key without the check digit.
+    :return: The check digit as a string.
+    '''
+    total = sum(map(int, body[-1::-2])) * 3 + sum(map(int, body[-2::-2]))
+    return str(-total % 10)
+
+
+def check_digits(bodies):
+    '''
+    Computes the check digits of a list of keys.
+    :param bodies: A list of the digits of the keys without their check
+    digits.
+    :return: A list of the check digits as strings.
+    '''
+    if numpy is None or len(bodies) < _NUMPY_THRESHOLD:
+        return [check_digit(body) for body in bodies]
+    length = len(bodies[0])
+    if any(len(body) != length for body in bodies):
+        return [check_digit(body) for body in bodies]
+    checks = _get_check_digits(_get_digits(bodies, length)) + 48
+    return list(checks.astype(numpy.uint8).tobytes().decode('ascii'))
+
+
+def validate_check_digits(keys):
+    '''
+    Validates the check digits of a list of GS1 keys.
+    :param keys: A list of keys (e.g. GTIN-14s) including their check
+    digits.
+    :return: A list of booleans, True for each valid key.
+    '''
+    if numpy is None or len(keys) < _NUMPY_THRESHOLD or \
+            any(len(key) != len(keys[0]) for key in keys):
+        return [_is_valid(key) for key in keys]
+    length = len(keys[0])
+    if length < 2:
+        return [False] * len(keys)
+    digits = _get_digits(keys, length)
+    valid = (digits <= 9).all(axis=1)
+    valid &= _get_check_digits(digits[:, :-1]) == digits[:, -1]
+    return valid.tolist()
+
+
+def _is_valid(key):
+    return len(key) > 1 and key.isdigit() and \
+        key[-1] == check_digit(key[:-1])
+
+
+def _get_digits(strings, length):
+    # non-digits wrap around to values above 9
+    return (numpy.frombuffer(''.join(strings).encode('ascii', 'replace'),
+                             dtype=numpy.uint8).reshape(-1, length) - 48)
+
+
+def _get_check_digits(digits):
+    length = digits.shape[1]
+    # the rightmost digit is weighted 3, the next 1 and so on
+    weights = numpy.where(numpy.arange(length)[::-1] % 2 == 0, 3, 1)
+    return -(digits.astype(numpy.int64) @ weights) % 10
+
+
+class DecodedEPCs(object):
+    '''
+    The decoded EPCs of a list, a column (list) for each of the `COLUMNS`.
+    `serial` is None for SSCCs and GIAIs, whose serial or individual asset
+    reference is their `reference`; `key` is the GS1 key of each EPC:
+    the GTIN-14 of SGTINs and LGTINs, the SSCC-18 of SSCCs, the GLN-13 of
+    SGLNs, the GRAI (with its serial) of GRAIs and the GIAI of GIAIs.
+    Undecodable URNs have a row of Nones when they are not strict.
+    '''
+    __slots__ = COLUMNS
+
+    def __init__(self):
+        for column in COLUMNS:
+            setattr(self, column, [])
+
+    def columns(self):
+        '''
+        :return: A dictionary of column name to list.
+        '''
+        return {column: getattr(self, column) for column in COLUMNS}
+
+    def to_numpy(self):
+        '''
+        :return: A dictionary of column name to numpy array (of strings,
+        or objects for columns with None values).
+        '''
+        if numpy is None:
+            raise ImportError('numpy is required to convert decoded EPCs '
+                              'to arrays.')
+        arrays = {}
+        for column, values in self.columns().items():
+            dtype = object if None in values else str
+            arrays[column] = numpy.array(values, dtype=dtype)
+        return arrays
+
+    def rows(self):
+        '''
+        :return: An iterator of `(scheme, company_prefix, reference, serial,
+        key)` tuples.
+        '''
+        return zip(*(getattr(self, column) for column in COLUMNS))
+
+    def __len__(self):
+        return len(self.scheme)
+
+
+@lru_cache(maxsize=4096)
+def decode_prefix(prefix):
+    '''
+    Decodes the part of an EPC URN up to and including its last '.'.  The
+    results are cached since the EPCs of a list usually share a handful of
+    prefixes.
+    :param prefix: The prefix, e.g. 'urn:epc:id:sgtin:0614141.107346.'.
+    :return: A `(scheme, company_prefix, reference, key)` tuple.  For
+    SSCCs and GIAIs the reference and key depend on the serial and are
+    None; for GRAIs the key is completed by appending the serial.
+    :raise ValueError: If the prefix is not one of a supported EPC URN.
+    '''
+    head, colon, fields = prefix.rpartition(':')
+    scheme = _SCHEMES.get(head + colon)
+    parts = fields.split('.')
+    if scheme is None or not parts[0].isdigit() or parts[-1] != '':
+        raise ValueError('Can not decode the EPC URN {0}.'.format(prefix))
+    company_prefix = parts[0]
+    if scheme in (SSCC, GIAI):
+        if len(parts) != 2:
+            raise ValueError('Can not decode the EPC URN {0}.'.format(prefix))
+        return scheme, company_prefix, None, None
+    if len(parts) != 3:
+        raise ValueError('Can not decode the EPC URN {0}.'.format(prefix))
+    reference = parts[1]
+    digits = company_prefix + reference
+    # the location reference of an SGLN can be empty
+    if not (reference.isdigit() or scheme == SGLN and not reference) or \
+            len(digits) != _KEY_LENGTHS[scheme]:
+        raise ValueError('Can not decode the EPC URN {0}.'.format(prefix))
+    if scheme in (SGTIN, LGTIN):
+        # the indicator digit leads the item reference
+        body = reference[:1] + company_prefix + reference[1:]
+    elif scheme == GRAI:
+        body = '0' + digits
+    else:
+        body = digits
+    return scheme, company_prefix, reference, body + check_digit(body)
+
+
+def decode_epc(epc):
+    '''
+    Decodes a single EPC URN (the parent id of an event, for example).
+    :param epc: The URN.
+    :return: A `(scheme, company_prefix, reference, serial, key)` tuple.
+    :raise ValueError: If the URN can not be decoded.
+    '''
+    decoded = decode_epcs([epc])
+    return next(decoded.rows())
+
+
+def decode_epcs(epcs, strict=True):
+    '''
+    Decodes a list of EPC URNs.
+    :param epcs: The URNs; a list (or other iterable) of strings or an
+    `eparsecis.epclist.EPCList`, whose groups are decoded as a whole.
+    :param strict: If True, a URN that can not be decoded raises a
+    ValueError, otherwise its row is all None.
+    :return: A `DecodedEPCs`.
+    :raise ValueError: If a URN can not be decoded and `strict` is set.
+    '''
+    decoded = DecodedEPCs()
+    if isinstance(epcs, EPCList):
+        groups = ((prefix, [str(serial) for serial in serials])
+                  for prefix, serials in epcs.groups())
+    else:
+        groups = _group(epcs)
+    # the SSCCs, whose check digits are computed at the end
+    sscc_rows = []
+    sscc_bodies = []
+    for prefix, serials in groups:
+        try:
+            scheme, company_prefix, reference, key = decode_prefix(prefix)
+            if scheme in (SSCC, GIAI):
+                _check_serials(prefix, scheme, serials)
+        except ValueError:
+            if strict:
+                raise
+            scheme = company_prefix = reference = key = None
+            serials = [None] * len(serials)
+        count = len(serials)
+        decoded.scheme.extend([scheme] * count)
+        decoded.company_prefix.extend([company_prefix] * count)
+        if scheme in (SSCC, GIAI):
+            decoded.reference.extend(serials)
+            decoded.serial.extend([None] * count)
+            if scheme == SSCC:
+                start = len(decoded.key)
+                sscc_rows.extend(range(start, start + count))
+                # the extension digit leads the serial reference
+                sscc_bodies.extend(
+                    serial[:1] + company_prefix + serial[1:]
+                    for serial in serials)
+                decoded.key.extend(sscc_bodies[-count:])
+            else:
+                decoded.key.extend(company_prefix + serial
+                                   for serial in serials)
+        else:
+            decoded.reference.extend([reference] * count)
+            decoded.serial.extend(serials)
+            if scheme == GRAI:
+                decoded.key.extend(key + serial for serial in serials)
+            else:
+                decoded.key.extend([key] * count)
+    keys = decoded.key
+    for row, digit in zip(sscc_rows, check_digits(sscc_bodies)):
+        keys[row] += digit
+    return decoded
+
+
+def _group(epcs):
+    '''
+    Groups consecutive EPCs by their prefix.
+    '''
+    prefix = None
+    serials = []
+    for epc in epcs:
+        epc_prefix, serial = _split_epc(epc)
+        if epc_prefix != prefix:
+            if serials:
+                yield prefix, serials
+            prefix = epc_prefix
+            serials = []
+        serials.append(serial)
+    if serials:
+        yield prefix, serials
+
+
+def _check_serials(prefix, scheme, serials):
+    '''
+    Checks the serial references of SSCCs and the individual asset
+    references of GIAIs, which are not part of their prefix.
+    '''
+    company_prefix = prefix.rpartition(':')[2][:-1]
+    for serial in serials:
+        if scheme == SSCC and (not serial.isdigit() or
+                               len(company_prefix + serial) != 17) or \
+                scheme == GIAI and not serial:
+            raise ValueError('Can not decode the EPC URN {0}.'.format(
+                prefix + serial))
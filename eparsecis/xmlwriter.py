@@ -0,0 +1,462 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2018 SerialLab Corp.  All rights reserved.
+'''
+Writes EPCIS 1.2 XML documents incrementally with lxml's `etree.xmlfile`.
+Each event is serialized as it is written, so a document is re-emitted or
+filtered in a single streaming pass without the per-event Jinja rendering
+of EPCPyYes' `render()`.  The elements are written in the order of the
+EPCPyYes templates.
+
+    with EPCISWriter('filtered.xml') as writer:
+        for kind, event in EPCISParser('events.xml').iter_events():
+            if kind != 'ObjectEvent' or event.action != 'DELETE':
+                writer.write(kind, event)
+'''
+import datetime
+from xml.sax.saxutils import escape
+
+from lxml import etree
+
+EPCIS_NAMESPACE = 'urn:epcglobal:epcis:xsd:1'
+CBV_MDA_NAMESPACE = 'urn:epcglobal:cbv:mda'
+SBDH_NAMESPACE = \
+    'http://www.unece.org/cefact/namespaces/StandardBusinessDocumentHeader'
+
+HEADER = 'StandardBusinessDocumentHeader'
+
+_EVENT_KINDS = ('ObjectEvent', 'AggregationEvent', 'TransactionEvent',
+                'TransformationEvent')
+
+
+def _value(value):
+    # enumerations (e.g. the EPCPyYes actions) are written by value
+    return str(getattr(value, 'value', value))
+
+
+def _text(parent, tag, value):
+    # missing values are left out instead of being written as 'None'
+    if value is None:
+        return None
+    element = etree.SubElement(parent, tag)
+    element.text = _value(value)
+    return element
+
+
+def _set_attribute(element, name, value):
+    if element is not None and value is not None:
+        element.set(name, _value(value))
+
+
+def _add_epc_list(parent, tag, epcs):
+    if epcs:
+        # creating an element per EPC is several times slower than having
+        # libxml2 parse the markup of the whole list
+        text = ''.join(epcs)
+        if '&' in text or '<' in text or '>' in text:
+            epcs = [escape(epc) for epc in epcs]
+        parent.append(etree.fromstring('<{0}><epc>{1}</epc></{0}>'.format(
+            tag, '</epc><epc>'.join(epcs))))
+
+
+def _add_quantity_list(parent, tag, quantity_list):
+    if quantity_list:
+        element = etree.SubElement(parent, tag)
+        for quantity_element in quantity_list:
+            child = etree.SubElement(element, 'quantityElement')
+            _text(child, 'epcClass', quantity_element.epc_class)
+            _text(child, 'quantity', quantity_element.quantity)
+            if quantity_element.uom:
+                _text(child, 'uom', quantity_element.uom)
+
+
+def _add_times(parent, epcis_event):
+    _text(parent, 'eventTime', epcis_event.event_time)
+    if epcis_event.record_time:
+        _text(parent, 'recordTime', epcis_event.record_time)
+    if epcis_event.event_timezone_offset:
+        _text(parent, 'eventTimeZoneOffset',
+              epcis_event.event_timezone_offset)
+    error_declaration = epcis_event.error_declaration
+    if epcis_event.event_id or error_declaration:
+        base_extension = etree.SubElement(parent, 'baseExtension')
+        if epcis_event.event_id:
+            _text(base_extension, 'eventID', epcis_event.event_id)
+        if error_declaration:
+            element = etree.SubElement(base_extension, 'errorDeclaration')
+            if error_declaration.declaration_time:
+                _text(element, 'declarationTime',
+                      error_declaration.declaration_time)
+            if error_declaration.reason:
+                _text(element, 'reason', error_declaration.reason)
+            if error_declaration.corrective_event_ids:
+                ids = etree.SubElement(element, 'correctiveEventIDs')
+                for event_id in error_declaration.corrective_event_ids:
+                    _text(ids, 'correctiveEventID', event_id)
+
+
+def _add_what(parent, epcis_event):
+    # TransformationEvents have no action
+    action = getattr(epcis_event, 'action', None)
+    if action:
+        _text(parent, 'action', action)
+    if epcis_event.biz_step:
+        _text(parent, 'bizStep', epcis_event.biz_step)
+    if epcis_event.disposition:
+        _text(parent, 'disposition', epcis_event.disposition)
+    if epcis_event.read_point:
+        _text(etree.SubElement(parent, 'readPoint'), 'id',
+              epcis_event.read_point)
+    if epcis_event.biz_location:
+        _text(etree.SubElement(parent, 'bizLocation'), 'id',
+              epcis_event.biz_location)
+
+
+def _add_business_transactions(parent, epcis_event):
+    if epcis_event.business_transaction_list:
+        element = etree.SubElement(parent, 'bizTransactionList')
+        for transaction in epcis_event.business_transaction_list:
+            _set_attribute(_text(element, 'bizTransaction',
+                                 transaction.biz_transaction),
+                           'type', transaction.type)
+
+
+def _add_sources_and_destinations(parent, epcis_event):
+    if epcis_event.source_list:
+        element = etree.SubElement(parent, 'sourceList')
+        for source in epcis_event.source_list:
+            _set_attribute(_text(element, 'source', source.source),
+                           'type', source.type)
+    if epcis_event.destination_list:
+        element = etree.SubElement(parent, 'destinationList')
+        for destination in epcis_event.destination_list:
+            _set_attribute(_text(element, 'destination',
+                                 destination.destination),
+                           'type', destination.type)
+
+
+def _add_ilmd(parent, epcis_event):
+    ilmd = getattr(epcis_event, 'ilmd', None)
+    if ilmd:
+        element = etree.SubElement(parent, 'ilmd')
+        for attribute in ilmd:
+            name = _value(attribute.name)
+            # the parsers keep the local names of the CBV attributes
+            tag = name if '}' in name else \
+                '{%s}%s' % (CBV_MDA_NAMESPACE, name)
+            _text(element, tag, attribute.value)
+
+
+def _add_extension(parent, epcis_event):
+    child_quantity_list = getattr(epcis_event, 'child_quantity_list', None)
+    quantity_list = getattr(epcis_event, 'quantity_list', None)
+    if child_quantity_list or quantity_list or epcis_event.source_list or \
+            epcis_event.destination_list or getattr(epcis_event, 'ilmd', None):
+        extension = etree.SubElement(parent, 'extension')
+        _add_quantity_list(extension, 'childQuantityList',
+                           child_quantity_list)
+        _add_quantity_list(extension, 'quantityList', quantity_list)
+        _add_sources_and_destinations(extension, epcis_event)
+        _add_ilmd(extension, epcis_event)
+
+
+def event_element(kind, epcis_event):
+    '''
+    Creates the XML element of an event.
+    :param kind: The type of the event, e.g. 'ObjectEvent'.
+    :param epcis_event: The event record or EPCPyYes event.
+    :return: An lxml element.
+    '''
+    # the CBV master data namespace is only declared for the ILMD
+    element = etree.Element(
+        kind, nsmap={'cbvmd': CBV_MDA_NAMESPACE}
+        if getattr(epcis_event, 'ilmd', None) else None)
+    _add_times(element, epcis_event)
+    if kind == 'ObjectEvent':
+        _add_epc_list(element, 'epcList', epcis_event.epc_list)
+        _add_what(element, epcis_event)
+        _add_business_transactions(element, epcis_event)
+        _add_extension(element, epcis_event)
+    elif kind == 'AggregationEvent':
+        if epcis_event.parent_id:
+            _text(element, 'parentID', epcis_event.parent_id)
+        _add_epc_list(element, 'childEPCs', epcis_event.child_epcs)
+        _add_what(element, epcis_event)
+        _add_business_transactions(element, epcis_event)
+        _add_extension(element, epcis_event)
+    elif kind == 'TransactionEvent':
+        _add_business_transactions(element, epcis_event)
+        if epcis_event.parent_id:
+            _text(element, 'parentID', epcis_event.parent_id)
+        _add_epc_list(element, 'epcList', epcis_event.epc_list)
+        _add_what(element, epcis_event)
+        _add_extension(element, epcis_event)
+    elif kind == 'TransformationEvent':
+        _add_epc_list(element, 'inputEPCList', epcis_event.input_epc_list)
+        _add_quantity_list(element, 'inputQuantityList',
+                           epcis_event.input_quantity_list)
+        _add_epc_list(element, 'outputEPCList', epcis_event.output_epc_list)
+        _add_quantity_list(element, 'outputQuantityList',
+                           epcis_event.output_quantity_list)
+        if epcis_event.transformation_id:
+            _text(element, 'transformationID', epcis_event.transformation_id)
+        _add_what(element, epcis_event)
+        _add_business_transactions(element, epcis_event)
+        _add_sources_and_destinations(element, epcis_event)
+        _add_ilmd(element, epcis_event)
+    else:
+        raise ValueError('Unknown event type {0}.'.format(kind))
+    return element
+
+
+def header_element(header, namespace=SBDH_NAMESPACE):
+    '''
+    Creates the XML element of a standard business document header.
+    :param header: The header record or EPCPyYes header.
+    :param namespace: The namespace of the header elements.
+    :return: An lxml element.
+    '''
+    def tag(name):
+        return '{%s}%s' % (namespace, name)
+
+    element = etree.Element(tag(HEADER), nsmap={'sbdh': namespace})
+    if header.header_version:
+        _text(element, tag('HeaderVersion'), header.header_version)
+    for partner in header.partners or ():
+        child = etree.SubElement(element, tag(_value(partner.partner_type)))
+        if partner.partner_id:
+            _set_attribute(
+                _text(child, tag('Identifier'), partner.partner_id.value),
+                'Authority', partner.partner_id.authority)
+        contact_information = [
+            (name, value) for name, value in (
+                ('Contact', partner.contact),
+                ('EmailAddress', partner.email_address),
+                ('FaxNumber', partner.fax_number),
+                ('TelephoneNumber', partner.telephone_number),
+                ('ContactTypeIdentifier', partner.contact_type_identifier))
+            if value]
+        if contact_information:
+            information = etree.SubElement(child, tag('ContactInformation'))
+            for name, value in contact_information:
+                _text(information, tag(name), value)
+    identification = header.document_identification
+    if identification:
+        child = etree.SubElement(element, tag('DocumentIdentification'))
+        for name, value in (
+                ('Standard', identification.standard),
+                ('TypeVersion', identification.type_version),
+                ('InstanceIdentifier', identification.instance_identifier),
+                ('Type', identification.document_type),
+                ('MultipleType', identification.multiple_type),
+                ('CreationDateAndTime',
+                 identification.creation_date_and_time)):
+            if value:
+                _text(child, tag(name), value)
+    return element
+
+
+def get_events(events):
+    '''
+    :param events: An iterator of `(kind, object)` tuples or a parser.
+    :return: The iterator or the parser's `iter_events()`.
+    :raises ValueError: If the parser has an `epc_chunk_size`, the EPCs of
+    its events are only handed to its `handle_epc_chunk` method.
+    '''
+    if not hasattr(events, 'iter_events'):
+        return events
+    if events.epc_chunk_size:
+        raise ValueError('The events of a parser with an epc_chunk_size '
+                         'can not be written, their EPC lists are empty.')
+    return events.iter_events()
+
+
+def get_kind(epcis_object):
+    '''
+    :param epcis_object: An event or header (record or EPCPyYes object).
+    :return: The kind the parsers yield the object as, e.g. 'ObjectEvent'.
+    Subclasses of the records and EPCPyYes classes have the kind of the
+    class they derive from.
+    :raises ValueError: If the object is not an event or header.
+    '''
+    for cls in type(epcis_object).__mro__:
+        name = cls.__name__
+        if name.endswith('Record'):
+            name = name[:-len('Record')]
+        if name in _EVENT_KINDS or name == HEADER:
+            return name
+    raise ValueError('Unknown event type {0}.'.format(
+        type(epcis_object).__name__))
+
+
+def tostring(epcis_object, kind=None):
+    '''
+    Serializes a single event or header, e.g. for logging.
+    :param epcis_object: The event or header.
+    :param kind: The kind of the object (see `get_kind`).
+    :return: A string.
+    '''
+    kind = kind or get_kind(epcis_object)
+    if kind == HEADER:
+        element = header_element(epcis_object)
+    else:
+        element = event_element(kind, epcis_object)
+    return etree.tostring(element, encoding='unicode')
+
+
+class EPCISWriter(object):
+    '''
+    Writes an EPCIS document incrementally.  The envelope is written with
+    the first header or event, the header (if any) must be written before
+    the first event and runs of TransformationEvents are wrapped in the
+    `extension` element the EPCIS 1.2 schema requires.  Call `close` (or
+    use the writer as a context manager) to finish the document.  When
+    the context is left with an exception the document is left
+    unfinished, so that it can not be mistaken for a complete one.
+    :param stream: A path or a binary file object.
+    :param creation_date: The creation date of the document, now by
+    default.
+    :param header_namespace: The namespace of the header elements.
+    :param encoding: The encoding of the document.
+    '''
+
+    def __init__(self, stream, creation_date=None,
+                 header_namespace=SBDH_NAMESPACE, encoding='UTF-8'):
+        if hasattr(stream, '__fspath__'):
+            stream = stream.__fspath__()
+        self._xmlfile = etree.xmlfile(stream, encoding=encoding)
+        self._creation_date = creation_date
+        self._header_namespace = header_namespace
+        self._file = None
+        # the open element contexts, innermost last
+        self._contexts = []
+        self._in_body = False
+        self._in_extension = False
+        self.events = 0
+
+    def _enter(self, tag, attrib=None, nsmap=None):
+        context = self._file.element(tag, attrib or {}, nsmap=nsmap)
+        context.__enter__()
+        self._contexts.append(context)
+
+    def _exit(self):
+        self._contexts.pop().__exit__(None, None, None)
+
+    def _start(self):
+        self._file = self._xmlfile.__enter__()
+        self._file.write_declaration()
+        creation_date = self._creation_date or \
+            datetime.datetime.now(datetime.timezone.utc).isoformat()
+        self._enter('{%s}EPCISDocument' % EPCIS_NAMESPACE,
+                    {'schemaVersion': '1.2',
+                     'creationDate': _value(creation_date)},
+                    nsmap={'epcis': EPCIS_NAMESPACE,
+                           'cbvmd': CBV_MDA_NAMESPACE})
+
+    def write_header(self, header):
+        '''
+        Writes the standard business document header.
+        :param header: The header record or EPCPyYes header.
+        :return: None
+        :raise ValueError: If an event was already written.
+        '''
+        if self._in_body:
+            raise ValueError('The header must be written before the events.')
+        if self._file is None:
+            self._start()
+        self._enter('EPCISHeader')
+        self._file.write(header_element(header, self._header_namespace))
+        self._exit()
+
+    def write(self, kind, epcis_object):
+        '''
+        Writes an event or the header.
+        :param kind: The kind of the object as the parsers yield it, e.g.
+        'ObjectEvent' or 'StandardBusinessDocumentHeader'.  Other kinds are
+        ignored.
+        :param epcis_object: The record or EPCPyYes object.
+        :return: None
+        '''
+        if kind == HEADER:
+            self.write_header(epcis_object)
+            return
+        if kind not in _EVENT_KINDS:
+            return
+        if self._file is None:
+            self._start()
+        if not self._in_body:
+            self._enter('EPCISBody')
+            self._enter('EventList')
+            self._in_body = True
+        if (kind == 'TransformationEvent') != self._in_extension:
+            if self._in_extension:
+                self._exit()
+            else:
+                self._enter('extension')
+            self._in_extension = not self._in_extension
+        self._file.write(event_element(kind, epcis_object))
+        self.events += 1
+
+    def write_events(self, events):
+        '''
+        Writes the objects of an iterator of `(kind, object)` tuples, e.g. a
+        parser's `iter_events()`, or of a parser.
+        :param events: The iterator or parser.
+        :return: The number of events written.
+        :raises ValueError: If the parser has an `epc_chunk_size`; the EPC
+        lists of its events are empty.
+        '''
+        events = get_events(events)
+        written = self.events
+        for kind, epcis_object in events:
+            self.write(kind, epcis_object)
+        return self.events - written
+
+    def close(self):
+        '''
+        Finishes the document.
+        :return: None
+        '''
+        if self._file is None:
+            self._start()
+        if not self._in_body:
+            self._enter('EPCISBody')
+            self._enter('EventList')
+            self._in_body = True
+        while self._contexts:
+            self._exit()
+        if self._xmlfile is not None:
+            self._xmlfile.__exit__(None, None, None)
+            self._xmlfile = None
+
+    def abort(self):
+        '''
+        Stops writing without finishing the document, whose open elements
+        are not closed.  Paths are closed.
+        :return: None
+        '''
+        if self._file is not None and self._xmlfile is not None:
+            error = ValueError('The document was not finished.')
+            self._xmlfile.__exit__(ValueError, error, None)
+            self._xmlfile = None
+        self._contexts = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
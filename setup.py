@@ -16,6 +16,13 @@ requirements = [
 
 test_requirements = []
 
+extras_requirements = {
+    'zstd': ['zstandard'],
+    'numpy': ['numpy'],
+    'arrow': ['numpy', 'pyarrow'],
+    'json': ['ijson'],
+}
+
 setup(
     name='eparsecis',
     version='3.1.0',
@@ -25,12 +32,13 @@ setup(
     author_email='slab@serial-lab.com',
     maintainer="SerialLab Corp",
     url='https://gitlab.com/serial-lab/eparsecis',
-    packages=find_packages(),
+    packages=find_packages(exclude=['benchmarks']),
     package_dir={'eparsecis':
                  'eparsecis'},
     entry_points={},
     include_package_data=True,
     install_requires=requirements,
+    extras_require=extras_requirements,
     license="GNU General Public License v3",
     zip_safe=False,
     keywords='eparsecis',
@@ -0,0 +1,102 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2018 SerialLab Corp.  All rights reserved.
+
+import asyncio
+import os
+import unittest
+
+from eparsecis import aio, eparsecis
+
+
+class AsyncChunks(object):
+    '''
+    An asynchronous iterable of the chunks of `data`, written as a class
+    since asynchronous generators require python 3.6.
+    '''
+
+    def __init__(self, data, size):
+        self.chunks = iter(range(0, len(data), size))
+        self.data = memoryview(data)
+        self.size = size
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await asyncio.sleep(0)
+        for start in self.chunks:
+            return self.data[start:start + self.size]
+        raise StopAsyncIteration
+
+
+async def collect(parser, **kwargs):
+    events = []
+    async for parsed in parser.iter_events_async(**kwargs):
+        events.append(parsed)
+    return events
+
+
+async def collect_all(parsers, **kwargs):
+    return await asyncio.gather(
+        *[collect(parser, **kwargs) for parser in parsers])
+
+
+async def read_stream(data, **kwargs):
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    parser = aio.AsyncFlexibleNSParser(reader, fast_records=True)
+    return await collect(parser, **kwargs)
+
+
+class TestAsyncParsers(unittest.TestCase):
+
+    def setUp(self):
+        curpath = os.path.dirname(__file__)
+        self.paths = [os.path.join(curpath, 'data', name)
+                      for name in ('epcis.xml', 'prefixed.xml')]
+        # on python 3.5 StreamReader and gather use the loop returned by
+        # get_event_loop
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        asyncio.set_event_loop(None)
+        self.loop.close()
+
+    def test_stream_reader(self):
+        for path in self.paths:
+            with open(path, 'rb') as stream:
+                data = stream.read()
+            events = self.loop.run_until_complete(
+                read_stream(data, chunk_size=7))
+            self.assertEqual(events, list(eparsecis.FlexibleNSParser(
+                path, fast_records=True).iter_events()))
+
+    def test_concurrent_iterables(self):
+        parsers = []
+        for path in self.paths * 3:
+            with open(path, 'rb') as stream:
+                parsers.append(aio.AsyncEPCISParser(
+                    AsyncChunks(stream.read(), 100), fast_records=True))
+        results = self.loop.run_until_complete(
+            collect_all(parsers, handle_unexpected=True))
+        for path, events in zip(self.paths * 3, results):
+            self.assertEqual(events, list(eparsecis.EPCISParser(
+                path, fast_records=True).iter_events()))
+
+
+if __name__ == '__main__':
+    unittest.main()
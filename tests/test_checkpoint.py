@@ -0,0 +1,134 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2018 SerialLab Corp.  All rights reserved.
+
+import gzip
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from eparsecis import checkpoint, eparsecis, jsonld, scanner
+
+
+class Interrupted(Exception):
+    pass
+
+
+class FailingParser(eparsecis.EPCISParser):
+    '''
+    Fails while handling the AggregationEvent of the test document.
+    '''
+
+    def handle_aggregation_event(self, epcis_event):
+        raise Interrupted()
+
+
+class TestCheckpoints(unittest.TestCase):
+
+    def setUp(self):
+        curpath = os.path.dirname(__file__)
+        self.path = os.path.join(curpath, 'data/epcis.xml')
+        with open(self.path, 'rb') as stream:
+            self.data = stream.read()
+        self.expected = list(eparsecis.EPCISParser(
+            self.path, fast_records=True).iter_events())
+        self.directory = tempfile.mkdtemp()
+        self.store = checkpoint.FileCheckpointStore(
+            os.path.join(self.directory, 'checkpoints.json'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def interrupt(self, source):
+        with self.assertRaises(Interrupted):
+            FailingParser(source, fast_records=True,
+                          checkpoint_store=self.store,
+                          checkpoint_interval=1).parse(resume=True)
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        return list(eparsecis.EPCISParser(
+            source, fast_records=True,
+            checkpoint_store=self.store).iter_events(resume=True))
+
+    def test_resume(self):
+        gzip_path = os.path.join(self.directory, 'epcis.xml.gz')
+        with open(gzip_path, 'wb') as stream:
+            stream.write(gzip.compress(self.data))
+        # the scanned file, the skipped elements of a compressed file and
+        # of a file object
+        for source in (self.path, gzip_path, io.BytesIO(self.data)):
+            document = checkpoint.get_document_id(source)
+            self.assertEqual(self.interrupt(source), self.expected[2:])
+            self.assertEqual(self.store.load(document).ordinal, 5)
+            # the resumed parse follows the position in the document too
+            self.assertIsNotNone(self.store.load(document).position)
+            # the document is done, nothing is handled again
+            if hasattr(source, 'seek'):
+                source.seek(0)
+            self.assertEqual(list(eparsecis.EPCISParser(
+                source, fast_records=True, checkpoint_store=self.store,
+            ).iter_events(resume=True)), [])
+            self.store.clear(document)
+            self.assertIsNone(self.store.load(document))
+
+    def test_interval(self):
+        parser = eparsecis.EPCISParser(self.path, fast_records=True,
+                                       checkpoint_store=self.store,
+                                       checkpoint_interval=1000)
+        events = parser.iter_events()
+        next(events)
+        next(events)
+        # the first event is handled once the second one is asked for
+        events.close()
+        saved = self.store.load(checkpoint.get_document_id(self.path))
+        self.assertEqual(saved.ordinal, 1)
+        self.assertGreater(saved.position, 0)
+        self.assertEqual(list(eparsecis.EPCISParser(
+            self.path, fast_records=True).iter_events(resume=saved)),
+            self.expected[1:])
+
+    def test_json(self):
+        path = os.path.join(os.path.dirname(__file__), 'data/epcis.jsonld')
+        expected = list(jsonld.JSONParser(
+            path, fast_records=True).iter_events())
+        events = jsonld.JSONParser(path, fast_records=True,
+                                   checkpoint_store=self.store).iter_events()
+        next(events)
+        next(events)
+        events.close()
+        self.assertEqual(list(jsonld.JSONParser(
+            path, fast_records=True, checkpoint_store=self.store,
+        ).iter_events(resume=True)), expected[1:])
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            eparsecis.EPCISParser(self.path).parse(resume=True)
+        with self.assertRaises(ValueError):
+            eparsecis.EPCISParser(
+                '/nonexistent.xml', checkpoint_store=self.store).parse()
+
+    def test_seek_event(self):
+        self.assertIsNone(scanner.seek_event(self.data, 6))
+        for ordinal in range(1, 6):
+            head, offset = scanner.seek_event(self.data, ordinal)
+            self.assertEqual(list(eparsecis.EPCISParser(
+                io.BytesIO(head + self.data[offset:]),
+                fast_records=True).iter_events()),
+                self.expected[ordinal:])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2018 SerialLab Corp.  All rights reserved.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from eparsecis import columnar, eparsecis
+
+
+@unittest.skipIf(columnar.numpy is None, 'numpy is not installed')
+class TestColumnar(unittest.TestCase):
+
+    def setUp(self):
+        curpath = os.path.dirname(__file__)
+        self.path = os.path.join(curpath, 'data/epcis.xml')
+        self.expected = [
+            (kind, epcis_event) for kind, epcis_event in
+            eparsecis.EPCISParser(self.path, fast_records=True).iter_events()
+            if kind.endswith('Event')]
+
+    def get_batches(self, **kwargs):
+        return list(columnar.iter_batches(eparsecis.EPCISParser(
+            self.path, **kwargs), batch_size=3))
+
+    def test_batches(self):
+        for fast_records in (True, False):
+            batches = self.get_batches(fast_records=fast_records)
+            self.assertEqual([len(batch) for batch in batches], [3, 1])
+            events = batches[0].events
+            self.assertEqual(list(events['row']), [0, 1, 2])
+            self.assertEqual(list(events['event_type']), [
+                kind for kind, epcis_event in self.expected[:3]])
+            self.assertEqual(list(events['biz_step']), [
+                epcis_event.biz_step for kind, epcis_event in
+                self.expected[:3]])
+            self.assertEqual(str(events['event_time'][0]),
+                             '2018-01-22T22:51:49.294565')
+            epcs = batches[1].epcs
+            self.assertEqual(batches[1].events['row'][0], 3)
+            self.assertEqual(set(epcs['event']), {3})
+            inputs = epcs['epc'][epcs['list'] == b'input']
+            self.assertEqual([epc.decode() for epc in inputs],
+                             list(self.expected[3][1].input_epc_list))
+            self.assertEqual(
+                sum(batch.events['epc_count'].sum() for batch in batches),
+                sum(len(batch.epcs) for batch in batches))
+
+    def test_epc_chunks(self):
+        expected = self.get_batches(fast_records=True)
+        batches = self.get_batches(fast_records=True, epc_chunk_size=3)
+        self.assertEqual(len(batches), len(expected))
+        for batch, expected_batch in zip(batches, expected):
+            self.assertEqual(list(batch.events['epc_count']),
+                             list(expected_batch.events['epc_count']))
+            self.assertEqual(batch.epcs.tolist(), expected_batch.epcs.tolist())
+
+    def test_datetimes(self):
+        times = columnar.to_datetime64(['2018-01-22T22:51:49.5-05:30',
+                                        '2018-01-22T22:51:49Z', None])
+        self.assertEqual([str(time) for time in times],
+                         ['2018-01-23T04:21:49.500000',
+                          '2018-01-22T22:51:49.000000', 'NaT'])
+
+    @unittest.skipIf(columnar.pyarrow is None, 'pyarrow is not installed')
+    def test_parquet(self):
+        directory = tempfile.mkdtemp()
+        try:
+            events_path = os.path.join(directory, 'events.parquet')
+            epcs_path = os.path.join(directory, 'epcs.parquet')
+            self.assertEqual(columnar.write_parquet(
+                eparsecis.EPCISParser(self.path, fast_records=True),
+                events_path, epcs_path, batch_size=3), 4)
+            events = columnar.pyarrow.parquet.read_table(events_path)
+            epcs = columnar.pyarrow.parquet.read_table(epcs_path)
+        finally:
+            shutil.rmtree(directory)
+        self.assertEqual(events.column('event_type').to_pylist(),
+                         [kind for kind, epcis_event in self.expected])
+        self.assertEqual(str(events.schema.field('event_time').type),
+                         'timestamp[us, tz=UTC]')
+        self.assertEqual(epcs.num_rows, 35)
+        self.assertEqual(epcs.column('epc').to_pylist()[:5],
+                         list(self.expected[0][1].epc_list))
+
+
+if __name__ == '__main__':
+    unittest.main()
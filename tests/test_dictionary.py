@@ -0,0 +1,87 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2018 SerialLab Corp.  All rights reserved.
+
+import os
+import unittest
+
+from eparsecis import eparsecis
+from eparsecis.dictionary import FieldStats, ValueDictionary
+
+
+class TestValueDictionary(unittest.TestCase):
+
+    def setUp(self):
+        curpath = os.path.dirname(__file__)
+        self.paths = [os.path.join(curpath, 'data', name)
+                      for name in ('epcis.xml', 'prefixed.xml')]
+
+    def test_encode(self):
+        dictionary = ValueDictionary()
+        first = dictionary.encode('biz_step', ''.join(['ship', 'ping']))
+        second = dictionary.encode('biz_step', ''.join(['shipp', 'ing']))
+        self.assertIs(first, second)
+        dictionary.encode('biz_step', 'receiving')
+        dictionary.encode('action', 'ADD')
+        self.assertEqual(dictionary.code('biz_step', 'receiving'), 1)
+        self.assertIsNone(dictionary.code('biz_step', 'packing'))
+        self.assertEqual(dictionary.decode('biz_step', 0), 'shipping')
+        self.assertEqual(dictionary.values('biz_step'),
+                         ['shipping', 'receiving'])
+        self.assertEqual(dictionary.stats(),
+                         {'biz_step': FieldStats(2, 3),
+                          'action': FieldStats(1, 1)})
+        self.assertEqual(len(dictionary), 3)
+
+    def test_parsers(self):
+        # the EPCISParser does not parse the events of prefixed.xml
+        for parser_class, path in (
+                (eparsecis.EPCISParser, self.paths[0]),
+                (eparsecis.FlexibleNSParser, self.paths[0]),
+                (eparsecis.FlexibleNSParser, self.paths[1])):
+            # the values are unchanged
+            self.assertEqual(
+                list(parser_class(
+                    path, fast_records=True,
+                    value_dictionary=True).iter_events()),
+                list(parser_class(path, fast_records=True).iter_events()))
+            dictionary = ValueDictionary(codes=True)
+            events = list(parser_class(
+                path, fast_records=True,
+                value_dictionary=dictionary).iter_events())
+            stats = dictionary.stats()
+            self.assertEqual(stats['read_point'].distinct, 1)
+            # each event but the header has a business step
+            self.assertEqual(stats['biz_step'].occurrences, len(events) - 1)
+            for kind, event in events:
+                if kind == 'StandardBusinessDocumentHeader':
+                    continue
+                self.assertTrue(event.value_codes)
+                for attribute, code in event.value_codes.items():
+                    self.assertIs(getattr(event, attribute),
+                                  dictionary.decode(attribute, code))
+
+    def test_shared(self):
+        dictionary = ValueDictionary()
+        for path in self.paths:
+            eparsecis.FlexibleNSParser(
+                path, value_dictionary=dictionary).parse()
+        self.assertEqual(dictionary.stats()['read_point'],
+                         FieldStats(2, 6))
+        parser = eparsecis.EPCISParser(self.paths[0], value_dictionary=True)
+        self.assertIsInstance(parser.value_dictionary, ValueDictionary)
+
+
+if __name__ == '__main__':
+    unittest.main()
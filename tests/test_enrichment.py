@@ -0,0 +1,110 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2018 SerialLab Corp.  All rights reserved.
+
+import os
+import unittest
+
+from eparsecis import eparsecis
+from eparsecis.enrichment import Enricher, MasterDataCache
+
+
+class EnrichedParser(eparsecis.EPCISParser):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.master_data = []
+
+    def handle_object_event(self, epcis_event):
+        self.master_data.append(epcis_event.master_data)
+
+    def handle_aggregation_event(self, epcis_event):
+        self.master_data.append(epcis_event.master_data)
+
+    def handle_transaction_event(self, epcis_event):
+        self.master_data.append(epcis_event.master_data)
+
+
+class TestEnrichment(unittest.TestCase):
+
+    def setUp(self):
+        curpath = os.path.dirname(__file__)
+        self.path = os.path.join(curpath, 'data/epcis.xml')
+        self.mdd = os.path.join(curpath, 'data/mdd.xml')
+        self.loaded = []
+
+    def load(self, key):
+        self.loaded.append(key)
+        return key.upper() if key.startswith('urn:epc:id') else None
+
+    def test_lru(self):
+        cache = MasterDataCache(self.load, maxsize=2)
+        self.assertEqual(cache.get('urn:epc:id:a'), 'URN:EPC:ID:A')
+        self.assertIsNone(cache.get('b'))
+        cache.get('urn:epc:id:a')
+        # b is the least recently used id
+        cache.get('c')
+        self.assertIn('urn:epc:id:a', cache)
+        self.assertNotIn('b', cache)
+        cache.get('b')
+        self.assertEqual(self.loaded, ['urn:epc:id:a', 'b', 'c', 'b'])
+        stats = cache.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.evictions,
+                          stats.size, stats.maxsize), (1, 4, 2, 2, 2))
+        self.assertEqual(stats.hit_rate, 0.2)
+
+    def test_prewarm_from_file(self):
+        cache = MasterDataCache(self.load)
+        self.assertEqual(cache.prewarm_from_file(self.mdd), 3)
+        record = cache.get('urn:epc:id:sgln:0614141.00300.1')
+        self.assertEqual(record.vocabulary_type,
+                         'urn:epcglobal:epcis:vtype:ReadPoint')
+        self.assertEqual(self.loaded, [])
+        self.assertEqual(len(cache), 3)
+
+    def check(self, fast_records):
+        cache = MasterDataCache(self.load)
+        parser = EnrichedParser(self.path, fast_records=fast_records,
+                                enricher=Enricher(cache))
+        parser.parse()
+        self.assertTrue(parser.master_data)
+        read_point = 'urn:epc:id:sgln:305555.123456.12'
+        self.assertEqual(parser.master_data[0][read_point],
+                         read_point.upper())
+        for master_data in parser.master_data:
+            for key, value in master_data.items():
+                self.assertEqual(value, self.load(key))
+        # each id is loaded once
+        self.assertEqual(len(cache), len(set(self.loaded)))
+        self.assertGreater(cache.stats().hits, 0)
+
+    def test_records(self):
+        self.check(True)
+
+    def test_epcpyyes(self):
+        self.check(False)
+
+    def test_disabled_lookups(self):
+        enricher = Enricher(MasterDataCache(self.load), read_point=False,
+                            biz_location=False, epc_class=False)
+        parser = EnrichedParser(self.path, fast_records=True,
+                                enricher=enricher)
+        parser.parse()
+        self.assertEqual(parser.master_data,
+                         [{}] * len(parser.master_data))
+        self.assertEqual(self.loaded, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -20,8 +20,10 @@ import os
 import logging
 import unittest
 
+from lxml import etree
 from EPCPyYes.core.v1_2 import template_events
 from eparsecis import eparsecis
+from eparsecis.fields import TextField
 
 
 class TestParser(eparsecis.EPCISParser):
@@ -38,6 +40,33 @@ class TestParser(eparsecis.EPCISParser):
             assert (ilmd.value == 'DL232' or '2015-12-31')
 
 
+class UnexpectedElementParser(eparsecis.EPCISParser):
+
+    def __init__(self, stream):
+        super().__init__(stream)
+        self.unexpected = []
+
+    def handle_unexpected_element(self, event, element):
+        self.unexpected.append(element.tag)
+
+
+class ExtendedFieldsParser(eparsecis.EPCISParser):
+    object_event_fields = dict(
+        eparsecis.EPCISParser.object_event_fields,
+        action=TextField('custom_action'),
+    )
+
+
+class ChunkParser(eparsecis.FlexibleNSParser):
+
+    def __init__(self, stream):
+        super().__init__(stream, fast_records=True, epc_chunk_size=2)
+        self.chunks = []
+
+    def handle_epc_chunk(self, epcis_event, attribute, epcs):
+        self.chunks.append((epcis_event, attribute, epcs))
+
+
 class TestEparsecis(unittest.TestCase):
     def __init__(self, methodName='runTest'):
         super().__init__(methodName)
@@ -61,5 +90,129 @@ class TestEparsecis(unittest.TestCase):
             os.path.join(curpath, 'data/no-cbv-namespace.xml'))
         parser.parse()
 
+    def test_iter_events(self):
+        curpath = os.path.dirname(__file__)
+        parser = eparsecis.EPCISParser(
+            os.path.join(curpath, 'data/epcis.xml'))
+        kinds = [kind for kind, epcis_event in parser.iter_events()]
+        self.assertEqual(kinds, ['StandardBusinessDocumentHeader',
+                                 'ObjectEvent', 'AggregationEvent',
+                                 'TransactionEvent', 'TransformationEvent'])
+
+    def test_iter_events_stop_early(self):
+        curpath = os.path.dirname(__file__)
+        parser = eparsecis.FlexibleNSParser(
+            os.path.join(curpath, 'data/no-cbv-namespace.xml'))
+        events = parser.iter_events()
+        next(events)
+        kind, epcis_event = next(events)
+        events.close()
+        self.assertEqual(kind, 'ObjectEvent')
+        self.assertIsInstance(epcis_event, template_events.ObjectEvent)
+        self.assertEqual(epcis_event.action, 'ADD')
+
+    def test_handle_unexpected(self):
+        curpath = os.path.dirname(__file__)
+        parser = UnexpectedElementParser(
+            os.path.join(curpath, 'data/epcis.xml'))
+        parser.parse()
+        self.assertIn('epc', parser.unexpected)
+        parser.unexpected = []
+        parser.parse(handle_unexpected=False)
+        self.assertEqual(parser.unexpected, [])
+
+    def test_tag_filter_results(self):
+        curpath = os.path.dirname(__file__)
+        path = os.path.join(curpath, 'data/no-cbv-namespace.xml')
+        filtered = eparsecis.FlexibleNSParser(path).iter_events(
+            handle_unexpected=False)
+        unfiltered = eparsecis.FlexibleNSParser(path).iter_events(
+            handle_unexpected=True)
+        for (kind1, event1), (kind2, event2) in zip(filtered, unfiltered):
+            self.assertEqual(kind1, kind2)
+            if kind1 != 'StandardBusinessDocumentHeader':
+                self.assertEqual(event1.event_time, event2.event_time)
+                self.assertEqual(event1.biz_step, event2.biz_step)
+
+    def test_extended_fields(self):
+        curpath = os.path.dirname(__file__)
+        parser = ExtendedFieldsParser(
+            os.path.join(curpath, 'data/epcis.xml'))
+        for kind, epcis_event in parser.iter_events():
+            if kind == 'ObjectEvent':
+                self.assertEqual(epcis_event.custom_action, 'ADD')
+                self.assertEqual(
+                    epcis_event.biz_step,
+                    'urn:epcglobal:cbv:bizstep:commissioning')
+
+    def test_prefixed_file(self):
+        curpath = os.path.dirname(__file__)
+        path = os.path.join(curpath, 'data/prefixed.xml')
+        events = list(eparsecis.FlexibleNSParser(path).iter_events())
+        self.assertEqual([kind for kind, epcis_event in events],
+                         ['StandardBusinessDocumentHeader',
+                          'ObjectEvent', 'ObjectEvent'])
+        oevent = events[1][1]
+        self.assertEqual(oevent.epc_list, [
+            'urn:epc:id:sgtin:0614141.107346.1',
+            'urn:epc:id:sgtin:0614141.107346.2',
+            'urn:epc:id:sgtin:0614141.107346.3'])
+        self.assertEqual(oevent.action, 'ADD')
+        self.assertEqual(oevent.disposition, 'urn:epcglobal:cbv:disp:encoded')
+        # the example:lastValidated element must not be taken for the id
+        self.assertEqual(oevent.read_point, 'urn:epc:id:sgln:0614141.00777.0')
+        self.assertEqual(oevent.biz_location,
+                         'urn:epc:id:sgln:0614141.00888.0')
+        # the EPCISParser only finds non-namespaced elements
+        events = list(eparsecis.EPCISParser(path).iter_events())
+        self.assertEqual([kind for kind, epcis_event in events],
+                         ['StandardBusinessDocumentHeader'])
+
+    def test_epc_chunks(self):
+        curpath = os.path.dirname(__file__)
+        path = os.path.join(curpath, 'data/epcis.xml')
+        parser = ChunkParser(path)
+        events = list(parser.iter_events())
+        expected = list(eparsecis.FlexibleNSParser(
+            path, fast_records=True).iter_events())
+        self.assertTrue(parser.chunks)
+        for epcs in [epcs for _, _, epcs in parser.chunks]:
+            self.assertLessEqual(len(epcs), 2)
+        for (kind, epcis_event), (_, expected_event) in zip(
+                events, expected):
+            if kind == 'StandardBusinessDocumentHeader':
+                continue
+            for attribute in ('epc_list', 'child_epcs', 'input_epc_list',
+                              'output_epc_list'):
+                if not hasattr(epcis_event, attribute):
+                    continue
+                self.assertEqual(getattr(epcis_event, attribute), [])
+                setattr(epcis_event, attribute, [
+                    epc for chunk_event, chunk_attribute, epcs
+                    in parser.chunks for epc in epcs
+                    if chunk_event is epcis_event and
+                    chunk_attribute == attribute])
+            self.assertEqual(epcis_event, expected_event)
+
+    def test_feed(self):
+        curpath = os.path.dirname(__file__)
+        path = os.path.join(curpath, 'data/prefixed.xml')
+        with open(path, 'rb') as stream:
+            data = stream.read()
+        expected = list(eparsecis.FlexibleNSParser(
+            path, fast_records=True).iter_events())
+        parser = eparsecis.FlexibleNSParser(fast_records=True)
+        for document in range(2):
+            events = []
+            for start in range(0, len(data), 13):
+                events.extend(parser.feed(data[start:start + 13]))
+            # the events are parsed as soon as they are complete
+            self.assertEqual(events, expected)
+            self.assertEqual(parser.close(), [])
+        parser.feed(data[:len(data) // 2])
+        with self.assertRaises(etree.XMLSyntaxError):
+            parser.close()
+
+
 if __name__ == '__main__':
     unittest.main()
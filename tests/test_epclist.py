@@ -0,0 +1,103 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2018 SerialLab Corp.  All rights reserved.
+
+import os
+import pickle
+import unittest
+
+from eparsecis import eparsecis
+from eparsecis.epclist import EPCList
+
+SGTIN = 'urn:epc:id:sgtin:305555.0555555.'
+
+
+class TestEPCList(unittest.TestCase):
+
+    def setUp(self):
+        self.epcs = [SGTIN + str(serial) for serial in range(1, 11)]
+        self.epcs += [SGTIN + serial for serial in
+                      ('ABC123', '007', '99', '100', '0')]
+        self.epcs += ['urn:epc:id:sscc:305555.0000000001',
+                      'urn:epc:id:sgtin:305555.0666666.12',
+                      SGTIN + '11']
+
+    def test_sequence(self):
+        epcs = EPCList(self.epcs)
+        self.assertEqual(len(epcs), len(self.epcs))
+        self.assertEqual(list(epcs), self.epcs)
+        self.assertEqual(epcs, self.epcs)
+        for index in range(-len(self.epcs), len(self.epcs)):
+            self.assertEqual(epcs[index], self.epcs[index])
+        self.assertEqual(epcs[3:12], self.epcs[3:12])
+        with self.assertRaises(IndexError):
+            epcs[len(self.epcs)]
+
+    def test_contains(self):
+        epcs = EPCList(self.epcs)
+        for epc in self.epcs:
+            self.assertIn(epc, epcs)
+        for epc in (SGTIN + '12', SGTIN + '07', SGTIN + 'ABC',
+                    'urn:epc:id:sgtin:305555.0777777.1', None):
+            self.assertNotIn(epc, epcs)
+
+    def test_runs(self):
+        epcs = EPCList(SGTIN + str(serial) for serial in range(1, 100001))
+        groups = list(epcs.groups())
+        self.assertEqual(groups, [(SGTIN, range(1, 100001))])
+        self.assertEqual(epcs[-1], SGTIN + '100000')
+
+    def test_unpacked_values(self):
+        # the text of pretty printed and of empty <epc> elements
+        values = [SGTIN + '1', '\n  ' + SGTIN + '2\n', None, SGTIN + '3',
+                  SGTIN + '4', None]
+        epcs = EPCList(values)
+        self.assertEqual(len(epcs), len(values))
+        self.assertEqual(list(epcs), values)
+        self.assertEqual(epcs, values)
+        for index, value in enumerate(values):
+            self.assertEqual(epcs[index], value)
+            self.assertIn(value, epcs)
+        self.assertNotIn(SGTIN + '2', epcs)
+        self.assertEqual(pickle.loads(pickle.dumps(epcs)), values)
+
+    def test_pickle(self):
+        epcs = EPCList(self.epcs)
+        copy = pickle.loads(pickle.dumps(epcs))
+        self.assertEqual(copy, epcs)
+        self.assertIn(SGTIN + '99', copy)
+
+    def test_parser(self):
+        path = os.path.join(os.path.dirname(__file__), 'data/epcis.xml')
+        expected = dict(eparsecis.EPCISParser(path).iter_events())
+        for fast_records in (False, True):
+            events = dict(eparsecis.EPCISParser(
+                path, fast_records=fast_records,
+                compact_epc_lists=True).iter_events())
+            oevent = events['ObjectEvent']
+            self.assertIsInstance(oevent.epc_list, EPCList)
+            self.assertEqual(oevent.epc_list, expected['ObjectEvent'].epc_list)
+            self.assertIsInstance(events['AggregationEvent'].child_epcs,
+                                  EPCList)
+            tevent = events['TransformationEvent']
+            self.assertEqual(tevent.input_epc_list,
+                             expected['TransformationEvent'].input_epc_list)
+            self.assertEqual(tevent.output_epc_list,
+                             expected['TransformationEvent'].output_epc_list)
+        self.assertEqual(events['ObjectEvent'].to_epcpyyes().render(),
+                         expected['ObjectEvent'].render())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,227 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2018 SerialLab Corp.  All rights reserved.
+
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from eparsecis import eparsecis, jsonld
+
+
+class CollectingParser(jsonld.JSONParser):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.handled = []
+        self.unexpected = []
+
+    def handle_object_event(self, epcis_event):
+        self.handled.append(epcis_event)
+
+    def handle_aggregation_event(self, epcis_event):
+        self.handled.append(epcis_event)
+
+    def handle_transaction_event(self, epcis_event):
+        self.handled.append(epcis_event)
+
+    def handle_transformation_event(self, epcis_event):
+        self.handled.append(epcis_event)
+
+    def parse_unexpected_json_event(self, kind, data):
+        self.unexpected.append(kind)
+
+
+class TestJSONParser(unittest.TestCase):
+
+    def setUp(self):
+        curpath = os.path.dirname(__file__)
+        self.path = os.path.join(curpath, 'data/epcis.jsonld')
+        with open(self.path, 'rb') as stream:
+            self.data = stream.read()
+        # the JSON document holds the events of the XML document
+        self.expected = [
+            (kind, epcis_event) for kind, epcis_event in
+            eparsecis.EPCISParser(os.path.join(curpath, 'data/epcis.xml'),
+                                  fast_records=True).iter_events()
+            if kind.endswith('Event')]
+
+    def test_same_events(self):
+        for source in (self.path, io.BytesIO(self.data),
+                       io.BytesIO(gzip.compress(self.data))):
+            parser = CollectingParser(source, fast_records=True)
+            events = list(parser.iter_events())
+            self.assertEqual(events, self.expected)
+            self.assertEqual(parser.handled,
+                             [epcis_event for kind, epcis_event in events])
+            self.assertEqual(parser.unexpected, ['AssociationEvent'])
+
+    def test_epcpyyes(self):
+        events = list(jsonld.JSONParser(self.path).iter_events())
+        self.assertEqual([kind for kind, epcis_event in events],
+                         [kind for kind, epcis_event in self.expected])
+        self.assertEqual(events[2][1].biz_step,
+                         'urn:epcglobal:cbv:bizstep:shipping')
+        self.assertEqual(events[3][1].error_declaration.reason,
+                         self.expected[3][1].error_declaration.reason)
+
+    def test_event_list_scanner(self):
+        for chunk_size in (1, 7, 65536):
+            items = list(jsonld.iter_event_list(io.BytesIO(self.data),
+                                                chunk_size))
+            self.assertEqual([item['type'] for item in items],
+                             [kind for kind, epcis_event in self.expected] +
+                             ['AssociationEvent'])
+        self.assertEqual(list(jsonld.iter_event_list(io.BytesIO(
+            b'{"epcisBody": {"eventList" : [ ]}}'))), [])
+        with self.assertRaises(ValueError):
+            list(jsonld.iter_event_list(io.BytesIO(self.data[:500])))
+
+    def test_without_ijson(self):
+        events = list(jsonld.JSONParser(
+            self.path, fast_records=True, use_ijson=False).iter_events())
+        self.assertEqual(events, self.expected)
+
+    def test_ilmd_values(self):
+        data = json.dumps({'epcisBody': {'eventList': [{
+            'type': 'ObjectEvent', 'action': 'ADD',
+            'ilmd': {'ex:lot': 'LOT1', 'ex:flag': True, 'ex:count': 3,
+                     'ex:weight': 1.5, 'ex:nested': {'a': 1},
+                     'ex:empty': None}}]}}).encode()
+        for use_ijson in (True, False):
+            events = list(jsonld.JSONParser(
+                io.BytesIO(data), fast_records=True,
+                use_ijson=use_ijson).iter_events())
+            # the values are the text the XML element would hold
+            self.assertEqual(
+                {element.name: element.value
+                 for element in events[0][1].ilmd},
+                {'lot': 'LOT1', 'flag': 'true', 'count': '3',
+                 'weight': '1.5', 'nested': '{"a": 1}', 'empty': None})
+
+
+class TestJSONLDWriter(unittest.TestCase):
+
+    def setUp(self):
+        curpath = os.path.dirname(__file__)
+        self.path = os.path.join(curpath, 'data/epcis.xml')
+        self.expected = [
+            (kind, epcis_event) for kind, epcis_event in
+            eparsecis.EPCISParser(self.path, fast_records=True).iter_events()
+            if kind.endswith('Event')]
+
+    def test_round_trip(self):
+        for fast_records in (True, False):
+            stream = io.BytesIO()
+            with jsonld.JSONLDWriter(stream, indent=2) as writer:
+                self.assertEqual(writer.write_events(eparsecis.EPCISParser(
+                    self.path, fast_records=fast_records).iter_events()), 4)
+            # the caller's stream is left open
+            stream.seek(0)
+            events = list(jsonld.JSONParser(
+                stream, fast_records=True).iter_events())
+            if fast_records:
+                self.assertEqual(events, self.expected)
+            else:
+                # EPCPyYes defaults the declaration time of the error
+                # declaration to the current time
+                for (kind, epcis_event), (expected_kind, expected) in zip(
+                        events, self.expected):
+                    epcis_event.error_declaration = \
+                        expected.error_declaration
+                    self.assertEqual((kind, epcis_event),
+                                     (expected_kind, expected))
+
+    def test_header(self):
+        header = [epcis_object for kind, epcis_object in
+                  eparsecis.EPCISParser(self.path).iter_events()
+                  if kind == 'StandardBusinessDocumentHeader'][0]
+        for fast_records in (True, False):
+            stream = io.StringIO()
+            writer = jsonld.JSONLDWriter(
+                stream, header={'epcisMasterData': {}})
+            self.assertEqual(writer.write_events(eparsecis.EPCISParser(
+                self.path, fast_records=fast_records)), 4)
+            # the header can not follow the events
+            with self.assertRaises(ValueError):
+                writer.write_header(header)
+            writer.close()
+            stream.seek(0)
+            document = json.load(stream)
+            self.assertEqual(document['epcisHeader']['epcisMasterData'], {})
+            sbdh = document['epcisHeader']['StandardBusinessDocumentHeader']
+            self.assertEqual(sbdh['headerVersion'], '1.0')
+            self.assertEqual(sbdh['sender'][0]['identifier'], {
+                'authority': 'SGLN',
+                'value': 'urn:epc:id:sgln:039999.999999.0'})
+            self.assertEqual(sbdh['receiver'][0]['contact'], 'Joe Blow')
+            self.assertEqual(
+                sbdh['documentIdentification']['instanceIdentifier'],
+                header.document_identification.instance_identifier)
+            # the events are still read back
+            self.assertEqual(
+                [kind for kind, epcis_event in jsonld.JSONParser(
+                    io.BytesIO(stream.getvalue().encode()),
+                    fast_records=True).iter_events()],
+                [kind for kind, epcis_event in self.expected])
+
+    def test_documents(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'events.jsonld')
+            with jsonld.JSONLDWriter(path, creation_date='2018-01-01',
+                                     header={'epcisMasterData': {}},
+                                     compact=False) as writer:
+                for kind, epcis_event in self.expected[:2]:
+                    writer.write(kind, epcis_event)
+            with open(path) as stream:
+                document = json.load(stream)
+        finally:
+            shutil.rmtree(directory)
+        self.assertEqual(document['creationDate'], '2018-01-01')
+        self.assertEqual(document['epcisHeader'], {'epcisMasterData': {}})
+        events = document['epcisBody']['eventList']
+        self.assertEqual(len(events), 2)
+        self.assertEqual(events[0]['bizStep'],
+                         'urn:epcglobal:cbv:bizstep:commissioning')
+        self.assertEqual(events[1]['childEPCs'],
+                         list(self.expected[1][1].child_epcs))
+        stream = io.StringIO()
+        jsonld.JSONLDWriter(stream).close()
+        self.assertEqual(
+            json.loads(stream.getvalue())['epcisBody']['eventList'], [])
+        # a failed write leaves the document unfinished
+        stream = io.BytesIO()
+        with self.assertRaises(RuntimeError):
+            with jsonld.JSONLDWriter(stream) as writer:
+                writer.write_events(self.expected)
+                raise RuntimeError()
+        self.assertFalse(stream.closed)
+        with self.assertRaises(ValueError):
+            json.loads(stream.getvalue().decode('utf-8'))
+        # parsers are iterated, unless their events are chunked
+        writer = jsonld.JSONLDWriter(io.StringIO())
+        self.assertEqual(writer.write_events(eparsecis.EPCISParser(
+            self.path, fast_records=True)), 4)
+        with self.assertRaises(ValueError):
+            writer.write_events(eparsecis.EPCISParser(
+                self.path, fast_records=True, epc_chunk_size=3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2018 SerialLab Corp.  All rights reserved.
+
+import io
+import os
+import unittest
+
+from eparsecis import eparsecis
+from eparsecis.records import VocabularyElementRecord
+
+
+class VocabularyParser(eparsecis.EPCISParser):
+
+    def __init__(self, stream):
+        super().__init__(stream)
+        self.records = []
+
+    def handle_vocabulary_element(self, record):
+        self.records.append(record)
+
+
+class TestMasterData(unittest.TestCase):
+
+    def setUp(self):
+        curpath = os.path.dirname(__file__)
+        self.mdd = os.path.join(curpath, 'data/mdd.xml')
+        self.header = os.path.join(curpath, 'data/header-masterdata.xml')
+
+    def test_master_data_document(self):
+        events = list(eparsecis.MasterDataParser(self.mdd).iter_events())
+        self.assertEqual([kind for kind, record in events],
+                         ['VocabularyElement'] * 3)
+        record = events[1][1]
+        self.assertIsInstance(record, VocabularyElementRecord)
+        self.assertEqual(record.vocabulary_type,
+                         'urn:epcglobal:epcis:vtype:ReadPoint')
+        self.assertEqual(record.id, 'urn:epc:id:sgln:0614141.00300.1')
+        self.assertEqual(len(record.attributes), 4)
+        self.assertEqual(record.get_attribute('urn:epcglobal:cbv:mda:sst'),
+                         '208')
+        self.assertIsNone(record.get_attribute('urn:epcglobal:cbv:mda:x'))
+
+    def test_header_master_data(self):
+        expected = [
+            VocabularyElementRecord(
+                'urn:epcglobal:epcis:vtype:EPCClass',
+                'urn:epc:idpat:sgtin:0614141.107346.*',
+                [('urn:epcglobal:cbv:mda#additionalTradeItemIdentification',
+                  '70614141073464'),
+                 ('urn:epcglobal:cbv:mda#regulatedProductName', 'Aspirin')]),
+            VocabularyElementRecord(
+                'urn:epcglobal:epcis:vtype:BusinessLocation',
+                'urn:epc:id:sgln:0614141.00001.0',
+                [('urn:epcglobal:cbv:mda#name', 'Plant 1')],
+                ['urn:epc:id:sgln:0614141.00001.1',
+                 'urn:epc:id:sgln:0614141.00001.2']),
+        ]
+        parser = VocabularyParser(self.header)
+        events = list(parser.iter_events())
+        self.assertEqual(parser.records, expected)
+        self.assertEqual([kind for kind, epcis_event in events],
+                         ['ObjectEvent'])
+        events = list(eparsecis.MasterDataParser(self.header).iter_events())
+        self.assertEqual(events[:2], [('VocabularyElement', record)
+                                      for record in expected])
+        self.assertEqual([kind for kind, epcis_event in events[2:]],
+                         ['ObjectEvent'])
+
+    def test_nested_attributes(self):
+        document = b'''<epcismd:EPCISMasterDataDocument
+            xmlns:epcismd="urn:epcglobal:epcis-masterdata:xsd:1">
+          <EPCISBody><VocabularyList>
+            <Vocabulary type="urn:epcglobal:epcis:vtype:BusinessLocation">
+              <VocabularyElementList>
+                <VocabularyElement id="urn:epc:id:sgln:0614141.00001.0">
+                  <attribute id="urn:example:address">
+                    <street>100 Main St</street><!-- note -->
+                    <city>Springfield</city>
+                  </attribute>
+                  <attribute id="urn:epcglobal:cbv:mda#name">
+                    Plant 1
+                  </attribute>
+                </VocabularyElement>
+              </VocabularyElementList>
+            </Vocabulary>
+          </VocabularyList></EPCISBody>
+        </epcismd:EPCISMasterDataDocument>'''
+        kind, record = next(eparsecis.MasterDataParser(
+            io.BytesIO(document)).iter_events())
+        self.assertEqual(record.get_attribute('urn:example:address'),
+                         '<street>100 Main St</street>\n'
+                         '                    <city>Springfield</city>')
+        self.assertEqual(record.get_attribute('urn:epcglobal:cbv:mda#name'),
+                         'Plant 1')
+        # EPCPyYes has no master data classes
+        self.assertFalse(hasattr(record, 'to_epcpyyes'))
+
+
+if __name__ == '__main__':
+    unittest.main()
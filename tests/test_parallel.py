@@ -0,0 +1,119 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2018 SerialLab Corp.  All rights reserved.
+
+import os
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from eparsecis import eparsecis, parallel, scanner
+
+
+def count_epcs(kind, epcis_event):
+    return kind, len(getattr(epcis_event, 'epc_list', []))
+
+
+class TestParallel(unittest.TestCase):
+
+    def setUp(self):
+        curpath = os.path.dirname(__file__)
+        self.paths = [os.path.join(curpath, 'data', name) for name in
+                      ('epcis.xml', 'missing.xml', 'prefixed.xml',
+                       'no-cbv-namespace.xml')]
+
+    def test_parse_files(self):
+        results = list(parallel.parse_files(
+            self.paths, parser_class=eparsecis.FlexibleNSParser,
+            parser_kwargs={'fast_records': True}, max_workers=2))
+        self.assertEqual([result.path for result in results], self.paths)
+        self.assertIsInstance(results[1].error, parallel.FileParseError)
+        self.assertIn('missing.xml', str(results[1].error))
+        for path, result in zip(self.paths[::2], results[::2]):
+            self.assertIsNone(result.error)
+            expected = list(eparsecis.FlexibleNSParser(
+                path, fast_records=True).iter_events())
+            self.assertEqual(result.events, expected)
+
+    def test_unordered(self):
+        results = list(parallel.parse_files(
+            self.paths, handler=count_epcs, max_workers=2, ordered=False))
+        self.assertEqual(sorted(result.path for result in results),
+                         sorted(self.paths))
+        results = {result.path: result for result in results}
+        self.assertIn(('ObjectEvent', 5), results[self.paths[0]].events)
+
+    def test_iter_events(self):
+        values = list(parallel.iter_events(
+            self.paths, handler=count_epcs, max_workers=2))
+        self.assertEqual(values[0], (self.paths[0],
+                                     ('StandardBusinessDocumentHeader', 0)))
+        self.assertNotIn(self.paths[1], [path for path, value in values])
+        with self.assertRaises(parallel.FileParseError):
+            list(parallel.iter_events(self.paths, handler=count_epcs,
+                                      max_workers=2, raise_errors=True))
+
+    def test_bounded_submission(self):
+        submitted = []
+        release = threading.Event()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            def submit(item):
+                submitted.append(item)
+                return executor.submit(release.wait)
+
+            futures = iter(parallel._Submitter(submit, range(100), 1))
+            # two calls per worker are pending at any time
+            self.assertEqual(submitted, [0, 1])
+            release.set()
+            self.assertEqual(next(futures)[1], 0)
+            self.assertEqual(submitted, [0, 1, 2])
+            futures.close()
+            self.assertEqual(len(submitted), 3)
+
+    def test_unpicklable_events(self):
+        # EPCPyYes objects can not be sent back from the workers
+        result = next(parallel.parse_files(self.paths[:1], max_workers=1))
+        self.assertIsInstance(result.error, parallel.FileParseError)
+
+    def test_scan(self):
+        with open(self.paths[0], 'rb') as stream:
+            buffer = stream.read()
+        layout = scanner.scan(buffer)
+        # the TransformationEvent is wrapped in an EPCIS 1.1 extension
+        self.assertEqual(
+            [buffer[boundary:].split(b'>')[0].strip()
+             for boundary in layout.boundaries],
+            [b'<ObjectEvent', b'<AggregationEvent', b'<TransactionEvent',
+             b'<extension'])
+        self.assertTrue(buffer[slice(*layout.header)].startswith(
+            b'<EPCISHeader'))
+        self.assertIsNone(scanner.scan(b'<EPCISDocument><EventList/>'
+                                       b'</EPCISDocument>'))
+
+    def test_parse_document(self):
+        for path in self.paths[::2]:
+            expected = list(eparsecis.FlexibleNSParser(
+                path, fast_records=True).iter_events())
+            for shard_size in (1, 1000):
+                events = list(parallel.parse_document(
+                    path, parser_class=eparsecis.FlexibleNSParser,
+                    parser_kwargs={'fast_records': True}, max_workers=2,
+                    shard_size=shard_size))
+                self.assertEqual(events, expected)
+        with self.assertRaises(parallel.FileParseError):
+            list(parallel.parse_document(self.paths[1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2018 SerialLab Corp.  All rights reserved.
+
+import os
+import pickle
+import unittest
+
+from EPCPyYes.core.v1_2 import template_events
+from EPCPyYes.core.SBDH import template_sbdh
+from eparsecis import eparsecis, records
+
+
+class TestRecords(unittest.TestCase):
+
+    def setUp(self):
+        curpath = os.path.dirname(__file__)
+        self.path = os.path.join(curpath, 'data/epcis.xml')
+
+    def test_fast_records(self):
+        events = dict(eparsecis.EPCISParser(
+            self.path, fast_records=True).iter_events())
+        header = events['StandardBusinessDocumentHeader']
+        self.assertIsInstance(header,
+                              records.StandardBusinessDocumentHeaderRecord)
+        self.assertEqual(len(header.partners), 2)
+        self.assertEqual(header.partners[0].partner_id.value,
+                         'urn:epc:id:sgln:039999.999999.0')
+        oevent = events['ObjectEvent']
+        self.assertIsInstance(oevent, records.ObjectEventRecord)
+        self.assertEqual(len(oevent.epc_list), 5)
+        self.assertEqual(oevent.business_transaction_list[0].type,
+                         'urn:epcglobal:cbv:btt:po')
+        self.assertEqual(
+            [(ilmd.name, ilmd.value) for ilmd in oevent.ilmd],
+            [('itemExpirationDate', '2015-12-31'), ('lotNumber', 'DL232')])
+        tevent = events['TransformationEvent']
+        self.assertEqual(tevent.transformation_id, '391')
+        self.assertEqual(
+            len(tevent.error_declaration.corrective_event_ids), 2)
+
+    def test_to_epcpyyes(self):
+        events = dict(eparsecis.EPCISParser(
+            self.path, fast_records=True).iter_events())
+        header = events['StandardBusinessDocumentHeader'].to_epcpyyes()
+        self.assertIsInstance(header,
+                              template_sbdh.StandardBusinessDocumentHeader)
+        expected = dict(eparsecis.EPCISParser(self.path).iter_events())
+        for kind in ('ObjectEvent', 'AggregationEvent', 'TransactionEvent'):
+            epcis_event = events[kind].to_epcpyyes()
+            self.assertIsInstance(epcis_event,
+                                  getattr(template_events, kind))
+            self.assertEqual(epcis_event.render(), expected[kind].render())
+
+    def test_pickle(self):
+        events = list(eparsecis.FlexibleNSParser(
+            self.path, fast_records=True).iter_events())
+        self.assertEqual(pickle.loads(pickle.dumps(events)), events)
+
+
+if __name__ == '__main__':
+    unittest.main()
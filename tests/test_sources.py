@@ -0,0 +1,116 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2018 SerialLab Corp.  All rights reserved.
+
+import bz2
+import gzip
+import io
+import lzma
+import os
+import shutil
+import tempfile
+import unittest
+
+from eparsecis import eparsecis, scanner, sources
+
+
+class TestSources(unittest.TestCase):
+
+    def setUp(self):
+        curpath = os.path.dirname(__file__)
+        self.path = os.path.join(curpath, 'data/epcis.xml')
+        with open(self.path, 'rb') as stream:
+            self.data = stream.read()
+        self.expected = list(eparsecis.EPCISParser(
+            self.path, fast_records=True).iter_events())
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def check(self, compressed, compression):
+        self.assertEqual(sources.get_compression(compressed[:6]),
+                         compression)
+        path = os.path.join(self.directory, 'epcis.xml.compressed')
+        with open(path, 'wb') as stream:
+            stream.write(compressed)
+        for buffer_size in (None, 16):
+            for source in (path, io.BytesIO(compressed)):
+                events = list(eparsecis.EPCISParser(
+                    source, fast_records=True,
+                    buffer_size=buffer_size).iter_events())
+                self.assertEqual(events, self.expected)
+
+    def test_uncompressed(self):
+        self.check(self.data, None)
+
+    def test_gzip(self):
+        self.check(gzip.compress(self.data), sources.GZIP)
+
+    def test_bz2(self):
+        self.check(bz2.compress(self.data), sources.BZIP2)
+
+    def test_xz(self):
+        self.check(lzma.compress(self.data), sources.XZ)
+
+    @unittest.skipIf(sources.zstandard is None, 'zstandard is not installed')
+    def test_zstd(self):
+        compressor = sources.zstandard.ZstdCompressor()
+        # documents written in several frames are read across the frames
+        self.check(compressor.compress(self.data[:1000]) +
+                   compressor.compress(self.data[1000:]), sources.ZSTD)
+
+    def test_prefixed_stream(self):
+        stream = sources.PrefixedStream(b'abc', io.BytesIO(b'defg'))
+        self.assertEqual(stream.read(2), b'ab')
+        self.assertEqual(stream.read(3), b'cde')
+        self.assertEqual(stream.read(), b'fg')
+
+    def test_mmap(self):
+        events = list(eparsecis.EPCISParser(
+            self.path, fast_records=True, use_mmap=True).iter_events())
+        self.assertEqual(events, self.expected)
+        path = os.path.join(self.directory, 'epcis.xml.gz')
+        with open(path, 'wb') as stream:
+            stream.write(gzip.compress(self.data))
+        events = list(eparsecis.EPCISParser(
+            path, fast_records=True, use_mmap=True).iter_events())
+        self.assertEqual(events, self.expected)
+
+    def test_shared_mapping(self):
+        with sources.map_file(self.path) as mapped:
+            header_document, shards = scanner.scan_file(
+                self.path, 1, buffer=mapped)
+            events = list(eparsecis.EPCISParser(
+                io.BytesIO(header_document), fast_records=True).iter_events())
+            for shard in shards:
+                events.extend(eparsecis.EPCISParser(
+                    shard.open(mapped), fast_records=True).iter_events())
+            # the parsers read the mapping from their own positions
+            self.assertEqual(events, list(eparsecis.EPCISParser(
+                mapped, fast_records=True).iter_events()))
+        self.assertEqual(events, self.expected)
+
+    def test_chained_stream(self):
+        stream = sources.ChainedStream(
+            io.BytesIO(b'ab'), sources.BufferStream(b'0cde0', 1, 4),
+            io.BytesIO(b'fg'))
+        self.assertEqual(stream.read(3), b'abc')
+        self.assertEqual(stream.read(3), b'def')
+        self.assertEqual(stream.read(), b'g')
+        self.assertEqual(stream.read(1), b'')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2018 SerialLab Corp.  All rights reserved.
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from eparsecis.sqlite import SQLiteFlexibleNSParser, SQLiteParser, \
+    SQLiteSink
+
+TABLES = ('event', 'event_epc', 'business_transaction', 'quantity', 'ilmd',
+          'source_destination')
+
+
+class TestSQLiteSink(unittest.TestCase):
+
+    def setUp(self):
+        curpath = os.path.dirname(__file__)
+        self.path = os.path.join(curpath, 'data/epcis.xml')
+        self.directory = tempfile.mkdtemp()
+        self.database = os.path.join(self.directory, 'events.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def count(self, connection):
+        return {table: connection.execute(
+            'SELECT COUNT(*) FROM {0}'.format(table)).fetchone()[0]
+            for table in TABLES}
+
+    def test_fixture(self):
+        for fast_records in (True, False):
+            connection = sqlite3.connect(':memory:')
+            with SQLiteSink(connection, batch_size=3) as sink:
+                SQLiteParser(self.path, fast_records=fast_records,
+                             sink=sink).parse()
+            self.assertEqual(sink.events, 4)
+            self.assertEqual(self.count(connection), {
+                'event': 4, 'event_epc': 35, 'business_transaction': 5,
+                'quantity': 8, 'ilmd': 4, 'source_destination': 16})
+            self.assertEqual(connection.execute(
+                'SELECT kind, parent_id FROM event WHERE id = 2').fetchone(),
+                ('AggregationEvent', 'urn:epc:id:sgtin:305555.3555555.1'))
+            self.assertEqual(connection.execute(
+                "SELECT COUNT(*) FROM event_epc WHERE list = 'child'"
+            ).fetchone()[0], 5)
+
+    def test_batches(self):
+        with SQLiteSink(self.database, batch_size=3,
+                        journal_mode='WAL', synchronous='OFF') as sink:
+            parser = SQLiteParser(self.path, fast_records=True, sink=sink)
+            parser.parse()
+            # the last batch has not been written yet
+            reader = sqlite3.connect(self.database)
+            self.assertEqual(self.count(reader)['event'], 3)
+            SQLiteParser(self.path, fast_records=True, sink=sink).parse()
+            self.assertEqual(self.count(reader)['event'], 6)
+        self.assertEqual(reader.execute(
+            'PRAGMA journal_mode').fetchone()[0], 'wal')
+        # appending to an existing database continues the ids
+        with SQLiteSink(self.database) as sink:
+            SQLiteParser(self.path, fast_records=True, sink=sink).parse()
+        self.assertEqual(reader.execute(
+            'SELECT MIN(id), MAX(id), COUNT(*) FROM event').fetchone(),
+            (1, 12, 12))
+        reader.close()
+
+    def test_epc_chunks(self):
+        connection = sqlite3.connect(self.database)
+        connection.execute('PRAGMA foreign_keys = ON')
+        reader = sqlite3.connect(self.database)
+        with SQLiteSink(connection, max_epcs=4) as sink:
+            SQLiteFlexibleNSParser(self.path, fast_records=True,
+                                   epc_chunk_size=3, sink=sink).parse()
+            # the EPCs are only committed with the batch of their event
+            self.assertEqual(set(self.count(reader).values()), {0})
+        reader.close()
+        expected = sqlite3.connect(':memory:')
+        with SQLiteSink(expected) as sink:
+            SQLiteFlexibleNSParser(self.path, fast_records=True,
+                                   sink=sink).parse()
+        query = 'SELECT * FROM event_epc ORDER BY event, list, epc'
+        self.assertEqual(connection.execute(query).fetchall(),
+                         expected.execute(query).fetchall())
+        self.assertEqual(self.count(connection), self.count(expected))
+
+
+if __name__ == '__main__':
+    unittest.main()
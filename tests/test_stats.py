@@ -0,0 +1,133 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2018 SerialLab Corp.  All rights reserved.
+
+import gzip
+import io
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from eparsecis import checkpoint, eparsecis, jsonld, stats
+
+
+class SlowParser(eparsecis.EPCISParser):
+
+    def handle_object_event(self, epcis_event):
+        time.sleep(0.01)
+
+
+class TestParseStats(unittest.TestCase):
+
+    def setUp(self):
+        curpath = os.path.dirname(__file__)
+        self.path = os.path.join(curpath, 'data/epcis.xml')
+        with open(self.path, 'rb') as stream:
+            self.data = stream.read()
+        self.expected = list(eparsecis.EPCISParser(
+            self.path, fast_records=True).iter_events())
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def check_counts(self, parse_stats):
+        self.assertEqual(parse_stats.counts, {
+            'StandardBusinessDocumentHeader': 1, 'ObjectEvent': 1,
+            'AggregationEvent': 1, 'TransactionEvent': 1,
+            'TransformationEvent': 1})
+        self.assertEqual(parse_stats.events, 5)
+        self.assertEqual(parse_stats.epcs, 35)
+        self.assertEqual(set(parse_stats.times), set(stats.PHASES))
+        self.assertGreater(parse_stats.elapsed, 0)
+        self.assertGreater(parse_stats.events_per_second, 0)
+
+    def test_sources(self):
+        gzip_path = os.path.join(self.directory, 'epcis.xml.gz')
+        with open(gzip_path, 'wb') as stream:
+            stream.write(gzip.compress(self.data))
+        for source, size in ((self.path, len(self.data)),
+                             (gzip_path, os.path.getsize(gzip_path)),
+                             (io.BytesIO(self.data), len(self.data))):
+            reports = []
+            parser = eparsecis.EPCISParser(
+                source, fast_records=True, stats=stats.ParseStats(
+                    progress=lambda s: reports.append(s.percent),
+                    interval=0))
+            self.assertEqual(list(parser.iter_events()), self.expected)
+            self.check_counts(parser.stats)
+            self.assertEqual(parser.stats.total_bytes, size)
+            self.assertEqual(parser.stats.percent, 1.0)
+            self.assertEqual(parser.stats.eta, 0.0)
+            self.assertEqual(len(reports), 6)
+            self.assertEqual(reports, sorted(reports))
+
+    def test_mapped_and_resumed(self):
+        resume = checkpoint.Checkpoint(
+            checkpoint.get_document_id(self.path), 2, None)
+        for parser, kwargs, expected in (
+                (eparsecis.EPCISParser(self.path, fast_records=True,
+                                       use_mmap=True, stats=True),
+                 {}, self.expected),
+                (eparsecis.EPCISParser(self.path, fast_records=True,
+                                       stats=True),
+                 {'resume': resume}, self.expected[2:])):
+            self.assertEqual(list(parser.iter_events(**kwargs)), expected)
+            # mapped files and resumed parses are sized by their buffer
+            self.assertEqual(parser.stats.total_bytes, len(self.data))
+            self.assertEqual(parser.stats.bytes_read, len(self.data))
+            self.assertEqual(parser.stats.percent, 1.0)
+
+    def test_feed(self):
+        reports = []
+        parser = eparsecis.EPCISParser(fast_records=True, stats=True)
+        parser.stats.progress = reports.append
+        events = []
+        for start in range(0, len(self.data), 1000):
+            events.extend(parser.feed(self.data[start:start + 1000]))
+        events.extend(parser.close())
+        self.assertEqual(events, self.expected)
+        self.check_counts(parser.stats)
+        self.assertEqual(parser.stats.bytes_read, len(self.data))
+        self.assertIsNone(parser.stats.percent)
+        # reported once for the events and once at the end
+        self.assertEqual(len(reports), 2)
+
+    def test_phases(self):
+        parse_stats = stats.ParseStats()
+        SlowParser(self.path, epc_chunk_size=2, stats=parse_stats).parse()
+        self.check_counts(parse_stats)
+        times = parse_stats.times
+        self.assertGreaterEqual(times['handle'], 0.01)
+        self.assertGreater(times['construct'], 0)
+        self.assertLess(sum(times.values()), parse_stats.elapsed)
+        # the stats add up across documents
+        SlowParser(self.path, stats=parse_stats).parse()
+        self.assertEqual(parse_stats.events, 10)
+        self.assertEqual(parse_stats.epcs, 70)
+        self.assertEqual(parse_stats.bytes_read, 2 * len(self.data))
+
+    def test_json(self):
+        parser = jsonld.JSONParser(
+            os.path.join(os.path.dirname(self.path), 'epcis.jsonld'),
+            fast_records=True, stats=True)
+        parser.parse(handle_unexpected=False)
+        self.assertEqual(parser.stats.counts['ObjectEvent'], 1)
+        self.assertEqual(parser.stats.percent, 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2018 SerialLab Corp.  All rights reserved.
+
+import unittest
+
+from eparsecis import urn
+from eparsecis.epclist import EPCList
+
+
+class TestURN(unittest.TestCase):
+
+    def test_decode_epc(self):
+        # the examples of the GS1 EPC Tag Data Standard
+        for epc, expected in (
+                ('urn:epc:id:sgtin:0614141.812345.6789',
+                 ('sgtin', '0614141', '812345', '6789', '80614141123458')),
+                ('urn:epc:id:sscc:0614141.1234567890',
+                 ('sscc', '0614141', '1234567890', None,
+                  '106141412345678908')),
+                ('urn:epc:id:sgln:0614141.12345.400',
+                 ('sgln', '0614141', '12345', '400', '0614141123452')),
+                ('urn:epc:id:grai:0614141.12345.400',
+                 ('grai', '0614141', '12345', '400', '00614141123452400')),
+                ('urn:epc:id:giai:0614141.12345400',
+                 ('giai', '0614141', '12345400', None, '061414112345400')),
+                ('urn:epc:class:lgtin:4012345.012345.998877',
+                 ('lgtin', '4012345', '012345', '998877',
+                  '04012345123456'))):
+            self.assertEqual(urn.decode_epc(epc), expected)
+
+    def test_invalid(self):
+        for epc in ('urn:epc:id:sgtin:0614141.81234.6789',
+                    'urn:epc:id:sscc:0614141.12345678',
+                    'urn:epc:id:sgtin:0614141.812345',
+                    'urn:epc:id:xyz:0614141.812345.1',
+                    'urn:epc:id:sgtin:061414A.812345.1'):
+            with self.assertRaises(ValueError):
+                urn.decode_epc(epc)
+        decoded = urn.decode_epcs(['urn:epc:id:sscc:0614141.12345678',
+                                   'urn:epc:id:sgtin:0614141.812345.1'],
+                                  strict=False)
+        rows = list(decoded.rows())
+        self.assertEqual(rows[0], (None,) * 5)
+        self.assertEqual(rows[1][4], '80614141123458')
+
+    def test_batches(self):
+        epcs = ['urn:epc:id:sgtin:0614141.107346.{0}'.format(serial)
+                for serial in range(1000, 1100)]
+        epcs += ['urn:epc:id:sscc:0614141.{0}'.format(serial)
+                 for serial in range(1000000000, 1000000100)]
+        decoded = urn.decode_epcs(epcs)
+        self.assertEqual(len(decoded), 200)
+        self.assertEqual(list(decoded.rows()),
+                         [urn.decode_epc(epc) for epc in epcs])
+        self.assertEqual(urn.decode_epcs(EPCList(epcs)).columns(),
+                         decoded.columns())
+        self.assertEqual(set(decoded.key[:100]), {'10614141073464'})
+        self.assertEqual(decoded.serial[:2], ['1000', '1001'])
+        self.assertTrue(all(urn.validate_check_digits(decoded.key)))
+
+    def test_check_digits(self):
+        bodies = ['{0:017d}'.format(number * 7919)
+                  for number in range(200)]
+        expected = [urn.check_digit(body) for body in bodies]
+        self.assertEqual(urn.check_digits(bodies), expected)
+        keys = [body + digit for body, digit in zip(bodies, expected)]
+        self.assertEqual(urn.validate_check_digits(keys), [True] * 200)
+        keys[3] = keys[3][:-1] + str((int(keys[3][-1]) + 1) % 10)
+        keys[5] = 'x' + keys[5][1:]
+        valid = urn.validate_check_digits(keys)
+        self.assertEqual([index for index, ok in enumerate(valid)
+                          if not ok], [3, 5])
+        self.assertEqual(urn.validate_check_digits(keys[:10]), valid[:10])
+
+    @unittest.skipIf(urn.numpy is None, 'numpy is not installed')
+    def test_to_numpy(self):
+        arrays = urn.decode_epcs(
+            ['urn:epc:id:sgtin:0614141.812345.6789']).to_numpy()
+        self.assertEqual(arrays['key'][0], '80614141123458')
+        self.assertEqual(arrays['serial'].dtype.kind, 'U')
+
+
+if __name__ == '__main__':
+    unittest.main()
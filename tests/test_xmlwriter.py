@@ -0,0 +1,182 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright 2018 SerialLab Corp.  All rights reserved.
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from EPCPyYes.core.v1_2 import template_events
+from lxml import etree
+
+from eparsecis import eparsecis, records, xmlwriter
+
+
+def normalize(xml):
+    '''
+    Strips the whitespace of an XML fragment and canonicalizes it, the
+    templates do not declare the namespaces of their fragments.
+    '''
+    xml = xml.strip()
+    if xml.startswith('<?'):
+        xml = xml.split('?>', 1)[1]
+    root = etree.fromstring(
+        '<root xmlns:sbdh="{0}" xmlns:cbvmd="{1}">{2}</root>'.format(
+            xmlwriter.SBDH_NAMESPACE, xmlwriter.CBV_MDA_NAMESPACE,
+            xml).encode(), etree.XMLParser(remove_blank_text=True))
+    for element in root.iter():
+        if element.text:
+            element.text = element.text.strip() or None
+        if element.tail:
+            element.tail = element.tail.strip() or None
+    # the templates drop the transformation id
+    for element in root.iter('transformationID'):
+        element.getparent().remove(element)
+    return etree.tostring(root[0], method='c14n', exclusive=True)
+
+
+class TestXMLWriter(unittest.TestCase):
+
+    def setUp(self):
+        curpath = os.path.dirname(__file__)
+        self.path = os.path.join(curpath, 'data/epcis.xml')
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_render_equivalence(self):
+        for kind, epcis_object in eparsecis.EPCISParser(
+                self.path).iter_events():
+            error_declaration = getattr(epcis_object, 'error_declaration',
+                                        None)
+            if error_declaration:
+                # the templates render a missing reason as 'None'
+                error_declaration.reason = \
+                    'urn:epcglobal:cbv:er:incorrect_data'
+            self.assertEqual(
+                normalize(xmlwriter.tostring(epcis_object, kind)),
+                normalize(epcis_object.render()))
+
+    def test_round_trip(self):
+        expected = list(eparsecis.EPCISParser(
+            self.path, fast_records=True).iter_events())
+        stream = io.BytesIO()
+        with xmlwriter.EPCISWriter(stream) as writer:
+            self.assertEqual(writer.write_events(expected), 4)
+        events = list(eparsecis.EPCISParser(
+            io.BytesIO(stream.getvalue()), fast_records=True).iter_events())
+        self.assertEqual(events, expected)
+        # records and EPCPyYes objects are written the same way
+        path = os.path.join(self.directory, 'epcis.xml')
+        with xmlwriter.EPCISWriter(path) as writer:
+            writer.write_events(
+                (kind, record.to_epcpyyes()) for kind, record in expected)
+        events = list(eparsecis.EPCISParser(
+            path, fast_records=True).iter_events())
+        self.assertEqual(events, expected)
+        # parsers are iterated, unless their events are chunked
+        with xmlwriter.EPCISWriter(io.BytesIO()) as writer:
+            self.assertEqual(writer.write_events(eparsecis.EPCISParser(
+                self.path, fast_records=True)), 4)
+            with self.assertRaises(ValueError):
+                writer.write_events(eparsecis.EPCISParser(
+                    self.path, fast_records=True, epc_chunk_size=3))
+
+    def test_document(self):
+        events = [parsed for parsed in eparsecis.EPCISParser(
+            self.path, fast_records=True).iter_events()
+            if parsed[0] != 'StandardBusinessDocumentHeader']
+        stream = io.BytesIO()
+        writer = xmlwriter.EPCISWriter(stream, creation_date='2018-01-01')
+        for kind, event in events[::-1]:
+            writer.write(kind, event)
+        writer.write('VocabularyElement', events[0][1])
+        with self.assertRaises(ValueError):
+            writer.write_header(events[0][1])
+        writer.close()
+        document = etree.fromstring(stream.getvalue())
+        self.assertEqual(document.get('creationDate'), '2018-01-01')
+        event_list = document.find('EPCISBody/EventList')
+        self.assertEqual([child.tag for child in event_list],
+                         ['extension', 'TransactionEvent',
+                          'AggregationEvent', 'ObjectEvent'])
+        self.assertEqual(event_list[0][0].tag, 'TransformationEvent')
+        # empty documents are still complete
+        stream = io.BytesIO()
+        xmlwriter.EPCISWriter(stream).close()
+        document = etree.fromstring(stream.getvalue())
+        self.assertEqual(len(document.find('EPCISBody/EventList')), 0)
+
+    def test_failed_write(self):
+        events = list(eparsecis.EPCISParser(
+            self.path, fast_records=True).iter_events())
+        path = os.path.join(self.directory, 'epcis.xml')
+        with self.assertRaises(RuntimeError):
+            with xmlwriter.EPCISWriter(path) as writer:
+                writer.write_events(events[:2])
+                raise RuntimeError()
+        # the document is left unfinished
+        with open(path, 'rb') as stream:
+            data = stream.read()
+        self.assertIn(b'</ObjectEvent>', data)
+        with self.assertRaises(etree.XMLSyntaxError):
+            etree.fromstring(data)
+
+    def test_sparse_event(self):
+        event = records.ObjectEventRecord()
+        event.action = 'ADD'
+        event.epc_list = ['urn:epc:id:sgtin:0614141.107346.2017']
+        event.quantity_list = [records.QuantityElementRecord(None, 10)]
+        event.source_list = [records.SourceRecord(None, 'urn:epc:id:sgln:1')]
+        event.business_transaction_list = [
+            records.BusinessTransactionRecord(None)]
+        element = etree.fromstring(xmlwriter.tostring(event))
+        # missing values are left out rather than written as 'None'
+        self.assertNotIn(b'None', etree.tostring(element))
+        self.assertIsNone(element.find('eventTime'))
+        self.assertEqual(
+            [child.tag for child in element.find(
+                'extension/quantityList/quantityElement')], ['quantity'])
+        source = element.find('extension/sourceList/source')
+        self.assertEqual(source.text, 'urn:epc:id:sgln:1')
+        self.assertIsNone(source.get('type'))
+        self.assertEqual(len(element.find('bizTransactionList')), 0)
+
+    def test_subclassed_events(self):
+        class MyObjectEvent(template_events.ObjectEvent):
+            pass
+
+        class MyParser(eparsecis.EPCISParser):
+            def get_epcpyyes_object_event(self):
+                return MyObjectEvent()
+
+        # logging must not change the results of the parse
+        with self.assertLogs(level='DEBUG'):
+            events = [event for kind, event in
+                      MyParser(self.path).iter_events()
+                      if kind == 'ObjectEvent']
+        self.assertTrue(events)
+        self.assertIsInstance(events[0], MyObjectEvent)
+        self.assertEqual(xmlwriter.get_kind(events[0]), 'ObjectEvent')
+        element = etree.fromstring(xmlwriter.tostring(events[0]))
+        self.assertEqual(element.tag, 'ObjectEvent')
+        with self.assertRaises(ValueError):
+            xmlwriter.get_kind(object())
+
+
+if __name__ == '__main__':
+    unittest.main()